@@ -1,80 +1,94 @@
 import streamlit as st
-import plotly.graph_objects as go
-import pandas as pd
-import plotly.express as px
 from chatbot import EmotionAwareChatbot
-from emotion_detector import EmotionDetector
+from dashboard import DashboardCache, HISTORY_PAGE_SIZE
+from metrics import get_metrics
+from registry import get_registry
+import config
 import streamlit.components.v1 as components
+import uuid
 
 st.set_page_config(page_title="Emotion Bot", layout="wide")
 
 # -------------------- UTILITY FUNCTIONS --------------------
 
-# Update the title color in the CSS styles
-st.markdown("""
-    <style>
-        .main-title {
-            background-color: #00AEEF;
-            color: #000000;
-            padding: 1.5rem;
-            border-radius: 12px;
-            margin: 0 1rem 2rem 1rem;
-            display: flex;
-            align-items: center;
-            gap: 1rem;
-            justify-content: center;
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-# Update the emotion mappings in create_emotion_donut function
-def create_emotion_donut(emotion_counts):
-    """Create a donut chart for emotions"""
-    if not emotion_counts:
-        return None
-    
-    labels = list(emotion_counts.keys())
-    values = list(emotion_counts.values())
-    
-    # Updated color mapping for emotions using blue shades
-    colors = {
-        'joy': '#FFA726',#FFD54F ',  #0066CC',      # Bright blue
-        'sadness': '#003366',#64B5F6',  # Dark blue
-        'anger': '#E53935',#3399FF',    # Light blue
-        'fear': '#6A0DAD',#455A64',     #000080',     # Navy blue
-        'surprise': 'FF7043',#4169E1', # Royal blue
-        'neutral': 'B0BEC5',#87CEEB'   # Sky blue
-    }
-    
-    fig = go.Figure(data=[go.Pie(
-        labels=labels,
-        values=values,
-        hole=.6,
-        marker_colors=[colors.get(emotion.lower(), '#ADD8E6') for emotion in labels],
-        textinfo='label+percent'
-    )])
-    
-    fig.update_layout(
-        showlegend=True,
-        margin=dict(t=0, b=0, l=0, r=0),
-        annotations=[dict(text=f"{sum(values)}", x=0.5, y=0.5, font_size=24, showarrow=False)]
-    )
-    return fig
-
 def plot_emotion_history():
     """Create a line plot of emotion history"""
     if "emotions" not in st.session_state:
         st.session_state.emotions = []
         
     if len(st.session_state.emotions) > 0:
-        df = pd.DataFrame(st.session_state.emotions)
-        fig = px.line(df, x='timestamp', y='emotion', title='Emotion History')
+        # The cached figure is only extended with turns added since the last rerun
+        fig = get_dashboard().history_figure(st.session_state.emotions)
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.write("No emotion history available yet.")
 
+def get_dashboard():
+    if "dashboard" not in st.session_state:
+        st.session_state.dashboard = DashboardCache()
+    return st.session_state.dashboard
+
+def stream_reply(text, selected_lang, container):
+    """Render the assistant bubble incrementally while the reply is decoded"""
+    # A reply still being read out is stale once the user has said something new
+    st.session_state.chatbot.stop_speaking()
+    placeholder = container.empty()
+    reply = ""
+    stream = st.session_state.chatbot.stream_turn(text, selected_lang)
+    for chunk in stream:
+        reply += chunk
+        placeholder.markdown(f'<div class="assistant-message">{reply}▌</div>', unsafe_allow_html=True)
+    placeholder.markdown(f'<div class="assistant-message">{stream.result.response}</div>', unsafe_allow_html=True)
+    return stream.result
+
+def record_turn(result, speak=False):
+    """Store the emotion and assistant reply from a TurnResult, optionally reading the reply out"""
+    emotion_data = result.emotion_data or {}
+    emotion = emotion_data.get("emotion", "neutral")
+    intensity = emotion_data.get("intensity", 0.5)
+    st.session_state.emotions.append({
+        "timestamp": len(st.session_state.emotions),
+        "emotion": emotion,
+        "intensity": intensity
+    })
+    
+    st.session_state.messages.append({"role": "assistant", "content": result.response})
+    st.session_state.last_timings = result.timings
+    if speak and result.response:
+        # Played on the background TTS worker; the reply is already in the selected language
+        st.session_state.chatbot.speak_response(result.response)
+
+def render_debug_panel():
+    """Stage timings of the last turn and the process-wide metrics"""
+    with st.expander("🛠️ Debug metrics", expanded=True):
+        last_timings = st.session_state.get("last_timings")
+        if last_timings:
+            st.markdown("**Last turn**")
+            st.table([
+                {"stage": stage, "ms": round(seconds * 1000, 1)}
+                for stage, seconds in last_timings.items()
+            ])
+        snapshot = get_metrics().snapshot()
+        if snapshot["stages"]:
+            st.markdown("**All turns in this process**")
+            st.table([
+                {
+                    "stage": stage,
+                    "count": m["count"],
+                    "mean ms": round(m["mean_ms"], 1),
+                    "p95 ms": round(m["p95_ms"], 1),
+                    "max ms": round(m["max_ms"], 1)
+                }
+                for stage, m in snapshot["stages"].items()
+            ])
+        if snapshot["counters"]:
+            st.markdown("**Fallbacks, errors and cache lookups**")
+            st.table([{"counter": name, "value": value} for name, value in snapshot["counters"].items()])
+        if not last_timings and not snapshot["stages"]:
+            st.write("No turns measured yet.")
+
 # -------------------- CSS STYLES --------------------
-# In the CSS section
+# All static styles live in this one block
 st.markdown("""
     <style>
         .user-message, .assistant-message {
@@ -168,10 +182,26 @@ with st.sidebar:
         "Marathi : मराठी", "Gujarati : ગુજરાતી", "Malayalam : മലയാളം", "Punjabi : ਪੰਜਾਬੀ", "Urdu : اردو", "Odia : ଓଡ଼ିଆ", "Assamese : অসমীয়া", "Sanskrit : संस्कृतम्"
     ])
     input_method = st.radio("🎤 Input Method", ["Type", "Speak"])
+    speak_replies = st.checkbox("🔊 Speak replies", value=False)
+    show_debug = st.checkbox("🛠️ Show debug metrics", value=False)
     st.markdown("---")
     st.markdown("🕘 **Emotion History**")
     plot_emotion_history()
 
+# -------------------- WARM-UP --------------------
+# Models load and warm up once per process on a background thread; until then every
+# session sees a progress note instead of a chat that would stall on its first message
+if config.WARMUP:
+    warmup = get_registry().warm_up()
+    if not warmup.done:
+        status = warmup.status()
+        st.info(f"⏳ Warming up the models ({status['stage'] or 'starting'}, {status['seconds'] or 0:.0f}s)... "
+                "the chat opens as soon as they are ready.")
+        warmup.wait(timeout=1)
+        st.rerun()
+    elif not warmup.ready:
+        st.warning(f"Model warm-up failed ({warmup.error}); the first reply may be slow.")
+
 # -------------------- MAIN CONTENT --------------------
 st.markdown('<div class="content-wrapper">', unsafe_allow_html=True)
 
@@ -215,40 +245,30 @@ with col1:
                     st.session_state.recording = False
                     try:
                         import speech_recognition as sr
-                        recognizer = sr.Recognizer()
+                        speech = st.session_state.chatbot.speech_handler
+                        recognizer = speech.recognizer
                         with sr.Microphone() as source:
-                            st.info("🎤 Adjusting for ambient noise... Please wait.")
-                            recognizer.adjust_for_ambient_noise(source, duration=1)
+                            # The ambient noise profile is measured once and reused for the session
+                            if speech.vad.noise_floor is None:
+                                st.info("🎤 Measuring background noise... Please wait.")
+                            speech.calibrate(recognizer, source)
                             st.info(f"🎤 Listening... Speak in {language.split(' : ')[0]}!")
                             try:
                                 audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
                                 st.info("Processing speech...")
+                                # Only the speech frames are uploaded to the recognizer
+                                audio = speech.trim_silence(audio)
+                                if audio is None:
+                                    raise sr.UnknownValueError()
                                 speech_text = recognizer.recognize_google(audio, language=speech_lang_code)
                                 
                                 if speech_text:
                                     st.success(f"Recognized text: {speech_text}")
                                     st.session_state.messages.append({"role": "user", "content": speech_text})
                                     
-                                    with st.spinner("Getting response..."):
-                                        # First translate to English for emotion detection
-                                        translated_text = st.session_state.chatbot.translate_to_english(speech_text, selected_lang)
-                                        
-                                        # Detect emotion from translated text
-                                        emotion_data = st.session_state.chatbot.emotion_detector.detect_emotion(translated_text)
-                                        
-                                        # Get response in selected language
-                                        response = st.session_state.chatbot.generate_response(speech_text, selected_lang)
-                                        
-                                        # Store emotion data
-                                        emotion = emotion_data.get("emotion", "neutral")
-                                        intensity = emotion_data.get("intensity", 0.5)
-                                        st.session_state.emotions.append({
-                                            "timestamp": len(st.session_state.emotions),
-                                            "emotion": emotion,
-                                            "intensity": intensity
-                                        })
-                                        
-                                        st.session_state.messages.append({"role": "assistant", "content": response})
+                                    # Translation, emotion detection and generation all happen once
+                                    result = stream_reply(speech_text, selected_lang, st)
+                                    record_turn(result, speak=speak_replies)
                                     st.rerun()
                             except sr.WaitTimeoutError:
                                 st.error("No speech detected within timeout period")
@@ -270,43 +290,37 @@ with col1:
     if "emotions" not in st.session_state:
         st.session_state.emotions = []
 
-    # Display chat history
-    for msg in st.session_state.messages:
-        role = msg["role"]
-        content = msg["content"]
-        class_name = "user-message" if role == "user" else "assistant-message"
-        chat_history.markdown(f'<div class="{class_name}">{content}</div>', unsafe_allow_html=True)
+    # Display chat history: only the latest page, emitted as a single block of cached markup
+    if "history_limit" not in st.session_state:
+        st.session_state.history_limit = HISTORY_PAGE_SIZE
+    hidden = len(st.session_state.messages) - st.session_state.history_limit
+    if hidden > 0 and chat_history.button(f"⬆️ Show earlier messages ({hidden} hidden)"):
+        st.session_state.history_limit += HISTORY_PAGE_SIZE
+        st.rerun()
+    chat_history.markdown(
+        get_dashboard().chat_html(st.session_state.messages, st.session_state.history_limit),
+        unsafe_allow_html=True
+    )
 
     prompt = st.chat_input("🎤 Share your thoughts...", key="chat_input")
 
     if 'chatbot' not in st.session_state:
-        st.session_state.chatbot = EmotionAwareChatbot()
+        # A stable ?user= id lets persistent memory survive reloads and session resets
+        query_params = st.experimental_get_query_params()
+        user_id = query_params.get("user", [uuid.uuid4().hex])[0]
+        st.experimental_set_query_params(user=user_id)
+        # Each session gets its own memory; the models come from the process-wide registry
+        st.session_state.chatbot = EmotionAwareChatbot(user_id=user_id, session_id=uuid.uuid4().hex)
 
     if prompt:
         st.session_state.messages.append({"role": "user", "content": prompt})
 
-        with st.spinner("Analyzing..."):
-            selected_lang = language.split(" : ")[0].lower()
-            
-            # First translate the input to English for emotion detection
-            translated_text = st.session_state.chatbot.translate_to_english(prompt, selected_lang)
-            
-            # Detect emotion from translated text
-            emotion_data = st.session_state.chatbot.emotion_detector.detect_emotion(translated_text)
-            
-            # Get response in selected language
-            response = st.session_state.chatbot.generate_response(prompt, selected_lang)
-            
-            # Store emotion
-            emotion = emotion_data.get("emotion", "neutral")
-            intensity = emotion_data.get("intensity", 0.5)
-            st.session_state.emotions.append({
-                "timestamp": len(st.session_state.emotions),
-                "emotion": emotion,
-                "intensity": intensity
-            })
-            
-            st.session_state.messages.append({"role": "assistant", "content": response})
+        chat_history.markdown(f'<div class="user-message">{prompt}</div>', unsafe_allow_html=True)
+        selected_lang = language.split(" : ")[0].lower()
+        
+        # Translation, emotion detection and generation all happen once; tokens render as they decode
+        result = stream_reply(prompt, selected_lang, chat_history)
+        record_turn(result, speak=speak_replies)
 
         st.rerun()
 
@@ -314,8 +328,7 @@ with col2:
     st.markdown('<div class="emotion-section">', unsafe_allow_html=True)
     st.subheader("🎭 Emotional Summary")
 
-    if st.session_state.emotions:
-        emotion_counts = {}
+    if st.session_state.chatbot.memory.stats.total:
         # Emoji mapping for emotions
         emotion_emojis = {
             'joy': '😊',
@@ -326,15 +339,15 @@ with col2:
             'neutral': '😐'
         }
 
-        for e in st.session_state.emotions:
-            emotion = e['emotion']
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        # Running counts are maintained by the chatbot's memory; nothing is rescanned per rerun
+        stats = st.session_state.chatbot.memory.stats
+        emotion_counts = stats.counts
 
-        fig = create_emotion_donut(emotion_counts)
+        fig = get_dashboard().donut_figure(emotion_counts, stats.total)
         st.plotly_chart(fig, use_container_width=True)
 
-        for emotion, count in emotion_counts.items():
-            percentage = round((count / sum(emotion_counts.values())) * 100)
+        for emotion, share in stats.percentages().items():
+            percentage = round(share)
             emoji = emotion_emojis.get(emotion.lower(), '🤔')
             st.markdown(f"""
                 <div class="emotion-item">
@@ -344,3 +357,6 @@ with col2:
             """, unsafe_allow_html=True)
     else:
         st.write("Start chatting to see your emotional summary! 💭")
+
+    if show_debug:
+        render_debug_panel()
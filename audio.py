@@ -0,0 +1,219 @@
+"""
+In-memory audio capture helpers for SpeechHandler.
+
+Microphone blocks are resampled to the rate the recognizer needs as they arrive
+and written straight into a preallocated int16 ring buffer from the PortAudio
+callback, then handed over as speech_recognition AudioData without touching disk.
+An energy-based voice activity detector trims silence before recognition.
+"""
+import numpy as np
+
+SAMPLE_WIDTH = 2  # bytes per int16 sample
+FIR_TAPS = 31
+
+# Voice activity detection: frames louder than SPEECH_RATIO x the ambient noise RMS
+# (and at least MIN_SPEECH_RMS) are speech
+VAD_FRAME_MS = 30
+SPEECH_RATIO = 2.0
+MIN_SPEECH_RMS = 150.0
+MIN_SPEECH_MS = 90       # shorter bursts (clicks, bumps) are ignored
+HANGOVER_MS = 300        # speech continues this long after the last loud frame
+PADDING_MS = 150         # kept before each utterance so soft onsets are not clipped
+NOISE_ADAPTATION = 0.2   # weight of the latest quiet frames in the cached noise floor
+
+
+class RingBuffer:
+    """
+    Fixed-capacity sample buffer filled in place. Once full, the oldest samples
+    are overwritten, so memory stays bounded however long the recording runs.
+    """
+
+    def __init__(self, capacity, dtype=np.int16):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self.written = 0
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def write(self, samples):
+        """Copy a block of samples in (called from the audio callback thread)"""
+        n = len(samples)
+        if n >= self.capacity:
+            # Only the newest capacity samples survive; lay them out so the oldest sits
+            # where samples() starts reading, (written + n) % capacity
+            tail = samples[-self.capacity:]
+            start = (self.written + n) % self.capacity
+            split = self.capacity - start
+            self._data[start:] = tail[:split]
+            self._data[:start] = tail[split:]
+        else:
+            start = self.written % self.capacity
+            end = start + n
+            if end <= self.capacity:
+                self._data[start:end] = samples
+            else:
+                split = self.capacity - start
+                self._data[start:] = samples[:split]
+                self._data[:n - split] = samples[split:]
+        self.written += n
+
+    def samples(self):
+        """Recorded samples, oldest first: a view into the buffer unless it has wrapped"""
+        if self.written <= self.capacity:
+            return self._data[:self.written]
+        start = self.written % self.capacity
+        return np.concatenate((self._data[start:], self._data[:start]))
+
+    def clear(self):
+        self.written = 0
+
+
+def _lowpass_kernel(cutoff, taps=FIR_TAPS):
+    """Hamming-windowed sinc low-pass filter; cutoff is a fraction of the sample rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return kernel / kernel.sum()
+
+
+class Resampler:
+    """
+    Streaming resampler for int16 mono audio, fed one capture block at a time so the
+    work is spread across the audio callbacks instead of done after recording stops.
+    Downsampling low-pass filters below the new Nyquist frequency first, so speech
+    is not aliased; samples are then linearly interpolated at the new rate.
+    """
+
+    def __init__(self, src_rate, dst_rate, taps=FIR_TAPS):
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+        self.step = src_rate / dst_rate
+        self.kernel = _lowpass_kernel(0.45 * dst_rate / src_rate, taps) if dst_rate < src_rate else None
+        self._history = np.zeros(taps - 1)
+        self._last = 0.0
+        self._consumed = 0
+        self._produced = 0
+
+    def process(self, block):
+        """Returns: the int16 output samples that block completes"""
+        if self.src_rate == self.dst_rate:
+            return block
+        n = len(block)
+        if n == 0:
+            return np.zeros(0, dtype=np.int16)
+        # float64 so the result does not depend on how the audio was split into blocks
+        signal = block.astype(np.float64)
+        if self.kernel is not None:
+            padded = np.concatenate((self._history, signal))
+            signal = np.convolve(padded, self.kernel, mode='valid')
+            self._history = padded[len(padded) - len(self._history):]
+
+        # Interpolate between filtered samples; the previous block's last one bridges the boundary
+        filtered = np.concatenate(((self._last,), signal))
+        base = self._consumed - 1
+        end = self._consumed + n - 1
+        stop = int(np.ceil(end / self.step))
+        positions = np.arange(self._produced, stop) * self.step - base
+        index = np.minimum(positions.astype(np.int64), n - 1)
+        frac = positions - index
+        out = filtered[index] * (1 - frac) + filtered[index + 1] * frac
+
+        self._last = signal[-1]
+        self._consumed += n
+        self._produced = max(stop, self._produced)
+        return np.clip(np.rint(out), -32768, 32767).astype(np.int16)
+
+
+def resample(samples, src_rate, dst_rate):
+    """
+    Resample a whole int16 recording at once
+    Returns: int16 numpy array
+    """
+    return Resampler(src_rate, dst_rate).process(samples)
+
+
+def to_audio_data(samples, sample_rate):
+    """Wrap int16 mono samples as speech_recognition AudioData (no temporary file)"""
+    import speech_recognition as sr
+    return sr.AudioData(samples.tobytes(), sample_rate, SAMPLE_WIDTH)
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based, vectorized voice activity detection for int16 mono audio.
+
+    The ambient noise floor (RMS of non-speech frames) is measured once, by calibrate()
+    or from the quietest frames of the first recording, and then kept up to date from
+    the silence around each utterance, so it is cached for the whole session.
+    """
+
+    def __init__(self, frame_ms=VAD_FRAME_MS, ratio=SPEECH_RATIO, min_rms=MIN_SPEECH_RMS):
+        self.frame_ms = frame_ms
+        self.ratio = ratio
+        self.min_rms = min_rms
+        self.noise_floor = None
+
+    @property
+    def threshold(self):
+        """Frame RMS above which audio counts as speech"""
+        if self.noise_floor is None:
+            return self.min_rms
+        return max(self.min_rms, self.noise_floor * self.ratio)
+
+    def _frames(self, ms):
+        return max(1, int(round(ms / self.frame_ms)))
+
+    def frame_rms(self, samples, sample_rate):
+        """Returns: (RMS of every whole frame, frame length in samples)"""
+        frame = max(1, int(sample_rate * self.frame_ms / 1000))
+        n = len(samples) // frame
+        frames = samples[:n * frame].reshape(n, frame).astype(np.float32)
+        return np.sqrt(np.mean(frames * frames, axis=1)), frame
+
+    def calibrate(self, samples, sample_rate):
+        """Measure the noise floor from audio known to contain no speech"""
+        rms, _ = self.frame_rms(samples, sample_rate)
+        if len(rms):
+            self.noise_floor = float(np.median(rms))
+        return self.noise_floor
+
+    def segments(self, samples, sample_rate):
+        """
+        Utterances in the audio, padded and with short pauses bridged
+        Returns: list of (start, end) sample offsets
+        """
+        rms, frame = self.frame_rms(samples, sample_rate)
+        if not len(rms):
+            return []
+        if self.noise_floor is None:
+            self.noise_floor = float(np.percentile(rms, 10))
+        active = rms > self.threshold
+
+        quiet = rms[~active]
+        if len(quiet):
+            self.noise_floor += NOISE_ADAPTATION * (float(np.median(quiet)) - self.noise_floor)
+
+        # Runs of loud frames: [start, end) frame indices
+        edges = np.diff(np.concatenate(([0], active.view(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        keep = ends - starts >= self._frames(MIN_SPEECH_MS)
+        starts, ends = starts[keep], ends[keep]
+        if not len(starts):
+            return []
+
+        # Pad each run, then merge runs that now touch or overlap
+        starts = np.maximum(starts - self._frames(PADDING_MS), 0)
+        ends = np.minimum(ends + self._frames(HANGOVER_MS), len(rms))
+        gaps = starts[1:] > ends[:-1]
+        starts = starts[np.concatenate(([True], gaps))]
+        ends = ends[np.concatenate((gaps, [True]))]
+        return [(int(start) * frame, min(int(end) * frame, len(samples))) for start, end in zip(starts, ends)]
+
+    def trim(self, samples, sample_rate):
+        """Returns: only the speech in samples (empty if there is none)"""
+        spans = self.segments(samples, sample_rate)
+        if len(spans) == 1:
+            start, end = spans[0]
+            return samples[start:end]
+        return np.concatenate([samples[start:end] for start, end in spans] or [samples[:0]])
@@ -0,0 +1,74 @@
+"""
+Inference backends for the Hugging Face pipelines.
+
+    torch: fp32 eager PyTorch (the default)
+    int8:  PyTorch with dynamic int8 quantization of every nn.Linear
+    onnx:  an exported ONNX Runtime graph (requires `optimum[onnxruntime]`)
+    stub:  deterministic stand-ins that load no model (see stubs.py), for local testing
+
+Every backend returns a regular transformers pipeline, so callers don't change,
+except for token streaming, which goes through the function stream_function() returns.
+"""
+import os
+import config
+
+BACKENDS = ('torch', 'int8', 'onnx', 'stub')
+
+_ORT_MODEL_CLASSES = {
+    'text-classification': 'ORTModelForSequenceClassification',
+    'text2text-generation': 'ORTModelForSeq2SeqLM',
+}
+
+
+def load_pipeline(task, model, backend='torch', **kwargs):
+    """Build a CPU pipeline for task/model on the requested backend"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    if backend == 'onnx':
+        return _load_onnx_pipeline(task, model, **kwargs)
+    if backend == 'stub':
+        from stubs import load_stub_pipeline
+        return load_stub_pipeline(task, model, latency=config.STUB_LATENCY, **kwargs)
+
+    from transformers import pipeline
+    inference_pipeline = pipeline(task, model=model, device=-1, **kwargs)
+    if backend == 'int8':
+        import torch
+        inference_pipeline.model = torch.quantization.quantize_dynamic(
+            inference_pipeline.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return inference_pipeline
+
+
+def stream_function(backend='torch'):
+    """The generation.stream_generate stream function for text2text pipelines on backend"""
+    if backend == 'stub':
+        from stubs import stub_stream
+        return stub_stream
+    from generation import transformers_stream
+    return transformers_stream
+
+
+def _onnx_export_dir(model):
+    return os.path.join(config.ONNX_CACHE_DIR, model.replace('/', '--'))
+
+
+def _load_onnx_pipeline(task, model, **kwargs):
+    try:
+        import optimum.onnxruntime as ort
+    except ImportError:
+        raise ImportError("The onnx backend needs optimum: pip install 'optimum[onnxruntime]'")
+    from transformers import AutoTokenizer, pipeline
+
+    model_class = getattr(ort, _ORT_MODEL_CLASSES[task])
+    export_dir = _onnx_export_dir(model)
+    if os.path.isdir(export_dir):
+        ort_model = model_class.from_pretrained(export_dir)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        # Export once and reuse the graph on later startups
+        ort_model = model_class.from_pretrained(model, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        ort_model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+    return pipeline(task, model=ort_model, tokenizer=tokenizer, device=-1, **kwargs)
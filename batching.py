@@ -0,0 +1,102 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchingEmotionDetector:
+    """
+    Front-end for EmotionDetector that queues requests from many sessions and
+    scores them as one padded batch once the batch fills or max_wait_ms passes.
+    Callers get their result back through a Future.
+    """
+
+    def __init__(self, detector, max_batch_size=16, max_wait_ms=5, max_queue_size=0):
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._closed = False
+        self.batches_run = 0
+        self.items_scored = 0
+        self._worker = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+        self._worker.start()
+
+    @property
+    def queue_depth(self):
+        """Number of requests waiting for the next batch"""
+        return self._queue.qsize()
+
+    @property
+    def mean_batch_size(self):
+        return self.items_scored / self.batches_run if self.batches_run else 0.0
+
+    def submit(self, text):
+        """
+        Queue text for scoring
+        Returns: Future resolving to the score distribution dict
+        """
+        if self._closed:
+            raise RuntimeError("BatchingEmotionDetector is closed")
+        future = Future()
+        # Texts already in the detector's cache don't wait for a batch
+        scores = self.detector.cached_scores(text)
+        if scores is not None:
+            future.set_result(scores)
+            return future
+        # Raises queue.Full when a bounded queue is saturated so callers can shed load
+        self._queue.put_nowait((text, future))
+        return future
+
+    def score_emotions(self, text):
+        return self.submit(text).result()
+
+    def detect_emotion(self, text):
+        return self.detector.emotion_from_scores(self.score_emotions(text))
+
+    def __getattr__(self, name):
+        # Everything else (emotion_from_scores, get_emotion_context, ...) is served directly
+        return getattr(self.detector, name)
+
+    def close(self):
+        """Stop the worker after draining queued requests"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._worker.join()
+
+    def _collect_batch(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Re-queue the shutdown marker so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect_batch(first)
+            texts = [text for text, _ in batch]
+            try:
+                results = self.detector.score_emotions_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches_run += 1
+            self.items_scored += len(batch)
+            for (_, future), scores in zip(batch, results):
+                future.set_result(scores)
@@ -0,0 +1,1296 @@
+"""
+Performance benchmarks for the Emotion Bot.
+
+Usage:
+    python benchmark.py sessions -n 20
+    python benchmark.py batching --clients 16 --requests 50
+    python benchmark.py decode --turns 5
+    python benchmark.py backends --backends torch int8 onnx
+    python benchmark.py translation --requests 200
+    python benchmark.py async --clients 8 --turns 3
+    python benchmark.py importtime --max-ms 300
+    python benchmark.py memory --users 10000
+    python benchmark.py dashboard --turns 10 100 1000
+    python benchmark.py eval --output eval.json --baseline baseline.json
+    python benchmark.py metrics --ops 200000
+    python benchmark.py lexicon --repeat 50
+    python benchmark.py cascade --margins 0.1 0.2 0.3 0.4
+    python benchmark.py emotioncache --clients 8 --requests 100
+    python benchmark.py audio --seconds 10 60 300
+    python benchmark.py vad --snr 30 20 10 --wav recording.wav
+    python benchmark.py tts --sentences 1 3 6
+    python benchmark.py warmup --turns 3
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SAMPLE_TEXTS = [
+    "I'm so happy today!",
+    "ok",
+    "I can't believe they cancelled the trip again, this is so frustrating.",
+    "I've been feeling really down since my grandmother passed away last month.",
+    "What if I fail the exam tomorrow? I keep thinking about it and can't sleep.",
+    "Wow, I did not expect that at all!",
+    "thanks",
+    "Honestly the food at that place was disgusting and the service was worse.",
+    "I'm fine, just a bit tired after a long week at work and a lot of meetings.",
+    "My best friend surprised me with tickets to the concert, I love her so much!",
+]
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return usage / (1024 * 1024)
+    return usage / 1024
+
+
+def _current_rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return _peak_rss_mb()
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "emotion_eval.jsonl")
+
+
+def _load_dataset(path):
+    """Labelled examples from a JSONL/CSV file with text and label fields"""
+    from corpus import iter_records
+    return [(text, record.get("label")) for record, text in iter_records(path)]
+
+
+def _run_self(args):
+    """Run this script in a fresh interpreter and parse its JSON output"""
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__)] + args)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+# -------------------- SESSIONS --------------------
+
+def _sessions_worker(mode, sessions):
+    from chatbot import EmotionAwareChatbot
+    from registry import ModelRegistry
+
+    baseline_rss = _current_rss_mb()
+    create_times = []
+    chatbots = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        registry = ModelRegistry() if mode == "isolated" else None
+        chatbots.append(EmotionAwareChatbot(registry=registry))
+        create_times.append(time.perf_counter() - start)
+
+    return {
+        "mode": mode,
+        "sessions": sessions,
+        "first_session_s": create_times[0],
+        "later_session_mean_s": (
+            sum(create_times[1:]) / (len(create_times) - 1) if len(create_times) > 1 else 0.0
+        ),
+        "total_s": sum(create_times),
+        "rss_growth_mb": _current_rss_mb() - baseline_rss,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def bench_sessions(args):
+    """Compare N sessions that share one registry against N isolated model copies"""
+    if args.worker:
+        print(json.dumps(_sessions_worker(args.worker, args.sessions)))
+        return
+
+    results = [
+        _run_self(["sessions", "--worker", mode, "-n", str(args.sessions)])
+        for mode in ("isolated", "shared")
+    ]
+    print(f"{'mode':<10}{'sessions':>10}{'first (s)':>12}{'later (s)':>12}{'RSS +MB':>12}{'peak MB':>12}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['sessions']:>10}{r['first_session_s']:>12.2f}"
+            f"{r['later_session_mean_s']:>12.3f}{r['rss_growth_mb']:>12.1f}{r['peak_rss_mb']:>12.1f}"
+        )
+
+
+# -------------------- BATCHING --------------------
+
+def _latency_report(name, latencies, wall):
+    return {
+        "path": name,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+def _drive_concurrently(score, clients, requests_per_client):
+    """Call score(text) from many client threads and collect per-call latencies"""
+    def client(offset):
+        latencies = []
+        for i in range(requests_per_client):
+            text = SAMPLE_TEXTS[(offset + i) % len(SAMPLE_TEXTS)]
+            start = time.perf_counter()
+            score(text)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        per_client = list(pool.map(client, range(clients)))
+    wall = time.perf_counter() - start
+    return [latency for latencies in per_client for latency in latencies], wall
+
+
+def bench_batching(args):
+    """Per-call EmotionDetector against the micro-batching front-end under concurrency"""
+    from batching import BatchingEmotionDetector
+    from emotion_detector import EmotionDetector
+
+    # No result cache: the clients cycle through SAMPLE_TEXTS, so every request after the
+    # warm-up would be a hit and neither path would reach the classifier
+    detector = EmotionDetector(cache_size=0)
+    detector.score_emotions(SAMPLE_TEXTS[0])  # warm up
+
+    latencies, wall = _drive_concurrently(detector.score_emotions, args.clients, args.requests)
+    reports = [_latency_report("per-call", latencies, wall)]
+
+    batcher = BatchingEmotionDetector(
+        detector, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms
+    )
+    latencies, wall = _drive_concurrently(batcher.score_emotions, args.clients, args.requests)
+    report = _latency_report("batched", latencies, wall)
+    report["mean_batch_size"] = batcher.mean_batch_size
+    reports.append(report)
+    batcher.close()
+
+    print(f"{'path':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in reports:
+        print(f"{r['path']:<10}{r['requests']:>10}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+    print(f"mean batch size: {reports[1]['mean_batch_size']:.1f}")
+
+
+# -------------------- DECODE --------------------
+
+def bench_decode(args):
+    """Per-turn latency of base response + follow-up generation for each decode mode"""
+    from chatbot import EmotionAwareChatbot
+    from generation import DECODE_MODES
+    from response_bank import ResponseBank
+
+    chatbot = EmotionAwareChatbot()
+    # An empty bank that never fills forces both generations on every turn
+    chatbot.response_bank = ResponseBank(max_variants=0)
+    summary = chatbot.get_emotional_summary()
+
+    print(f"{'mode':<12}{'turns':>7}{'mean s':>10}{'p50 s':>10}{'p95 s':>10}")
+    for mode in args.modes or DECODE_MODES:
+        chatbot.decode_mode = mode
+        latencies = []
+        for i in range(args.turns):
+            text = SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]
+            emotion_data = chatbot.emotion_detector.detect_emotion(text)
+            start = time.perf_counter()
+            chatbot._generate_reply_parts(emotion_data, summary, text)
+            latencies.append(time.perf_counter() - start)
+        print(
+            f"{mode:<12}{len(latencies):>7}{sum(latencies) / len(latencies):>10.2f}"
+            f"{_percentile(latencies, 50):>10.2f}{_percentile(latencies, 95):>10.2f}"
+        )
+
+
+# -------------------- BACKENDS --------------------
+
+def _backends_worker(args):
+    texts = [text for text, _ in _load_dataset(args.dataset)][:args.limit]
+    load_start = time.perf_counter()
+    latencies = []
+    if args.pipeline == "emotion":
+        from emotion_detector import EmotionDetector
+        detector = EmotionDetector(backend=args.worker, cache_size=0)
+        load_s = time.perf_counter() - load_start
+        outputs = []
+        for text in texts:
+            start = time.perf_counter()
+            scores = detector.score_emotions(text)
+            latencies.append(time.perf_counter() - start)
+            outputs.append([scores.get(label, 0.0) for label in detector.labels])
+        labels = detector.labels
+    else:
+        import config
+        from backends import load_pipeline
+        conversation_pipeline = load_pipeline("text2text-generation", config.CONVERSATION_MODEL, backend=args.worker)
+        load_s = time.perf_counter() - load_start
+        outputs = []
+        for text in texts:
+            prompt = f"Based on the message: '{text}', ask an empathetic follow-up question."
+            start = time.perf_counter()
+            outputs.append(conversation_pipeline(prompt, max_length=40, num_beams=1)[0]["generated_text"])
+            latencies.append(time.perf_counter() - start)
+        labels = None
+    return {
+        "backend": args.worker,
+        "labels": labels,
+        "outputs": outputs,
+        "load_s": load_s,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _parity(reference, candidate):
+    """Agreement of a backend's outputs with the reference backend"""
+    if reference["labels"] is None:
+        same = sum(a == b for a, b in zip(reference["outputs"], candidate["outputs"]))
+        return {"agreement": same / max(1, len(reference["outputs"])), "max_score_diff": None}
+    agree = 0
+    max_diff = 0.0
+    for ref_row, row in zip(reference["outputs"], candidate["outputs"]):
+        agree += ref_row.index(max(ref_row)) == row.index(max(row))
+        max_diff = max(max_diff, max(abs(a - b) for a, b in zip(ref_row, row)))
+    return {"agreement": agree / max(1, len(reference["outputs"])), "max_score_diff": max_diff}
+
+
+def bench_backends(args):
+    """Parity, latency and RSS of each inference backend against the first one listed"""
+    if args.worker:
+        print(json.dumps(_backends_worker(args)))
+        return
+
+    results = [
+        _run_self([
+            "backends", "--worker", backend, "--pipeline", args.pipeline,
+            "--dataset", args.dataset, "--limit", str(args.limit)
+        ])
+        for backend in args.backends
+    ]
+    reference = results[0]
+    print(f"{'backend':<10}{'load s':>9}{'p50 ms':>10}{'p95 ms':>10}{'peak MB':>10}{'agree':>8}{'max diff':>10}")
+    failed = False
+    for r in results:
+        parity = _parity(reference, r)
+        failed = failed or parity["agreement"] < args.min_agreement
+        max_diff = "-" if parity["max_score_diff"] is None else f"{parity['max_score_diff']:.4f}"
+        print(
+            f"{r['backend']:<10}{r['load_s']:>9.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+            f"{r['peak_rss_mb']:>10.0f}{parity['agreement']:>8.0%}{max_diff:>10}"
+        )
+    if failed:
+        print(f"Parity check failed: label agreement below {args.min_agreement:.0%}")
+        sys.exit(1)
+
+
+# -------------------- TRANSLATION --------------------
+
+def bench_translation(args):
+    """Per-call, cached and batched translation over a workload with repeated phrases"""
+    from translation import DictionaryBackend, GoogleTransBackend, TranslationService
+
+    def make_backend():
+        if args.backend == "googletrans":
+            return GoogleTransBackend()
+        return DictionaryBackend(latency=args.latency)
+
+    workload = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(args.requests)]
+    print(f"{'path':<12}{'requests':>10}{'total s':>10}{'per req ms':>12}{'backend calls':>15}")
+
+    for name, cache_size in (("per-call", 0), ("cached", 4096)):
+        service = TranslationService(backend=make_backend(), cache_size=cache_size)
+        start = time.perf_counter()
+        for text in workload:
+            service.translate(text, src="en", dest=args.dest)
+        elapsed = time.perf_counter() - start
+        calls = getattr(service.backend, "calls", service.misses)
+        print(f"{name:<12}{len(workload):>10}{elapsed:>10.2f}{elapsed / len(workload) * 1000:>12.2f}{calls:>15}")
+
+    service = TranslationService(backend=make_backend())
+    start = time.perf_counter()
+    for i in range(0, len(workload), args.batch_size):
+        service.translate_batch(workload[i:i + args.batch_size], src="en", dest=args.dest)
+    elapsed = time.perf_counter() - start
+    calls = getattr(service.backend, "calls", -(-len(workload) // args.batch_size))
+    print(f"{'batched':<12}{len(workload):>10}{elapsed:>10.2f}{elapsed / len(workload) * 1000:>12.2f}{calls:>15}")
+
+
+# -------------------- ASYNC --------------------
+
+def bench_async(args):
+    """Concurrent conversations: asyncio pipeline on one loop against one thread per request"""
+    import asyncio
+    from chatbot import EmotionAwareChatbot
+    from registry import get_registry
+    from translation import DictionaryBackend
+
+    registry = get_registry()
+    if args.translation_latency >= 0:
+        # Offline stand-in for the network translator with a realistic round trip
+        registry.get_translation_service()._backend = DictionaryBackend(latency=args.translation_latency)
+        registry.get_translation_service().cache_size = 0
+
+    def conversation_texts(client):
+        return [SAMPLE_TEXTS[(client + i) % len(SAMPLE_TEXTS)] for i in range(args.turns)]
+
+    chatbots = [EmotionAwareChatbot(registry=registry) for _ in range(args.clients)]
+    chatbots[0].process_turn(SAMPLE_TEXTS[0], args.language)  # warm up
+
+    def threaded_client(client):
+        latencies = []
+        for text in conversation_texts(client):
+            start = time.perf_counter()
+            chatbots[client].process_turn(text, args.language)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        threaded = [latency for latencies in pool.map(threaded_client, range(args.clients)) for latency in latencies]
+    reports = [_latency_report("threads", threaded, time.perf_counter() - start)]
+
+    async def async_client(client):
+        latencies = []
+        for text in conversation_texts(client):
+            start = time.perf_counter()
+            await chatbots[client].aprocess_turn(text, args.language)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    async def run_all():
+        return await asyncio.gather(*(async_client(client) for client in range(args.clients)))
+
+    start = time.perf_counter()
+    asynchronous = [latency for latencies in asyncio.run(run_all()) for latency in latencies]
+    reports.append(_latency_report("asyncio", asynchronous, time.perf_counter() - start))
+
+    print(f"{'path':<10}{'turns':>8}{'turns/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for r in reports:
+        print(f"{r['path']:<10}{r['requests']:>8}{r['throughput_rps']:>10.2f}{r['p50_ms']:>10.0f}{r['p99_ms']:>10.0f}")
+
+
+# -------------------- IMPORT TIME --------------------
+
+# Stacks a text-only chat must not pay for at import time
+HEAVY_MODULES = ["streamlit", "sounddevice", "soundfile", "pyttsx3", "speech_recognition", "torch", "transformers"]
+
+
+def _parse_importtime(stderr):
+    """Cumulative microseconds per top-level import from -X importtime output"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented beneath their parent; only top-level entries count
+        name = name[1:].rstrip()
+        if not name.startswith(" "):
+            totals[name] = int(cumulative)
+    return totals
+
+
+def bench_importtime(args):
+    """Import cost of the CLI entry points and a guard against eager heavy imports"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    failed = False
+    print(f"{'module':<18}{'import ms':>11}  heavy modules loaded")
+    for module in args.modules:
+        code = f"import json, sys; import {module}; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=root, capture_output=True, text=True
+        )
+        if process.returncode != 0:
+            print(f"{module:<18}{'failed':>11}  {process.stderr.strip().splitlines()[-1]}")
+            failed = True
+            continue
+        total_ms = sum(_parse_importtime(process.stderr).values()) / 1000
+        heavy = json.loads(process.stdout.strip().splitlines()[-1])
+        print(f"{module:<18}{total_ms:>11.1f}  {', '.join(heavy) or '-'}")
+        if heavy or (args.max_ms and total_ms > args.max_ms):
+            failed = True
+
+    # Wall-clock startup of the CLI up to argument parsing, interpreter start-up included
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "main.py", "--help"], cwd=root, capture_output=True)
+    print(f"{'main.py --help':<18}{(time.perf_counter() - start) * 1000:>11.1f}  (process wall time)")
+    if failed:
+        print("Import-time regression detected")
+        sys.exit(1)
+
+
+# -------------------- MEMORY --------------------
+
+def bench_memory(args):
+    """Per-turn overhead of SQLite-backed memory and session hydration across many users"""
+    import random
+    import tempfile
+    from memory import EmotionalMemory
+    from memory_store import PersistentEmotionalMemory, SQLiteMemoryStore
+
+    emotions = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+    turns = args.users * args.turns
+    emotion_data = [{"emotion": e, "intensity": "medium", "confidence": 0.6} for e in emotions]
+    # A full score distribution per turn, as the emotion detector returns it
+    scores = [{label: 0.6 if label == e else 0.4 / (len(emotions) - 1) for label in emotions} for e in emotions]
+
+    in_memory = EmotionalMemory()
+    start = time.perf_counter()
+    for i in range(turns):
+        k = i % len(emotions)
+        in_memory.add_interaction(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], emotion_data[k], "reply", scores[k])
+    in_memory_us = (time.perf_counter() - start) / turns * 1e6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory.db")
+        store = SQLiteMemoryStore(path, batch_size=args.batch_size)
+        # The path every turn takes: statistics update, score serialisation and the buffered
+        # write. One memory is re-pointed at each user, since hydrating one per turn would
+        # dominate the timing (hydration is measured on its own below)
+        memory = PersistentEmotionalMemory(store, "user-0", "session-0")
+        start = time.perf_counter()
+        for i in range(turns):
+            k = i % len(emotions)
+            memory.user_id = f"user-{i % args.users}"
+            memory.add_interaction(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)], emotion_data[k], "reply", scores[k])
+        store.flush()
+        persistent_us = (time.perf_counter() - start) / turns * 1e6
+
+        hydrate = []
+        for user in random.sample(range(args.users), min(args.samples, args.users)):
+            start = time.perf_counter()
+            PersistentEmotionalMemory(store, f"user-{user}", "session-1")
+            hydrate.append(time.perf_counter() - start)
+        store.close()
+        size_mb = sum(
+            os.path.getsize(os.path.join(tmp, name)) for name in os.listdir(tmp)
+        ) / (1024 * 1024)
+
+    print(f"users: {args.users}  turns: {turns}  write batch: {args.batch_size}")
+    print(f"in-memory turn:        {in_memory_us:8.1f} us")
+    print(f"persistent turn:       {persistent_us:8.1f} us  (+{persistent_us - in_memory_us:.1f} us)")
+    print(f"session hydrate p50:   {_percentile(hydrate, 50) * 1000:8.2f} ms")
+    print(f"session hydrate p99:   {_percentile(hydrate, 99) * 1000:8.2f} ms")
+    print(f"database size:         {size_mb:8.1f} MB")
+
+
+# -------------------- DASHBOARD --------------------
+
+def _full_rerender(emotions, messages):
+    """What every Streamlit rerun used to do: rebuild all data and figures from scratch"""
+    import pandas as pd
+    import plotly.express as px
+    from dashboard import create_emotion_donut, message_html
+
+    px.line(pd.DataFrame(emotions), x="timestamp", y="emotion", title="Emotion History")
+    counts = {}
+    for e in emotions:
+        counts[e["emotion"]] = counts.get(e["emotion"], 0) + 1
+    create_emotion_donut(counts)
+    for message in messages:
+        message_html(message)
+
+
+def _incremental_rerender(cache, emotions, messages, counts):
+    cache.history_figure(emotions)
+    cache.donut_figure(counts, len(emotions))
+    cache.chat_html(messages)
+
+
+def _dashboard_conversation(turns):
+    """Emotion history, chat messages and emotion counts of a conversation with turns turns"""
+    labels = ["joy", "sadness", "anger", "fear", "surprise", "neutral"]
+    emotions = [{"timestamp": i, "emotion": labels[i % len(labels)], "intensity": "medium"} for i in range(turns)]
+    messages = []
+    for i in range(turns):
+        messages.append({"role": "user", "content": SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)]})
+        messages.append({"role": "assistant", "content": "reply " * 40})
+    counts = {}
+    for e in emotions:
+        counts[e["emotion"]] = counts.get(e["emotion"], 0) + 1
+    return emotions, messages, counts
+
+
+def bench_dashboard(args):
+    """Dashboard rerun latency for growing conversations, full rebuild against the cache"""
+    from dashboard import DashboardCache
+
+    # Render once first so the pandas/plotly imports and first-figure setup are not
+    # charged to whichever size is timed first
+    emotions, messages, counts = _dashboard_conversation(2)
+    _full_rerender(emotions, messages)
+    _incremental_rerender(DashboardCache(), emotions, messages, counts)
+
+    print(f"{'turns':>7}{'full ms':>10}{'cached ms':>11}{'new turn ms':>13}")
+    for turns in args.turns:
+        emotions, messages, counts = _dashboard_conversation(turns)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            _full_rerender(emotions, messages)
+        full_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+        cache = DashboardCache()
+        _incremental_rerender(cache, emotions[:-1], messages[:-2], counts)
+        # A rerun that brings one new turn
+        start = time.perf_counter()
+        _incremental_rerender(cache, emotions, messages, counts)
+        new_turn_ms = (time.perf_counter() - start) * 1000
+        # Reruns with nothing new (widget interaction, sidebar change)
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            _incremental_rerender(cache, emotions, messages, counts)
+        cached_ms = (time.perf_counter() - start) / args.repeat * 1000
+        print(f"{turns:>7}{full_ms:>10.2f}{cached_ms:>11.3f}{new_turn_ms:>13.2f}")
+
+
+# -------------------- EVALUATION --------------------
+
+def classification_metrics(gold, predicted):
+    """
+    Accuracy, per-class precision/recall/F1/support, macro F1 and the confusion matrix
+    (rows are gold labels, columns predicted labels, both in the order of "labels")
+    """
+    labels = sorted(set(gold) | set(predicted))
+    index = {label: i for i, label in enumerate(labels)}
+    confusion = [[0] * len(labels) for _ in labels]
+    for g, p in zip(gold, predicted):
+        confusion[index[g]][index[p]] += 1
+
+    per_class = {}
+    for label, i in index.items():
+        tp = confusion[i][i]
+        predicted_count = sum(row[i] for row in confusion)
+        support = sum(confusion[i])
+        precision = tp / predicted_count if predicted_count else 0.0
+        recall = tp / support if support else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        per_class[label] = {"precision": precision, "recall": recall, "f1": f1, "support": support}
+
+    # Macro F1 over the classes that actually occur in the gold labels
+    gold_classes = [per_class[label]["f1"] for label in labels if per_class[label]["support"]]
+    return {
+        "accuracy": sum(g == p for g, p in zip(gold, predicted)) / max(1, len(gold)),
+        "macro_f1": sum(gold_classes) / max(1, len(gold_classes)),
+        "per_class": per_class,
+        "labels": labels,
+        "confusion": confusion,
+    }
+
+
+def _eval_worker(args):
+    from emotion_detector import EmotionDetector
+
+    examples = [(text, label) for text, label in _load_dataset(args.dataset) if label]
+    texts = [text for text, _ in examples]
+    load_start = time.perf_counter()
+    # No result cache, so the warm-up text and the repeated throughput texts are scored for real
+    detector = EmotionDetector(backend=args.backend, load_model=args.worker == "model", cache_size=0)
+    load_s = time.perf_counter() - load_start
+    detector.score_emotions(texts[0])  # warm up
+
+    latencies = []
+    predicted = []
+    for text in texts:
+        start = time.perf_counter()
+        scores = detector.score_emotions(text)
+        latencies.append(time.perf_counter() - start)
+        predicted.append(max(scores.items(), key=lambda item: item[1])[0])
+
+    # Batched throughput over the dataset repeated up to throughput_items texts,
+    # rerun until at least a second has passed so fast detectors aren't timing noise
+    batch_texts = (texts * (args.throughput_items // len(texts) + 1))[:args.throughput_items]
+    scored = 0
+    start = time.perf_counter()
+    while scored == 0 or time.perf_counter() - start < 1.0:
+        detector.detect_emotions(batch_texts, batch_size=args.batch_size)
+        scored += len(batch_texts)
+    batch_wall = time.perf_counter() - start
+
+    result = classification_metrics([label for _, label in examples], predicted)
+    result.update({
+        "detector": args.worker,
+        "backend": detector.backend,
+        "classifier_loaded": detector.emotion_classifier is not None,
+        "examples": len(examples),
+        "load_s": load_s,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1000,
+            "p50": _percentile(latencies, 50) * 1000,
+            "p95": _percentile(latencies, 95) * 1000,
+            "p99": _percentile(latencies, 99) * 1000,
+        },
+        "batch_size": args.batch_size,
+        "throughput_items_per_s": scored / batch_wall if batch_wall else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+    })
+    return result
+
+
+# Regression checks: (metric name, getter, direction, threshold argument, noise floor)
+#   "drop" thresholds are absolute for quality metrics, "rise"/"fall" are relative;
+#   absolute changes below the noise floor are never reported
+EVAL_CHECKS = [
+    ("accuracy", lambda r: r["accuracy"], "drop", "max_quality_drop", 0.0),
+    ("macro_f1", lambda r: r["macro_f1"], "drop", "max_quality_drop", 0.0),
+    ("p95_ms", lambda r: r["latency_ms"]["p95"], "rise", "max_latency_increase", 0.5),
+    ("throughput", lambda r: r["throughput_items_per_s"], "fall", "max_throughput_drop", 0.0),
+    ("peak_rss_mb", lambda r: r["peak_rss_mb"], "rise", "max_rss_increase", 5.0),
+]
+
+
+def compare_eval(baseline, current, thresholds):
+    """List the regressions of current against baseline results (both keyed by detector)"""
+    regressions = []
+    for detector, result in current.items():
+        reference = baseline.get(detector)
+        if reference is None:
+            continue
+        for name, get, direction, threshold_name, noise_floor in EVAL_CHECKS:
+            before, after = get(reference), get(result)
+            limit = thresholds[threshold_name]
+            if abs(after - before) <= noise_floor:
+                continue
+            if direction == "drop":
+                regressed = before - after > limit
+            elif direction == "rise":
+                regressed = before > 0 and (after - before) / before > limit
+            else:
+                regressed = before > 0 and (before - after) / before > limit
+            if regressed:
+                regressions.append({"detector": detector, "metric": name, "baseline": before, "current": after})
+    return regressions
+
+
+def _print_eval(result):
+    print(f"\n== {result['detector']} ({result['backend']}, classifier loaded: {result['classifier_loaded']}) ==")
+    print(f"accuracy {result['accuracy']:.3f}  macro F1 {result['macro_f1']:.3f}  examples {result['examples']}")
+    print(f"{'label':<12}{'precision':>10}{'recall':>10}{'f1':>10}{'support':>9}")
+    for label, m in result["per_class"].items():
+        print(f"{label:<12}{m['precision']:>10.3f}{m['recall']:>10.3f}{m['f1']:>10.3f}{m['support']:>9}")
+    labels = result["labels"]
+    print("confusion (rows gold, columns predicted):")
+    print(" " * 12 + "".join(f"{label[:8]:>9}" for label in labels))
+    for label, row in zip(labels, result["confusion"]):
+        print(f"{label:<12}" + "".join(f"{count:>9}" for count in row))
+    latency = result["latency_ms"]
+    print(
+        f"latency ms p50 {latency['p50']:.2f}  p95 {latency['p95']:.2f}  p99 {latency['p99']:.2f}  "
+        f"batched {result['throughput_items_per_s']:.1f} items/s  peak RSS {result['peak_rss_mb']:.0f} MB"
+    )
+
+
+def bench_eval(args):
+    """Quality (per-class P/R/F1, confusion) and speed of the model and fallback detectors"""
+    if args.worker:
+        print(json.dumps(_eval_worker(args)))
+        return
+
+    results = {}
+    for detector in args.detectors:
+        # A fresh interpreter per detector keeps peak RSS attributable
+        worker_args = [
+            "eval", "--worker", detector, "--dataset", args.dataset,
+            "--batch-size", str(args.batch_size), "--throughput-items", str(args.throughput_items)
+        ]
+        if args.backend:
+            worker_args += ["--backend", args.backend]
+        results[detector] = _run_self(worker_args)
+        _print_eval(results[detector])
+
+    report = {
+        "dataset": os.path.abspath(args.dataset),
+        "created": time.time(),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_eval(baseline, results, vars(args))
+        if regressions:
+            print("\nRegressions against", args.baseline)
+            for r in regressions:
+                print(f"  {r['detector']}: {r['metric']} {r['baseline']:.4g} -> {r['current']:.4g}")
+            sys.exit(1)
+        print(f"\nNo regressions against {args.baseline}")
+
+
+# -------------------- LEXICON --------------------
+
+def bench_lexicon(args):
+    """Keyword engine against the model on the evaluation set: quality, agreement and speed"""
+    from emotion_detector import EmotionDetector
+
+    examples = [(text, label) for text, label in _load_dataset(args.dataset) if label]
+    texts = [text for text, _ in examples]
+    gold = [label for _, label in examples]
+    detectors = [
+        ("model", EmotionDetector(backend=args.backend, cache_size=0)),
+        ("lexicon", EmotionDetector(backend="lexicon", cache_size=0)),
+    ]
+    predictions = {}
+    print(f"{'detector':<10}{'accuracy':>10}{'macro F1':>10}{'p50 us':>10}{'items/s':>12}")
+    for name, detector in detectors:
+        if name == "model" and detector.emotion_classifier is None:
+            print(f"{name:<10}  (model unavailable, skipped)")
+            continue
+        latencies = []
+        predicted = []
+        for text in texts:
+            start = time.perf_counter()
+            scores = detector.score_emotions(text)
+            latencies.append(time.perf_counter() - start)
+            predicted.append(max(scores.items(), key=lambda item: item[1])[0])
+        predictions[name] = predicted
+        batch_texts = texts * args.repeat
+        start = time.perf_counter()
+        detector.detect_emotions(batch_texts, batch_size=args.batch_size)
+        throughput = len(batch_texts) / (time.perf_counter() - start)
+        metrics = classification_metrics(gold, predicted)
+        print(
+            f"{name:<10}{metrics['accuracy']:>10.3f}{metrics['macro_f1']:>10.3f}"
+            f"{_percentile(latencies, 50) * 1e6:>10.1f}{throughput:>12.0f}"
+        )
+    if len(predictions) == 2:
+        agree = sum(a == b for a, b in zip(predictions["model"], predictions["lexicon"]))
+        print(f"lexicon agrees with the model on {agree / len(texts):.0%} of examples")
+
+
+# -------------------- CASCADE --------------------
+
+def bench_cascade(args):
+    """Throughput gained and accuracy lost by the confidence-gated cascade, per margin"""
+    import numpy as np
+    from emotion_detector import EmotionDetector
+
+    examples = [(text, label) for text, label in _load_dataset(args.dataset) if label]
+    texts = [text for text, _ in examples] * args.repeat
+    gold = [label for _, label in examples] * args.repeat
+    detector = EmotionDetector(backend=args.backend, audit_rate=0.0, cache_size=0)
+    if detector.emotion_classifier is None:
+        raise SystemExit("The cascade needs the emotion model; it failed to load")
+    labels = np.array(detector.labels)
+
+    def run(margin):
+        detector.cascade_margin = margin
+        detector.cascade_counts = dict.fromkeys(detector.cascade_counts, 0)
+        start = time.perf_counter()
+        matrix, _ = detector.detect_emotions(texts, batch_size=args.batch_size)
+        wall = time.perf_counter() - start
+        return labels[matrix.argmax(axis=1)], len(texts) / wall
+
+    full, full_throughput = run(None)
+    full_accuracy = np.mean(full == np.array(gold))
+    print(f"{'margin':<8}{'escalated':>10}{'agree':>8}{'accuracy':>10}{'items/s':>10}{'speedup':>9}")
+    print(f"{'model':<8}{1:>10.0%}{1:>8.0%}{full_accuracy:>10.3f}{full_throughput:>10.0f}{1:>8.1f}x")
+    for margin in args.margins:
+        predicted, throughput = run(margin)
+        report = detector.cascade_report()
+        print(
+            f"{margin:<8}{report['escalation_rate']:>10.0%}{np.mean(predicted == full):>8.0%}"
+            f"{np.mean(predicted == np.array(gold)):>10.3f}{throughput:>10.0f}{throughput / full_throughput:>8.1f}x"
+        )
+
+
+# -------------------- EMOTION CACHE --------------------
+
+# Short messages many users send over and over
+COMMON_MESSAGES = ["ok", "OK", "thanks", "Thanks!", "I'm fine", "yes", "no", "lol", "hmm", "ok "]
+
+
+def bench_emotioncache(args):
+    """Classifier calls and throughput with and without the emotion result cache"""
+    from emotion_detector import EmotionDetector
+    from metrics import get_metrics
+
+    def message(client, i):
+        # Every other message is a common short reply, the rest are longer texts
+        if i % 2 == 0:
+            return COMMON_MESSAGES[(client + i) % len(COMMON_MESSAGES)]
+        return SAMPLE_TEXTS[(client + i) % len(SAMPLE_TEXTS)]
+
+    print(f"{'cache':<8}{'requests':>10}{'model calls':>13}{'hit rate':>10}{'req/s':>10}{'p50 ms':>9}")
+    for cache_size in (0, args.cache_size):
+        detector = EmotionDetector(backend=args.backend, cache_size=cache_size)
+        metrics = get_metrics()
+        before = metrics.snapshot()["stages"].get("classify", {}).get("count", 0)
+        counter = iter(range(args.clients * args.requests))
+
+        def score(_text):
+            n = next(counter)
+            detector.score_emotions(message(n % args.clients, n // args.clients))
+
+        latencies, wall = _drive_concurrently(score, args.clients, args.requests)
+        calls = metrics.snapshot()["stages"].get("classify", {}).get("count", 0) - before
+        hit_rate = detector.cache.stats()["hit_rate"] if detector.cache else 0.0
+        print(
+            f"{cache_size or 'off':<8}{len(latencies):>10}{calls:>13}{hit_rate:>10.0%}"
+            f"{len(latencies) / wall:>10.0f}{_percentile(latencies, 50) * 1000:>9.2f}"
+        )
+
+
+# -------------------- AUDIO --------------------
+
+AUDIO_BLOCK_FRAMES = 1024
+
+
+def _synthetic_speech(rate, seconds=1.0):
+    """Amplitude-modulated harmonics plus noise, roughly speech-shaped, as float32 in [-1, 1]"""
+    import numpy as np
+
+    t = np.arange(int(rate * seconds)) / rate
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((180, 360, 720, 1400, 2800), 1))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    noise = np.random.default_rng(0).normal(0, 0.05, len(t))
+    signal = 0.3 * envelope * voice / 2.3 + noise
+    return np.clip(signal, -1, 1).astype(np.float32)
+
+
+def _capture_list_wav(blocks, n_blocks, rate):
+    """The previous path: copied float blocks, concatenate, int16 copy, temp WAV written and read back"""
+    import tempfile
+    import wave
+    import numpy as np
+
+    chunks = []
+    for i in range(n_blocks):
+        chunks.append(blocks[i % len(blocks)].copy())
+    start = time.perf_counter()
+    recording = np.concatenate(chunks, axis=0)
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        path = f.name
+    try:
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(rate)
+            wf.writeframes((recording * 32767).astype(np.int16).tobytes())
+        with wave.open(path, "rb") as wf:
+            data = wf.readframes(wf.getnframes())
+    finally:
+        os.remove(path)
+    return data, time.perf_counter() - start
+
+
+def _capture_ring_buffer(blocks, n_blocks, rate, target_rate, max_seconds):
+    """The streaming path: int16 blocks resampled in the callback into a preallocated buffer"""
+    from audio import RingBuffer, Resampler
+
+    buffer = RingBuffer(int(max_seconds * target_rate))
+    resampler = Resampler(rate, target_rate)
+    for i in range(n_blocks):
+        buffer.write(resampler.process(blocks[i % len(blocks)]))
+    start = time.perf_counter()
+    data = buffer.samples().tobytes()
+    return data, time.perf_counter() - start
+
+
+def bench_audio(args):
+    """Peak memory and stop-to-AudioData latency of microphone capture, on synthetic audio"""
+    import tracemalloc
+    import numpy as np
+
+    source = _synthetic_speech(args.rate)
+    usable = len(source) // AUDIO_BLOCK_FRAMES * AUDIO_BLOCK_FRAMES
+    float_blocks = list(source[:usable].reshape(-1, AUDIO_BLOCK_FRAMES, 1))
+    int_blocks = [(block[:, 0] * 32767).astype(np.int16) for block in float_blocks]
+
+    print(f"{'seconds':>8}  {'path':<16}{'peak MB':>9}{'per block us':>14}{'finalize ms':>13}{'output KB':>11}")
+    for seconds in args.seconds:
+        n_blocks = int(seconds * args.rate / AUDIO_BLOCK_FRAMES)
+        max_seconds = max(seconds, args.max_seconds)
+        paths = [
+            ("list + wav", lambda: _capture_list_wav(float_blocks, n_blocks, args.rate)),
+            (f"ring -> {args.target_rate // 1000}k",
+             lambda: _capture_ring_buffer(int_blocks, n_blocks, args.rate, args.target_rate, max_seconds)),
+        ]
+        for name, run in paths:
+            # Timed and memory-traced separately: tracemalloc slows every allocation down
+            start = time.perf_counter()
+            data, latency = run()
+            per_block = (time.perf_counter() - start - latency) / n_blocks
+            size = len(data)
+            del data
+            tracemalloc.start()
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                f"{seconds:>8g}  {name:<16}{peak / 1e6:>9.1f}{per_block * 1e6:>14.1f}"
+                f"{latency * 1000:>13.1f}{size / 1024:>11.0f}"
+            )
+
+
+# -------------------- VAD --------------------
+
+# (seconds, is speech) of the synthetic utterance: silence, two phrases, trailing silence
+VAD_FIXTURE = ((1.0, False), (1.5, True), (0.6, False), (1.0, True), (1.5, False))
+
+
+def _vad_fixture(rate, snr_db):
+    """Synthetic recording at a given speech-to-noise ratio, with a per-sample speech mask"""
+    import numpy as np
+
+    mask = np.concatenate([np.full(int(seconds * rate), is_speech) for seconds, is_speech in VAD_FIXTURE])
+    speech = _synthetic_speech(rate, len(mask) / rate + 1)[:len(mask)] * mask
+    speech_rms = np.sqrt(np.mean(speech[mask] ** 2))
+    noise = np.random.default_rng(1).normal(0, speech_rms / 10 ** (snr_db / 20), len(mask))
+    samples = np.clip((speech + noise) * 32767, -32768, 32767).astype(np.int16)
+    return samples, mask
+
+
+def _read_wav(path):
+    """Mono int16 samples and sample rate of a 16-bit WAV file"""
+    import wave
+    import numpy as np
+
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit WAV files are supported")
+        samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        channels, rate = wf.getnchannels(), wf.getframerate()
+    return samples.reshape(-1, channels).mean(axis=1).astype(np.int16), rate
+
+
+def bench_vad(args):
+    """Silence trimming on synthetic recordings (and optional WAV files): speech kept, audio cut, cost"""
+    from audio import VoiceActivityDetector
+
+    def trim(samples, rate, calibrate=True):
+        vad = VoiceActivityDetector()
+        if calibrate:
+            # As in the app: a short ambient sample before the user speaks
+            vad.calibrate(samples[:int(0.3 * rate)], rate)
+        floor = vad.noise_floor
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            # Each pass starts from the same noise profile (segments() adapts it)
+            vad.noise_floor = floor
+            spans = vad.segments(samples, rate)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        return spans, elapsed
+
+    print(f"{'input':<16}{'segments':>9}{'kept':>8}{'speech kept':>13}{'noise kept':>12}{'ms':>8}")
+    for snr in args.snr:
+        samples, mask = _vad_fixture(args.rate, snr)
+        for calibrate in (True, False):
+            spans, elapsed = trim(samples, args.rate, calibrate)
+            kept = mask.copy()
+            kept[:] = False
+            for start, end in spans:
+                kept[start:end] = True
+            name = f"{snr:g} dB" + ("" if calibrate else " uncal")
+            print(
+                f"{name:<16}{len(spans):>9}{kept.mean():>8.0%}{(kept & mask).sum() / mask.sum():>13.1%}"
+                f"{(kept & ~mask).sum() / (~mask).sum():>12.1%}{elapsed * 1000:>8.2f}"
+            )
+    for path in args.wav:
+        samples, rate = _read_wav(path)
+        spans, elapsed = trim(samples, rate, calibrate=False)
+        kept = sum(end - start for start, end in spans) / max(len(samples), 1)
+        print(f"{os.path.basename(path)[:15]:<16}{len(spans):>9}{kept:>8.0%}{'-':>13}{'-':>12}{elapsed * 1000:>8.2f}")
+
+
+# -------------------- TTS --------------------
+
+TTS_SENTENCE = "I hear you, and it makes sense that you feel this way right now."
+
+
+def bench_tts(args):
+    """Caller blocking, time to first audio and cancellation of spoken replies (stub engine)"""
+    from stubs import StubSpeechEngine
+    from tts import TTSWorker
+
+    word_latency = args.word_ms / 1000
+
+    def translate(text):
+        # Translation cost grows with the number of sentences sent at once
+        time.sleep(args.translate_ms / 1000 * max(1, text.count(".")))
+        return text
+
+    print(f"{'sentences':>9}  {'path':<10}{'blocked ms':>12}{'first audio ms':>16}{'total ms':>10}")
+    for n in args.sentences:
+        reply = " ".join([TTS_SENTENCE] * n)
+
+        # Previous path: translate the whole reply, then speak it, all on the caller's thread
+        engine = StubSpeechEngine(latency=word_latency)
+        start = time.perf_counter()
+        text = translate(reply)
+        first_audio = time.perf_counter() - start
+        engine.say(text)
+        engine.runAndWait()
+        blocked = total = time.perf_counter() - start
+        print(f"{n:>9}  {'blocking':<10}{blocked * 1000:>12.1f}{first_audio * 1000:>16.1f}{total * 1000:>10.1f}")
+
+        engine = StubSpeechEngine(latency=word_latency)
+        worker = TTSWorker(engine_factory=lambda: engine)
+        started = []
+        say = engine.say
+        engine.say = lambda text: (started.append(time.perf_counter()), say(text))
+        start = time.perf_counter()
+        job = worker.speak(reply, translate=translate)
+        blocked = time.perf_counter() - start
+        job.wait()
+        total = time.perf_counter() - start
+        worker.close()
+        print(
+            f"{n:>9}  {'worker':<10}{blocked * 1000:>12.1f}{(started[0] - start) * 1000:>16.1f}"
+            f"{total * 1000:>10.1f}"
+        )
+
+    # A new message cancels the reply being spoken: how long until playback stops
+    engine = StubSpeechEngine(latency=word_latency)
+    worker = TTSWorker(engine_factory=lambda: engine)
+    job = worker.speak(" ".join([TTS_SENTENCE] * max(args.sentences)), translate=translate)
+    time.sleep(args.translate_ms / 1000 + word_latency)
+    start = time.perf_counter()
+    job.cancel()
+    job.wait()
+    print(
+        f"cancel: stopped {(time.perf_counter() - start) * 1000:.1f} ms after cancel(), "
+        f"{job.spoken} of {len(job.sentences)} sentences spoken"
+    )
+    worker.close()
+
+
+# -------------------- WARM-UP --------------------
+
+def _warmup_worker(mode, turns, think_time):
+    from chatbot import EmotionAwareChatbot
+    from registry import ModelRegistry
+
+    registry = ModelRegistry()
+    start = time.perf_counter()
+    ready_s = None
+    if mode == "warm":
+        warmup = registry.warm_up()
+        # The user is typing their first message meanwhile
+        time.sleep(think_time)
+        warmup.wait()
+        ready_s = time.perf_counter() - start
+    else:
+        time.sleep(think_time)
+    chatbot = EmotionAwareChatbot(registry=registry)
+    latencies = []
+    for i in range(turns):
+        turn_start = time.perf_counter()
+        chatbot.process_turn(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)])
+        latencies.append(time.perf_counter() - turn_start)
+    return {
+        "mode": mode,
+        "ready_s": ready_s,
+        # From the first message being sent to the first reply, after think_time of typing
+        "first_reply_s": latencies[0] + (time.perf_counter() - start - think_time - sum(latencies)),
+        "later_turn_mean_s": sum(latencies[1:]) / max(1, len(latencies) - 1),
+    }
+
+
+def bench_warmup(args):
+    """First-reply latency of a fresh process with lazy loading against background warm-up"""
+    if args.worker:
+        print(json.dumps(_warmup_worker(args.worker, args.turns, args.think_time)))
+        return
+
+    results = [
+        _run_self(["warmup", "--worker", mode, "--turns", str(args.turns), "--think-time", str(args.think_time)])
+        for mode in ("cold", "warm")
+    ]
+    print(f"{'mode':<8}{'ready (s)':>11}{'first reply (s)':>17}{'later turns (s)':>17}")
+    for r in results:
+        ready = f"{r['ready_s']:.2f}" if r["ready_s"] is not None else "-"
+        print(f"{r['mode']:<8}{ready:>11}{r['first_reply_s']:>17.2f}{r['later_turn_mean_s']:>17.3f}")
+
+
+# -------------------- METRICS --------------------
+
+def bench_metrics(args):
+    """Cost of a stage timer and a counter increment, with metrics enabled and disabled"""
+    from metrics import Metrics
+
+    print(f"{'metrics':<10}{'timer ns':>10}{'inc ns':>10}")
+    for enabled in (True, False):
+        metrics = Metrics(enabled=enabled)
+        start = time.perf_counter()
+        for _ in range(args.ops):
+            with metrics.timer("stage"):
+                pass
+        timer_ns = (time.perf_counter() - start) / args.ops * 1e9
+        start = time.perf_counter()
+        for _ in range(args.ops):
+            metrics.inc("errors", component="bench")
+        inc_ns = (time.perf_counter() - start) / args.ops * 1e9
+        print(f"{'enabled' if enabled else 'disabled':<10}{timer_ns:>10.0f}{inc_ns:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion Bot performance benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sessions = subparsers.add_parser("sessions", help="memory and latency of N chat sessions")
+    sessions.add_argument("-n", "--sessions", type=int, default=5)
+    sessions.add_argument("--worker", choices=["isolated", "shared"], help=argparse.SUPPRESS)
+    sessions.set_defaults(func=bench_sessions)
+
+    batching = subparsers.add_parser("batching", help="throughput of micro-batched emotion detection")
+    batching.add_argument("--clients", type=int, default=16)
+    batching.add_argument("--requests", type=int, default=20, help="requests per client")
+    batching.add_argument("--max-batch-size", type=int, default=16)
+    batching.add_argument("--max-wait-ms", type=float, default=5)
+    batching.set_defaults(func=bench_batching)
+
+    decode = subparsers.add_parser("decode", help="latency of joint base + follow-up decoding")
+    decode.add_argument("--turns", type=int, default=5)
+    decode.add_argument("--modes", nargs="+", choices=["sequential", "concurrent", "batched"])
+    decode.set_defaults(func=bench_decode)
+
+    backends = subparsers.add_parser("backends", help="parity, latency and RSS of inference backends")
+    backends.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"],
+                          choices=["torch", "int8", "onnx"], help="the first one is the parity reference")
+    backends.add_argument("--pipeline", choices=["emotion", "conversation"], default="emotion")
+    backends.add_argument("--dataset", default=DEFAULT_DATASET)
+    backends.add_argument("--limit", type=int, default=200, help="maximum examples to run")
+    backends.add_argument("--min-agreement", type=float, default=0.95)
+    backends.add_argument("--worker", choices=["torch", "int8", "onnx"], help=argparse.SUPPRESS)
+    backends.set_defaults(func=bench_backends)
+
+    translation = subparsers.add_parser("translation", help="translation cache and batching")
+    translation.add_argument("--requests", type=int, default=200)
+    translation.add_argument("--backend", choices=["dictionary", "googletrans"], default="dictionary")
+    translation.add_argument("--latency", type=float, default=0.08,
+                             help="simulated round trip of the dictionary backend in seconds")
+    translation.add_argument("--batch-size", type=int, default=20)
+    translation.add_argument("--dest", default="hindi")
+    translation.set_defaults(func=bench_translation)
+
+    asynchronous = subparsers.add_parser("async", help="asyncio pipeline against thread-per-request")
+    asynchronous.add_argument("--clients", type=int, default=8)
+    asynchronous.add_argument("--turns", type=int, default=3, help="turns per client")
+    asynchronous.add_argument("--language", default="hindi")
+    asynchronous.add_argument("--translation-latency", type=float, default=0.15,
+                              help="simulated translator round trip in seconds (omit the stand-in with -1)")
+    asynchronous.set_defaults(func=bench_async)
+
+    importtime = subparsers.add_parser("importtime", help="import cost of the entry points (-X importtime)")
+    importtime.add_argument("--modules", nargs="+", default=["main", "chatbot", "memory"])
+    importtime.add_argument("--max-ms", type=float, default=None, help="fail above this total import time")
+    importtime.set_defaults(func=bench_importtime)
+
+    memory = subparsers.add_parser("memory", help="overhead of persistent SQLite memory")
+    memory.add_argument("--users", type=int, default=10000)
+    memory.add_argument("--turns", type=int, default=1, help="turns per user")
+    memory.add_argument("--batch-size", type=int, default=32, help="store write batch size")
+    memory.add_argument("--samples", type=int, default=1000, help="sessions to hydrate")
+    memory.set_defaults(func=bench_memory)
+
+    dashboard = subparsers.add_parser("dashboard", help="Streamlit dashboard rerun latency")
+    dashboard.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000])
+    dashboard.add_argument("--repeat", type=int, default=5)
+    dashboard.set_defaults(func=bench_dashboard)
+
+    evaluation = subparsers.add_parser("eval", help="emotion detection quality and speed, with regression checks")
+    evaluation.add_argument("--dataset", default=DEFAULT_DATASET)
+    evaluation.add_argument("--detectors", nargs="+", choices=["model", "fallback"], default=["model", "fallback"])
+    evaluation.add_argument("--backend", default=None, help="inference backend for the model detector")
+    evaluation.add_argument("--batch-size", type=int, default=32)
+    evaluation.add_argument("--throughput-items", type=int, default=512)
+    evaluation.add_argument("--output", help="write the results as JSON")
+    evaluation.add_argument("--baseline", help="earlier --output file to check for regressions")
+    evaluation.add_argument("--max-quality-drop", type=float, default=0.02,
+                            help="allowed absolute drop in accuracy / macro F1")
+    evaluation.add_argument("--max-latency-increase", type=float, default=0.25,
+                            help="allowed relative increase in p95 latency")
+    evaluation.add_argument("--max-throughput-drop", type=float, default=0.25,
+                            help="allowed relative drop in batched throughput")
+    evaluation.add_argument("--max-rss-increase", type=float, default=0.25,
+                            help="allowed relative increase in peak RSS")
+    evaluation.add_argument("--worker", choices=["model", "fallback"], help=argparse.SUPPRESS)
+    evaluation.set_defaults(func=bench_eval)
+
+    lexicon = subparsers.add_parser("lexicon", help="keyword engine against the model")
+    lexicon.add_argument("--dataset", default=DEFAULT_DATASET)
+    lexicon.add_argument("--backend", default=None, help="inference backend for the model")
+    lexicon.add_argument("--batch-size", type=int, default=32)
+    lexicon.add_argument("--repeat", type=int, default=50, help="dataset repetitions for throughput")
+    lexicon.set_defaults(func=bench_lexicon)
+
+    cascade = subparsers.add_parser("cascade", help="keyword engine first, model only when uncertain")
+    cascade.add_argument("--dataset", default=DEFAULT_DATASET)
+    cascade.add_argument("--backend", default=None, help="inference backend for the model")
+    cascade.add_argument("--margins", type=float, nargs="+", default=[0.1, 0.2, 0.3, 0.4])
+    cascade.add_argument("--batch-size", type=int, default=32)
+    cascade.add_argument("--repeat", type=int, default=10, help="dataset repetitions")
+    cascade.set_defaults(func=bench_cascade)
+
+    emotioncache = subparsers.add_parser("emotioncache", help="emotion result cache under repeated messages")
+    emotioncache.add_argument("--backend", default=None, help="inference backend for the model")
+    emotioncache.add_argument("--clients", type=int, default=8)
+    emotioncache.add_argument("--requests", type=int, default=100, help="requests per client")
+    emotioncache.add_argument("--cache-size", type=int, default=4096)
+    emotioncache.set_defaults(func=bench_emotioncache)
+
+    metrics = subparsers.add_parser("metrics", help="overhead of the stage timers and counters")
+    metrics.add_argument("--ops", type=int, default=200000)
+    metrics.set_defaults(func=bench_metrics)
+
+    audio = subparsers.add_parser("audio", help="microphone capture memory and latency on synthetic audio")
+    audio.add_argument("--seconds", type=float, nargs="+", default=[10, 60, 300])
+    audio.add_argument("--rate", type=int, default=44100)
+    audio.add_argument("--target-rate", type=int, default=16000)
+    audio.add_argument("--max-seconds", type=float, default=60,
+                       help="ring buffer length (raised to the recording length)")
+    audio.set_defaults(func=bench_audio)
+
+    vad = subparsers.add_parser("vad", help="voice activity detection and silence trimming")
+    vad.add_argument("--snr", type=float, nargs="+", default=[30, 20, 10], help="speech-to-noise ratios in dB")
+    vad.add_argument("--rate", type=int, default=16000)
+    vad.add_argument("--wav", nargs="*", default=[], help="16-bit WAV recordings to trim as well")
+    vad.add_argument("--repeat", type=int, default=20)
+    vad.set_defaults(func=bench_vad)
+
+    tts = subparsers.add_parser("tts", help="background sentence-chunked text-to-speech")
+    tts.add_argument("--sentences", type=int, nargs="+", default=[1, 3, 6])
+    tts.add_argument("--translate-ms", type=float, default=150, help="simulated translation time per sentence")
+    tts.add_argument("--word-ms", type=float, default=20, help="simulated speaking time per word")
+    tts.set_defaults(func=bench_tts)
+
+    warmup = subparsers.add_parser("warmup", help="first reply of a fresh process, lazy loading vs background warm-up")
+    warmup.add_argument("--turns", type=int, default=3)
+    warmup.add_argument("--think-time", type=float, default=2.0,
+                        help="seconds the user spends typing the first message")
+    warmup.add_argument("--worker", choices=["cold", "warm"], help=argparse.SUPPRESS)
+    warmup.set_defaults(func=bench_warmup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
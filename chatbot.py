@@ -1,150 +1,412 @@
-from transformers import pipeline
-import random
-from emotion_detector import EmotionDetector
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import functools
+import time
+import uuid
+import config
+from generation import generate_many, generation_request, stream_generate
 from memory import EmotionalMemory
-from utils import SpeechHandler
-from googletrans import Translator
+from metrics import get_metrics
+from registry import get_registry
+from tts import SENTENCE_BOUNDARY
+
+BASE_RESPONSE_FALLBACK = "I understand how you're feeling. Would you like to tell me more?"
+FOLLOW_UP_FALLBACK = "Can you tell me more about that?"
+
+
+def _is_english(language):
+    return language is None or language.lower() in ('english', 'en')
+
+
+@contextmanager
+def _stage(timings, name):
+    """Record the wall-clock duration of a pipeline stage in seconds, per turn and process-wide"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+        get_metrics().observe(name, timings[name])
+
+
+def _turn_failed(result, error):
+    print(f"Error in response generation: {str(error)}")
+    get_metrics().inc('errors', component='chatbot')
+    result.error = str(error)
+    result.response = "I apologize, but I'm having trouble processing that right now. Could you please try again?"
+
+
+def _turn_finished(result, turn_start):
+    result.timings['total'] = time.perf_counter() - turn_start
+    get_metrics().observe('turn', result.timings['total'])
+
+
+def base_response_prompt(emotion, intensity):
+    """Prompt for the base response; shared with the pre-generated response bank"""
+    return (
+        f"Given a user feeling {emotion} with {intensity} intensity, "
+        "generate an empathetic and helpful response that addresses their emotional state. "
+        "The response should be natural, supportive, and engaging, similar to how a "
+        "professional counselor would respond. Include specific observations about "
+        "their emotional state and offer appropriate support or guidance."
+    )
+
+
+@dataclass
+class TurnResult:
+    """Everything computed for a single user message"""
+    user_input: str
+    language: str
+    response: str = ""
+    english_input: str = ""
+    emotion_data: dict = None
+    scores: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)
+    profile: str = None
+    error: str = None
+
+
+class TurnStream:
+    """Iterable of reply text chunks; result holds the TurnResult once iteration ends"""
+    def __init__(self, chunks, result):
+        self._chunks = chunks
+        self.result = result
+
+    def __iter__(self):
+        return self._chunks
+
 
 class EmotionAwareChatbot:
-    def __init__(self):
-        self.translator = Translator()
-        self.emotion_detector = EmotionDetector()
-        self.memory = EmotionalMemory()
-        self.speech_handler = SpeechHandler()
-        try:
-            self.conversation_pipeline = pipeline(
-                "text2text-generation",
-                model="google/flan-t5-large",
-                device=-1
-            )
-        except Exception as e:
-            print(f"Error initializing conversation pipeline: {str(e)}")
-            self.conversation_pipeline = None
+    def __init__(self, registry=None, decode_mode=None, profile=None, latency_budget=None,
+                 user_id=None, session_id=None, memory=None):
+        # Inference engines are shared process-wide; memory and speech state are per session
+        self.registry = registry or get_registry()
+        self.decode_mode = decode_mode or config.DECODE_MODE
+        self.profile = profile or config.GENERATION_PROFILE
+        self.latency_budget = config.LATENCY_BUDGET if latency_budget is None else latency_budget
+        self.profile_selector = self.registry.get_profile_selector()
+        self.translation_service = self.registry.get_translation_service()
+        self.emotion_detector = self.registry.get_emotion_detector()
+        self.conversation_pipeline = self.registry.get_conversation_pipeline()
+        self.response_bank = self.registry.get_response_bank()
+        self._bank_rotation = {}
+        self.memory = memory or self._create_memory(user_id, session_id)
+        self._speech_handler = None
+
+    def _create_memory(self, user_id, session_id):
+        """Persistent memory when a store is configured and the user is known, else in-process"""
+        store = self.registry.get_memory_store()
+        if store is None or user_id is None:
+            return EmotionalMemory()
+        from memory_store import PersistentEmotionalMemory
+        return PersistentEmotionalMemory(store, user_id, session_id or uuid.uuid4().hex)
 
     def translate_to_english(self, text, source_lang):
-        if source_lang == 'english':
+        if _is_english(source_lang):
             return text
-            
-        try:
-            lang_codes = {
-                'hindi': 'hi',
-                'telugu': 'te',
-                'tamil': 'ta',
-                'bengali': 'bn',
-                'kannada': 'kn',
-                'marathi': 'mr',
-                'gujarati': 'gu',
-                'malayalam': 'ml',
-                'punjabi': 'pa',
-                'urdu': 'ur',
-                'odia': 'or',
-                'assamese': 'as',
-                'sanskrit': 'sa'
-            }
-            
-            source_code = lang_codes.get(source_lang, 'en')
-            translation = self.translator.translate(text, src=source_code, dest='en')
-            return translation.text
-        except Exception as e:
-            print(f"Translation error: {e}")
+        return self.translation_service.to_english(text, source_lang)
+
+    def translate_from_english(self, text, target_lang):
+        if _is_english(target_lang):
             return text
+        return self.translation_service.from_english(text, target_lang)
+
+    def generate_response(self, user_input, target_lang='english'):
+        return self.process_turn(user_input, target_lang).response
 
-    def generate_response(self, user_input, target_lang='en'):
+    def process_turn(self, user_input, language='english', latency_budget=None):
+        """
+        Run one conversational turn: translate, detect emotion, generate, translate back
+        and remember. Every stage runs exactly once. With a latency budget (seconds) the
+        generation profile is picked to fit it.
+        Returns: TurnResult
+        """
+        result = TurnResult(user_input=user_input, language=language)
+        profile = self._select_profile(latency_budget)
+        result.profile = profile.name
+        turn_start = time.perf_counter()
         try:
             # First translate input to English if needed
-            english_input = self.translate_to_english(user_input, target_lang)
+            with _stage(result.timings, 'translate_input'):
+                result.english_input = self.translate_to_english(user_input, language)
             
             # Detect emotion in English text
-            emotion_data = self.emotion_detector.detect_emotion(english_input)
+            with _stage(result.timings, 'detect_emotion'):
+                result.scores = self.emotion_detector.score_emotions(result.english_input)
+                result.emotion_data = self.emotion_detector.emotion_from_scores(result.scores)
             emotional_summary = self.memory.get_emotional_summary()
             
-            # Generate base response in English
-            base_response = self._generate_base_response(emotion_data, emotional_summary)
-            follow_up = self._generate_follow_up(emotion_data, english_input)
+            # Generate base response and follow-up in English
+            tracked = self.profile_selector.track(profile, self.decode_mode)
+            with _stage(result.timings, 'generate'), tracked as stopwatch:
+                base_response, follow_up = self._generate_reply_parts(
+                    result.emotion_data, emotional_summary, result.english_input, result.timings, profile,
+                    stopwatch
+                )
             final_response = self._add_contextual_elements(base_response, follow_up, emotional_summary)
             
             # Translate response to target language if not English
-            if target_lang != 'english':
-                try:
-                    lang_codes = {
-                        'hindi': 'hi',
-                        'telugu': 'te',
-                        'tamil': 'ta',
-                        'bengali': 'bn',
-                        'kannada': 'kn',
-                        'marathi': 'mr',
-                        'gujarati': 'gu',
-                        'malayalam': 'ml',
-                        'punjabi': 'pa',
-                        'urdu': 'ur',
-                        'odia': 'or',
-                        'assamese': 'as',
-                        'sanskrit': 'sa'
-                    }
-                    target_code = lang_codes.get(target_lang, 'en')
-                    final_response = self.translator.translate(final_response, src='en', dest=target_code).text
-                except Exception as e:
-                    print(f"Translation error: {e}")
+            with _stage(result.timings, 'translate_output'):
+                final_response = self.translate_from_english(final_response, language)
             
             # Store interaction in memory
-            self.memory.add_interaction(user_input, emotion_data, final_response)
+            with _stage(result.timings, 'memory'):
+                self.memory.add_interaction(user_input, result.emotion_data, final_response, result.scores)
             
-            return final_response
+            result.response = final_response
             
         except Exception as e:
-            print(f"Error in response generation: {str(e)}")
-            return "I apologize, but I'm having trouble processing that right now. Could you please try again?"
+            _turn_failed(result, e)
+        _turn_finished(result, turn_start)
+        return result
+
+    async def agenerate_response(self, user_input, target_lang='english'):
+        return (await self.aprocess_turn(user_input, target_lang)).response
 
-    def _generate_base_response(self, emotion_data, emotional_summary):
+    async def aprocess_turn(self, user_input, language='english', latency_budget=None):
+        """
+        asyncio version of process_turn. Translation is awaited as I/O and model
+        inference runs on executors, so one event loop can serve many conversations.
+        decode_mode applies as in process_turn: concurrent puts each generation on
+        the executor separately, sequential and batched submit them as one call.
+        Returns: TurnResult
+        """
+        import asyncio
+        result = TurnResult(user_input=user_input, language=language)
+        profile = self._select_profile(latency_budget)
+        result.profile = profile.name
+        turn_start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        executor = self.registry.get_generation_executor()
         try:
-            emotion = emotion_data['emotion']
-            intensity = emotion_data['intensity']
-            
-            context = (
-                f"Given a user feeling {emotion} with {intensity} intensity, "
-                "generate an empathetic and helpful response that addresses their emotional state. "
-                "The response should be natural, supportive, and engaging, similar to how a "
-                "professional counselor would respond. Include specific observations about "
-                "their emotional state and offer appropriate support or guidance."
-            )
+            with _stage(result.timings, 'translate_input'):
+                if _is_english(language):
+                    result.english_input = user_input
+                else:
+                    result.english_input = await self.translation_service.ato_english(user_input, language)
+            
+            with _stage(result.timings, 'detect_emotion'):
+                # The default executor keeps short classifications from queueing behind generations
+                result.scores = await loop.run_in_executor(
+                    None, self.emotion_detector.score_emotions, result.english_input
+                )
+                result.emotion_data = self.emotion_detector.emotion_from_scores(result.scores)
+            
+            tracked = self.profile_selector.track(profile, self.decode_mode)
+            with _stage(result.timings, 'generate'), tracked as stopwatch:
+                plan = self._plan_reply(result.emotion_data, result.english_input, profile)
+                conversation_pipeline = self._pipeline_for(profile)
+                if self.decode_mode == 'concurrent':
+                    batches = [[request] for request in plan['requests']]
+                else:
+                    batches = [plan['requests']]
+                # Generation is in flight while the summary is read
+                pending = [
+                    loop.run_in_executor(
+                        executor,
+                        functools.partial(
+                            generate_many, conversation_pipeline, batch,
+                            mode=self.decode_mode, timings=result.timings
+                        )
+                    )
+                    for batch in batches
+                ]
+                emotional_summary = self.memory.get_emotional_summary()
+                outputs = [text for batch in await asyncio.gather(*pending) for text in batch]
+                base_response, follow_up = self._finish_reply(plan, outputs, stopwatch)
+            final_response = self._add_contextual_elements(base_response, follow_up, emotional_summary)
             
-            response = self.conversation_pipeline(
-                context,
-                max_length=200,
-                min_length=50,
-                num_beams=5,
-                no_repeat_ngram_size=2,
-                early_stopping=True
-            )[0]['generated_text']
+            with _stage(result.timings, 'translate_output'):
+                if not _is_english(language):
+                    final_response = await self.translation_service.afrom_english(final_response, language)
             
-            return response
+            with _stage(result.timings, 'memory'):
+                # A persistent memory may write to SQLite, which must not stall the event loop
+                await loop.run_in_executor(
+                    None, self.memory.add_interaction,
+                    user_input, result.emotion_data, final_response, result.scores
+                )
+            
+            result.response = final_response
             
         except Exception as e:
-            print(f"Error in response generation: {str(e)}")
-            return "I understand how you're feeling. Would you like to tell me more?"
+            _turn_failed(result, e)
+        _turn_finished(result, turn_start)
+        return result
+
+    def stream_turn(self, user_input, language='english', latency_budget=None):
+        """
+        Like process_turn, but the reply is yielded piece by piece as it is decoded.
+        Non-English replies are translated and yielded one sentence at a time.
+        Returns: TurnStream (iterate it for text chunks; .result is filled in when done)
+        """
+        result = TurnResult(user_input=user_input, language=language)
+        profile = self._select_profile(latency_budget, kind='stream')
+        result.profile = profile.name
+        return TurnStream(self._run_stream_turn(result, profile), result)
+
+    def _select_profile(self, latency_budget=None, kind=None):
+        """kind is the kind of generation timed by the profile selector (default: decode_mode)"""
+        if latency_budget is None:
+            latency_budget = self.latency_budget
+        return self.profile_selector.select(latency_budget, default=self.profile, kind=kind or self.decode_mode)
 
-    def _generate_follow_up(self, emotion_data, user_input):
+    def _pipeline_for(self, profile):
+        if profile is None:
+            return self.conversation_pipeline
+        return self.registry.get_conversation_pipeline(profile.model)
+
+    def _run_stream_turn(self, result, profile):
+        turn_start = time.perf_counter()
+        chunks = []
         try:
-            context = (
-                f"Based on the message: '{user_input}' and emotion: {emotion_data['emotion']}, "
-                "generate a thoughtful follow-up question that encourages deeper discussion "
-                "and shows understanding of their emotional state. The question should be "
-                "open-ended and empathetic."
-            )
-            
-            follow_up = self.conversation_pipeline(
-                context,
-                max_length=100,
-                min_length=20,
-                num_beams=3,
-                no_repeat_ngram_size=2
-            )[0]['generated_text']
+            with _stage(result.timings, 'translate_input'):
+                result.english_input = self.translate_to_english(result.user_input, result.language)
+            with _stage(result.timings, 'detect_emotion'):
+                result.scores = self.emotion_detector.score_emotions(result.english_input)
+                result.emotion_data = self.emotion_detector.emotion_from_scores(result.scores)
+            emotional_summary = self.memory.get_emotional_summary()
             
-            return follow_up
+            english_chunks = self._stream_english_reply(result, emotional_summary, profile)
+            for chunk in self._translate_stream(english_chunks, result.language):
+                if not chunks:
+                    result.timings['first_token'] = time.perf_counter() - turn_start
+                    get_metrics().observe('first_token', result.timings['first_token'])
+                chunks.append(chunk)
+                yield chunk
             
+            result.response = ''.join(chunks).strip()
+            with _stage(result.timings, 'memory'):
+                self.memory.add_interaction(result.user_input, result.emotion_data, result.response, result.scores)
         except Exception as e:
-            print(f"Error generating follow-up: {str(e)}")
-            return "Can you tell me more about that?"
+            _turn_failed(result, e)
+            if not chunks:
+                yield result.response
+        _turn_finished(result, turn_start)
+
+    def _stream_english_reply(self, result, emotional_summary, profile):
+        """Yield the English reply: streamed base response, then follow-up, then context"""
+        emotion = result.emotion_data['emotion']
+        intensity = result.emotion_data['intensity']
+        base_prompt = base_response_prompt(emotion, intensity)
+        conversation_pipeline = self._pipeline_for(profile)
+        
+        # Time spent suspended while the consumer handles a chunk is not generation time
+        with self.profile_selector.track(profile, 'stream') as stopwatch:
+            # The follow-up decodes on the worker pool while the base response streams
+            follow_up_future = self.registry.get_generation_executor().submit(
+                generate_many,
+                conversation_pipeline,
+                [self._follow_up_request(result.emotion_data, result.english_input, profile)],
+                timings=result.timings
+            )
+            
+            base_response = self.response_bank.get(
+                emotion, intensity, base_prompt, rotation=self._bank_rotation, profile=profile.name
+            )
+            if base_response is not None:
+                stopwatch.discard()
+                with stopwatch.paused():
+                    yield base_response
+            else:
+                base_start = time.perf_counter()
+                pieces = []
+                base_request = self._base_request(base_prompt, profile)
+                stream = self.registry.get_stream_function()
+                for piece in stream_generate(conversation_pipeline, base_request, stream=stream):
+                    pieces.append(piece)
+                    with stopwatch.paused():
+                        yield piece
+                result.timings['generate_base'] = time.perf_counter() - base_start
+                base_response = ''.join(pieces)
+            
+            follow_up = follow_up_future.result()[0]
+        
+        full = self._add_contextual_elements(base_response, follow_up, emotional_summary)
+        yield full[len(base_response):]
+
+    def _translate_stream(self, chunks, language):
+        """Pass English chunks through, or translate them one complete sentence at a time"""
+        if _is_english(language):
+            yield from chunks
+            return
+        buffer = ''
+        for chunk in chunks:
+            buffer += chunk
+            sentences = SENTENCE_BOUNDARY.split(buffer)
+            buffer = sentences.pop()
+            for sentence in sentences:
+                yield self.translate_from_english(sentence, language) + ' '
+        if buffer.strip():
+            yield self.translate_from_english(buffer.strip(), language)
+
+    def _generate_reply_parts(self, emotion_data, emotional_summary, user_input, timings=None, profile=None,
+                              stopwatch=None):
+        """
+        Produce the base response and the follow-up question. A response bank hit skips
+        the base generation; otherwise both prompts are decoded together per decode_mode.
+        Returns: (base_response, follow_up)
+        """
+        plan = self._plan_reply(emotion_data, user_input, profile)
+        outputs = generate_many(
+            self._pipeline_for(profile),
+            plan['requests'],
+            mode=self.decode_mode,
+            executor=self.registry.get_generation_executor(),
+            timings=timings
+        )
+        return self._finish_reply(plan, outputs, stopwatch)
+
+    def _plan_reply(self, emotion_data, user_input, profile):
+        """Look up the response bank and build the generation requests still needed"""
+        profile = profile or self._select_profile()
+        emotion = emotion_data['emotion']
+        intensity = emotion_data['intensity']
+        base_prompt = base_response_prompt(emotion, intensity)
+        
+        # The prompt depends only on (emotion, intensity), so a pre-generated variant will do
+        base_response = self.response_bank.get(
+            emotion, intensity, base_prompt, rotation=self._bank_rotation, profile=profile.name
+        )
+        requests = []
+        if base_response is None:
+            requests.append(self._base_request(base_prompt, profile))
+        requests.append(self._follow_up_request(emotion_data, user_input, profile))
+        return {
+            'emotion': emotion,
+            'intensity': intensity,
+            'base_prompt': base_prompt,
+            'profile': profile.name,
+            'base_response': base_response,
+            'requests': requests
+        }
+
+    def _finish_reply(self, plan, outputs, stopwatch=None):
+        base_response = plan['base_response']
+        if base_response is not None and stopwatch is not None:
+            # Only the follow-up was generated: not comparable with a full turn
+            stopwatch.discard()
+        if base_response is None:
+            base_response = outputs[0]
+            if base_response != BASE_RESPONSE_FALLBACK:
+                self.response_bank.add(
+                    plan['emotion'], plan['intensity'], plan['base_prompt'], base_response, plan['profile']
+                )
+        return base_response, outputs[-1]
+
+    def _base_request(self, prompt, profile=None):
+        profile = profile or self._select_profile()
+        return generation_request('generate_base', prompt, BASE_RESPONSE_FALLBACK, **profile.base_kwargs())
+
+    def _follow_up_request(self, emotion_data, user_input, profile=None):
+        context = (
+            f"Based on the message: '{user_input}' and emotion: {emotion_data['emotion']}, "
+            "generate a thoughtful follow-up question that encourages deeper discussion "
+            "and shows understanding of their emotional state. The question should be "
+            "open-ended and empathetic."
+        )
+        profile = profile or self._select_profile()
+        return generation_request('generate_follow_up', context, FOLLOW_UP_FALLBACK, **profile.follow_up_kwargs())
     
     def _add_contextual_elements(self, base_response, follow_up, emotional_summary):
         """Add contextual elements to the response based on emotional history"""
@@ -162,6 +424,19 @@ class EmotionAwareChatbot:
         """Get a summary of the current emotional state"""
         return self.memory.get_emotional_summary()
     
+    @property
+    def speech_handler(self):
+        # The audio stack is loaded the first time speech is used, not for text chat
+        if self._speech_handler is None:
+            from utils import SpeechHandler
+            self._speech_handler = SpeechHandler(translation_service=self.translation_service)
+        return self._speech_handler
+    
     def speak_response(self, text, language='en'):
-        """Convert response to speech"""
-        self.speech_handler.text_to_speech(text, language)
\ No newline at end of file
+        """Speak a response in the background; returns the cancellable tts.SpeechJob"""
+        return self.speech_handler.text_to_speech(text, language)
+
+    def stop_speaking(self):
+        """Cancel a reply that is still being spoken, e.g. when the user sends a new message"""
+        if self._speech_handler is not None:
+            self._speech_handler.cancel_speech()
\ No newline at end of file
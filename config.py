@@ -0,0 +1,98 @@
+import os
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+# Model identifiers shared by every session in the process
+EMOTION_MODEL = os.environ.get(
+    "EMOTION_BOT_EMOTION_MODEL", "j-hartmann/emotion-english-distilroberta-base"
+)
+CONVERSATION_MODEL = os.environ.get(
+    "EMOTION_BOT_CONVERSATION_MODEL", "google/flan-t5-large"
+)
+
+# Inference backend per pipeline: torch, int8, onnx or stub (see backends.py);
+# the emotion detector also accepts lexicon (keyword engine only, no model)
+EMOTION_BACKEND = os.environ.get("EMOTION_BOT_EMOTION_BACKEND", "torch")
+CONVERSATION_BACKEND = os.environ.get("EMOTION_BOT_CONVERSATION_BACKEND", "torch")
+ONNX_CACHE_DIR = os.environ.get(
+    "EMOTION_BOT_ONNX_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".onnx")
+)
+
+# Seconds charged per classification / generated word by the stub backend
+STUB_LATENCY = float(os.environ.get("EMOTION_BOT_STUB_LATENCY", "0.01"))
+
+# Stage timers and counters (metrics.py); 0 turns them into no-ops
+METRICS_ENABLED = os.environ.get("EMOTION_BOT_METRICS", "1") == "1"
+
+# Emotion cascade: keyword-engine results with a top-2 score margin of at least this are
+# kept and only the rest go to the model; unset runs every text through the model
+_cascade_margin = os.environ.get("EMOTION_BOT_CASCADE_MARGIN")
+CASCADE_MARGIN = float(_cascade_margin) if _cascade_margin else None
+# Fraction of kept keyword-engine results also scored by the model to measure agreement
+CASCADE_AUDIT_RATE = float(os.environ.get("EMOTION_BOT_CASCADE_AUDIT_RATE", "0"))
+
+# LRU cache of emotion score distributions keyed by normalized text (0 disables it)
+EMOTION_CACHE_SIZE = int(os.environ.get("EMOTION_BOT_EMOTION_CACHE_SIZE", "4096"))
+
+# Microphone capture (utils.SpeechHandler): audio is recorded into a preallocated buffer
+# holding the last SPEECH_MAX_SECONDS and resampled to SPEECH_SAMPLE_RATE for the
+# recognizer (0 keeps the capture rate)
+SPEECH_CAPTURE_RATE = int(os.environ.get("EMOTION_BOT_SPEECH_CAPTURE_RATE", "44100"))
+SPEECH_SAMPLE_RATE = int(os.environ.get("EMOTION_BOT_SPEECH_SAMPLE_RATE", "16000"))
+SPEECH_MAX_SECONDS = float(os.environ.get("EMOTION_BOT_SPEECH_MAX_SECONDS", "60"))
+# Trim silence with voice activity detection before recognition; the ambient noise
+# profile is measured once per session over SPEECH_CALIBRATION_SECONDS
+SPEECH_VAD = os.environ.get("EMOTION_BOT_SPEECH_VAD", "1") == "1"
+SPEECH_CALIBRATION_SECONDS = float(os.environ.get("EMOTION_BOT_SPEECH_CALIBRATION_SECONDS", "0.3"))
+
+# Load the models on a background thread at startup and run warm-up inferences; the app,
+# CLI and server report "warming up" until done. 0 loads them lazily on first use.
+WARMUP = os.environ.get("EMOTION_BOT_WARMUP", "1") == "1"
+
+# Micro-batching of emotion detection across concurrent sessions
+EMOTION_BATCHING = os.environ.get("EMOTION_BOT_EMOTION_BATCHING", "0") == "1"
+EMOTION_MAX_BATCH_SIZE = int(os.environ.get("EMOTION_BOT_EMOTION_MAX_BATCH_SIZE", "16"))
+EMOTION_MAX_WAIT_MS = float(os.environ.get("EMOTION_BOT_EMOTION_MAX_WAIT_MS", "5"))
+
+# Pre-generated base responses keyed by (emotion, intensity)
+RESPONSE_BANK_PATH = os.environ.get(
+    "EMOTION_BOT_RESPONSE_BANK",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "response_bank.json")
+)
+# Generate the bank at startup when no file exists yet
+RESPONSE_BANK_PREGENERATE = os.environ.get("EMOTION_BOT_RESPONSE_BANK_PREGENERATE", "0") == "1"
+RESPONSE_BANK_VARIANTS = int(os.environ.get("EMOTION_BOT_RESPONSE_BANK_VARIANTS", "6"))
+
+# How the base response and follow-up are decoded: sequential, concurrent or batched
+DECODE_MODE = os.environ.get("EMOTION_BOT_DECODE_MODE", "concurrent")
+GENERATION_WORKERS = int(os.environ.get("EMOTION_BOT_GENERATION_WORKERS", "4"))
+
+# Generation profile used when no latency budget is given (quality, balanced or fast)
+GENERATION_PROFILE = os.environ.get("EMOTION_BOT_GENERATION_PROFILE", "quality")
+# Per-turn generation budget in seconds; when set, the profile is chosen automatically
+_latency_budget = os.environ.get("EMOTION_BOT_LATENCY_BUDGET")
+LATENCY_BUDGET = float(_latency_budget) if _latency_budget else None
+
+# Translation service: backend (googletrans or dictionary), LRU size, disk cache (saved every
+# SAVE_INTERVAL seconds and at exit) and timeout
+TRANSLATION_BACKEND = os.environ.get("EMOTION_BOT_TRANSLATION_BACKEND", "googletrans")
+TRANSLATION_CACHE_SIZE = int(os.environ.get("EMOTION_BOT_TRANSLATION_CACHE_SIZE", "4096"))
+TRANSLATION_CACHE_PATH = os.environ.get("EMOTION_BOT_TRANSLATION_CACHE")
+TRANSLATION_SAVE_INTERVAL = float(os.environ.get("EMOTION_BOT_TRANSLATION_SAVE_INTERVAL", "300"))
+TRANSLATION_TIMEOUT = float(os.environ.get("EMOTION_BOT_TRANSLATION_TIMEOUT", "5"))
+
+# SQLite file for persistent per-user emotional memory; unset keeps memory in process only
+MEMORY_DB_PATH = os.environ.get("EMOTION_BOT_MEMORY_DB")
+MEMORY_WRITE_BATCH = int(os.environ.get("EMOTION_BOT_MEMORY_WRITE_BATCH", "32"))
+
+# HTTP/WebSocket server (server.py): session limits and inference backpressure
+SERVER_MAX_SESSIONS = int(os.environ.get("EMOTION_BOT_SERVER_MAX_SESSIONS", "1000"))
+SERVER_SESSION_TTL = float(os.environ.get("EMOTION_BOT_SERVER_SESSION_TTL", "1800"))
+SERVER_MAX_MEMORY_MB = float(os.environ.get("EMOTION_BOT_SERVER_MAX_MEMORY_MB", "256"))
+# Turns allowed in flight at once; further requests get 429 instead of queueing
+SERVER_MAX_IN_FLIGHT = int(os.environ.get("EMOTION_BOT_SERVER_MAX_IN_FLIGHT", "16"))
@@ -0,0 +1,102 @@
+import csv
+import json
+import sys
+
+
+def _open(path, mode):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, newline='' if path.endswith('.csv') else None, encoding='utf-8')
+
+
+def iter_records(path, text_field='text'):
+    """
+    Stream records from a JSONL or CSV file ('-' reads JSONL from stdin)
+    Yields: (record dict, text)
+    """
+    f = _open(path, 'r')
+    try:
+        if path.endswith('.csv'):
+            for record in csv.DictReader(f):
+                yield record, record.get(text_field) or ''
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield record, str(record.get(text_field) or '')
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+class _JsonlWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class _CsvWriter:
+    def __init__(self, f):
+        self.f = f
+        self.writer = None
+
+    def write(self, record):
+        row = {
+            key: json.dumps(value) if isinstance(value, (list, dict)) else value
+            for key, value in record.items()
+        }
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.f, fieldnames=list(row), extrasaction='ignore')
+            self.writer.writeheader()
+        self.writer.writerow(row)
+
+
+def _flush_chunk(detector, writer, records, texts, batch_size, top_k, include_scores):
+    matrix = detector.score_matrix(texts, batch_size=batch_size)
+    summary = detector.summarize_scores(matrix, top_k=top_k)
+    labels = detector.labels
+    for i, record in enumerate(records):
+        record['emotion'] = str(summary['emotion'][i])
+        record['intensity'] = str(summary['intensity'][i])
+        record['confidence'] = round(float(summary['confidence'][i]), 6)
+        record['secondary_emotions'] = [str(label) for label in summary['secondary_emotions'][i]]
+        if include_scores:
+            record['scores'] = {
+                label: round(float(score), 6) for label, score in zip(labels, matrix[i])
+            }
+        writer.write(record)
+
+
+def score_corpus(detector, input_path, output_path, text_field='text', batch_size=32,
+                 chunk_size=1024, top_k=2, include_scores=False):
+    """
+    Score every record of a JSONL/CSV corpus and write results incrementally.
+    Only chunk_size records are held in memory at any time.
+    Returns: number of records written
+    """
+    out = _open(output_path, 'w')
+    writer = _CsvWriter(out) if output_path.endswith('.csv') else _JsonlWriter(out)
+    written = 0
+    records, texts = [], []
+    try:
+        for record, text in iter_records(input_path, text_field):
+            records.append(record)
+            texts.append(text)
+            if len(records) == chunk_size:
+                _flush_chunk(detector, writer, records, texts, batch_size, top_k, include_scores)
+                written += len(records)
+                records, texts = [], []
+                out.flush()
+        if records:
+            _flush_chunk(detector, writer, records, texts, batch_size, top_k, include_scores)
+            written += len(records)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    return written
@@ -0,0 +1,94 @@
+import plotly.graph_objects as go
+
+# Messages shown per page of chat history
+HISTORY_PAGE_SIZE = 50
+
+
+def create_emotion_donut(emotion_counts):
+    """Create a donut chart for emotions"""
+    if not emotion_counts:
+        return None
+    
+    labels = list(emotion_counts.keys())
+    values = list(emotion_counts.values())
+    
+    # Updated color mapping for emotions using blue shades
+    colors = {
+        'joy': '#FFA726',#FFD54F ',  #0066CC',      # Bright blue
+        'sadness': '#003366',#64B5F6',  # Dark blue
+        'anger': '#E53935',#3399FF',    # Light blue
+        'fear': '#6A0DAD',#455A64',     #000080',     # Navy blue
+        'surprise': 'FF7043',#4169E1', # Royal blue
+        'neutral': 'B0BEC5',#87CEEB'   # Sky blue
+    }
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        hole=.6,
+        marker_colors=[colors.get(emotion.lower(), '#ADD8E6') for emotion in labels],
+        textinfo='label+percent'
+    )])
+    
+    fig.update_layout(
+        showlegend=True,
+        margin=dict(t=0, b=0, l=0, r=0),
+        annotations=[dict(text=f"{sum(values)}", x=0.5, y=0.5, font_size=24, showarrow=False)]
+    )
+    return fig
+
+
+def message_html(message):
+    """Chat bubble markup for one message"""
+    class_name = "user-message" if message["role"] == "user" else "assistant-message"
+    return f'<div class="{class_name}">{message["content"]}</div>'
+
+
+class DashboardCache:
+    """
+    Per-session cache of dashboard figures and rendered chat history.
+    Each rerun only processes the turns added since the previous one, so the
+    cost of a rerun no longer grows with the length of the conversation.
+    """
+
+    def __init__(self):
+        self._history_fig = None
+        self._history_x = []
+        self._history_y = []
+        self._donut_fig = None
+        self._donut_total = None
+        self._messages_html = []
+
+    def history_figure(self, emotions):
+        """Line chart of the emotion history, extended with new points only"""
+        if self._history_fig is None or len(emotions) < len(self._history_x):
+            # First render, or the history was reset
+            self._history_x, self._history_y = [], []
+            self._history_fig = go.Figure(data=[go.Scatter(x=[], y=[], mode='lines')])
+            self._history_fig.update_layout(
+                title='Emotion History',
+                xaxis_title='timestamp',
+                yaxis_title='emotion'
+            )
+        if len(emotions) > len(self._history_x):
+            for entry in emotions[len(self._history_x):]:
+                self._history_x.append(entry['timestamp'])
+                self._history_y.append(entry['emotion'])
+            self._history_fig.data[0].x = self._history_x
+            self._history_fig.data[0].y = self._history_y
+        return self._history_fig
+
+    def donut_figure(self, emotion_counts, total):
+        """Donut of emotion counts, rebuilt only when a new turn was counted"""
+        if total != self._donut_total:
+            self._donut_fig = create_emotion_donut(emotion_counts)
+            self._donut_total = total
+        return self._donut_fig
+
+    def chat_html(self, messages, limit=HISTORY_PAGE_SIZE):
+        """Markup for the last `limit` messages; each message is rendered once"""
+        if len(messages) < len(self._messages_html):
+            self._messages_html = []
+        for message in messages[len(self._messages_html):]:
+            self._messages_html.append(message_html(message))
+        return "\n".join(self._messages_html[-limit:])
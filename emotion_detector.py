@@ -1,20 +1,41 @@
-from transformers import pipeline
-import torch
+import random
+import threading
+import numpy as np
+import config
+from backends import load_pipeline
+from lexicon import LEXICON_LABELS, LexiconEngine
+from metrics import get_metrics
+from result_cache import ResultCache
+
+# Labels produced by the lexical fallback detector when no model is loaded
+FALLBACK_LABELS = LEXICON_LABELS
+
+INTENSITY_LEVELS = np.array(['low', 'medium', 'high'])
+
+
+def _cache_key(text):
+    # Same normalization as the translation cache: "OK " and "ok" share one entry
+    return ' '.join(text.split()).casefold()
+
 
 class EmotionDetector:
-    def __init__(self):
+    def __init__(self, model=None, backend=None, load_model=True, cascade_margin=None, audit_rate=None,
+                 cache_size=None):
+        self.backend = backend or config.EMOTION_BACKEND
+        self.emotion_classifier = None
         try:
-            # Initialize the emotion classification pipeline
-            self.emotion_classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                return_all_scores=True,
-                device=-1  # Use CPU instead of GPU
-            )
+            # Initialize the emotion classification pipeline (always on CPU);
+            # the 'lexicon' backend scores with the keyword engine alone
+            if load_model and self.backend != 'lexicon':
+                self.emotion_classifier = load_pipeline(
+                    "text-classification",
+                    model or config.EMOTION_MODEL,
+                    backend=self.backend,
+                    return_all_scores=True
+                )
         except Exception as e:
             print(f"Error initializing emotion classifier: {str(e)}")
             print("Falling back to default emotion detection...")
-            self.emotion_classifier = None
         
         # Define emotion categories
         self.emotions = [
@@ -27,52 +48,310 @@ class EmotionDetector:
             'medium': 0.4,
             'low': 0.2
         }
+        
+        # Column order of score matrices returned by detect_emotions
+        self.labels = self._model_labels() or list(FALLBACK_LABELS)
+        self.lexicon = LexiconEngine(labels=self.labels)
+        
+        # Cascade: keep keyword-engine results whose top-2 margin clears cascade_margin and
+        # escalate the rest to the model; audit_rate of kept results are re-checked by the model
+        self.cascade_margin = config.CASCADE_MARGIN if cascade_margin is None else cascade_margin
+        self.audit_rate = config.CASCADE_AUDIT_RATE if audit_rate is None else audit_rate
+        self.cascade_counts = {'cheap': 0, 'escalated': 0, 'audited': 0, 'agreed': 0}
+        # Updated from request threads and the batching worker
+        self._cascade_lock = threading.Lock()
+        
+        # Model score distributions by normalized text, shared by every caller of this detector
+        cache_size = config.EMOTION_CACHE_SIZE if cache_size is None else cache_size
+        self.cache = ResultCache(cache_size) if cache_size > 0 else None
+    
+    def _model_labels(self):
+        if self.emotion_classifier is None:
+            return None
+        try:
+            id2label = self.emotion_classifier.model.config.id2label
+            return [id2label[i] for i in sorted(id2label)]
+        except Exception:
+            return None
     
     def detect_emotion(self, text):
         """
         Detect emotions in the given text
         Returns: dict with emotion and intensity
         """
+        return self.emotion_from_scores(self.score_emotions(text))
+    
+    def score_emotions(self, text):
+        """
+        Score the given text against every emotion label
+        Returns: dict mapping emotion label to score
+        """
         try:
             if self.emotion_classifier is None:
                 # Fallback to simple emotion detection
-                return self._fallback_emotion_detection(text)
+                return self._fallback_scores(text)
+            if self.cache is None:
+                return self._model_scores(text)
+            # Concurrent requests for the same uncached text share one inference
+            return dict(self.cache.get_or_compute(_cache_key(text), lambda: self._model_scores(text)))
+        except Exception as e:
+            print(f"Error in emotion detection: {str(e)}")
+            get_metrics().inc('errors', component='emotion_detector')
+            return self._fallback_scores(text)
+    
+    def score_emotions_batch(self, texts, batch_size=None):
+        """
+        Score several texts in one padded forward pass
+        Returns: list of dicts mapping emotion label to score, in input order
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        try:
+            if self.emotion_classifier is None:
+                return [self._fallback_scores(text) for text in texts]
+            if self.cache is None:
+                return self._model_scores_batch(texts, batch_size)
             
-            # Get emotion predictions
+            # Serve cached texts; score each distinct uncached text once
+            results = [None] * len(texts)
+            missing = {}
+            for i, text in enumerate(texts):
+                key = _cache_key(text)
+                scores = self.cache.get(key)
+                if scores is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    results[i] = dict(scores)
+            if missing:
+                unique_texts = [texts[indices[0]] for indices in missing.values()]
+                for (key, indices), scores in zip(missing.items(), self._model_scores_batch(unique_texts, batch_size)):
+                    self.cache.put(key, scores)
+                    for i in indices:
+                        results[i] = dict(scores)
+            return results
+        except Exception as e:
+            print(f"Error in batched emotion detection: {str(e)}")
+            get_metrics().inc('errors', component='emotion_detector')
+            return [self.score_emotions(text) for text in texts]
+    
+    def cached_scores(self, text):
+        """Score distribution from the cache, or None if the text has not been scored yet"""
+        if self.cache is None or self.emotion_classifier is None:
+            return None
+        scores = self.cache.get(_cache_key(text))
+        return None if scores is None else dict(scores)
+    
+    def _model_scores(self, text):
+        """Cascade or classifier scores for one text, bypassing the cache"""
+        if self.cascade_margin is not None:
+            scores = self._cascade_scores(text)
+            if scores is not None:
+                return scores
+        return self._classify(text)
+    
+    def _model_scores_batch(self, texts, batch_size=None):
+        if self.cascade_margin is None:
+            return self._classify_batch(texts, batch_size)
+        results = [self._cascade_scores(text) for text in texts]
+        escalated = [i for i, scores in enumerate(results) if scores is None]
+        if escalated:
+            model_results = self._classify_batch([texts[i] for i in escalated], batch_size)
+            for i, scores in zip(escalated, model_results):
+                results[i] = scores
+        return results
+    
+    def _classify(self, text):
+        """Model scores for one text"""
+        with get_metrics().timer('classify'):
             results = self.emotion_classifier(text)[0]
+        return {result['label']: result['score'] for result in results}
+    
+    def _classify_batch(self, texts, batch_size=None):
+        with get_metrics().timer('classify_batch'):
+            results = self.emotion_classifier(texts, batch_size=batch_size or len(texts))
+        return [{result['label']: result['score'] for result in item} for item in results]
+    
+    def _cheap_scores(self, text):
+        """Keyword-engine score vector if it is decisive enough for the cascade, else None"""
+        raw = self.lexicon.raw_scores(text)
+        # Without any keyword evidence the engine only reports its neutral prior
+        if raw.sum() > 0:
+            vector = self.lexicon.normalize(raw)
+            second, first = np.partition(vector, -2)[-2:]
+            if first - second >= self.cascade_margin:
+                return vector
+        return None
+    
+    def _cascade_scores(self, text):
+        """Cheap-stage scores, or None when the text has to be escalated to the model"""
+        vector = self._cheap_scores(text)
+        if vector is None:
+            self._count_cascade('escalated')
+            return None
+        self._count_cascade('cheap')
+        scores = dict(zip(self.labels, vector.tolist()))
+        if self.audit_rate and random.random() < self.audit_rate:
+            model_scores = self._classify(text)
+            self._count_cascade('audited')
+            if max(model_scores, key=model_scores.get) == max(scores, key=scores.get):
+                self._count_cascade('agreed')
+        return scores
+    
+    def _count_cascade(self, outcome, n=1):
+        with self._cascade_lock:
+            self.cascade_counts[outcome] += n
+        get_metrics().inc('cascade', n, outcome=outcome)
+    
+    def cascade_report(self):
+        """
+        How the cascade has routed texts so far
+        Returns: dict with counts, escalation_rate and agreement (of audited cheap results
+        with the model, None until something was audited)
+        """
+        with self._cascade_lock:
+            counts = dict(self.cascade_counts)
+        routed = counts['cheap'] + counts['escalated']
+        counts['escalation_rate'] = counts['escalated'] / routed if routed else 0.0
+        counts['agreement'] = counts['agreed'] / counts['audited'] if counts['audited'] else None
+        return counts
+    
+    def detect_emotions(self, texts, batch_size=32):
+        """
+        Score an iterable of texts using length-bucketed batches
+        Returns: (numpy array of shape (n_texts, n_labels), list of labels)
+        """
+        chunks = list(self.iter_emotion_scores(texts, batch_size=batch_size))
+        if chunks:
+            matrix = np.concatenate(chunks)
+        else:
+            matrix = np.zeros((0, len(self.labels)), dtype=np.float32)
+        return matrix, self.labels
+    
+    def iter_emotion_scores(self, texts, batch_size=32, chunk_batches=8):
+        """
+        Stream texts through the model chunk by chunk so memory stays bounded
+        Yields: score matrix for each consecutive chunk of texts
+        """
+        chunk_size = batch_size * chunk_batches
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) == chunk_size:
+                yield self.score_matrix(chunk, batch_size=batch_size)
+                chunk = []
+        if chunk:
+            yield self.score_matrix(chunk, batch_size=batch_size)
+    
+    def score_matrix(self, texts, batch_size=32):
+        """
+        Score a list of texts, batching texts of similar length together
+        Returns: numpy array of shape (len(texts), len(self.labels)) in input order
+        """
+        if self.cascade_margin is not None and self.emotion_classifier is not None:
+            return self._cascade_matrix(texts, batch_size)
+        return self._bucketed_matrix(texts, batch_size)
+    
+    def _cascade_matrix(self, texts, batch_size):
+        """Keyword-engine rows where decisive; only the remaining texts go through the model"""
+        raw = np.array([self.lexicon.raw_scores(text) for text in texts]).reshape(len(texts), len(self.labels))
+        matrix = self.lexicon.normalize(raw).astype(np.float32)
+        top2 = np.partition(matrix, -2, axis=1)[:, -2:]
+        cheap = (raw.sum(axis=1) > 0) & (top2[:, 1] - top2[:, 0] >= self.cascade_margin)
+        escalated = np.flatnonzero(~cheap)
+        self._count_cascade('cheap', len(texts) - escalated.size)
+        self._count_cascade('escalated', escalated.size)
+        if escalated.size:
+            matrix[escalated] = self._bucketed_matrix([texts[i] for i in escalated], batch_size)
+        return matrix
+    
+    def _bucketed_matrix(self, texts, batch_size):
+        matrix = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        # Sorting by length keeps padding per batch small; rows are scattered back in place
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        for start in range(0, len(texts), batch_size):
+            indices = order[start:start + batch_size]
+            matrix[indices] = self._score_batch_matrix([texts[i] for i in indices])
+        return matrix
+    
+    def _score_batch_matrix(self, texts):
+        """Softmax probabilities for one padded batch, straight from the model logits"""
+        try:
+            if self.emotion_classifier is None:
+                return self._fallback_matrix(texts)
+            if not hasattr(self.emotion_classifier, 'tokenizer'):
+                # Pipelines without a torch model behind them (the stub backend)
+                return self._scores_to_matrix(self._classify_batch(texts))
             
-            # Find the dominant emotion
-            dominant_emotion = max(results, key=lambda x: x['score'])
-            
-            # Calculate intensity
-            intensity = self._calculate_intensity(dominant_emotion['score'])
-            
-            return {
-                'emotion': dominant_emotion['label'],
-                'intensity': intensity,
-                'confidence': dominant_emotion['score']
-            }
+            import torch
+            tokenizer = self.emotion_classifier.tokenizer
+            with get_metrics().timer('classify_batch'):
+                inputs = tokenizer(texts, padding=True, truncation=True, return_tensors='pt')
+                with torch.no_grad():
+                    logits = self.emotion_classifier.model(**inputs).logits
+                return torch.softmax(logits, dim=-1).numpy()
         except Exception as e:
-            print(f"Error in emotion detection: {str(e)}")
-            return self._fallback_emotion_detection(text)
+            print(f"Error in batched emotion detection: {str(e)}")
+            get_metrics().inc('errors', component='emotion_detector')
+            return self._fallback_matrix(texts)
+    
+    def _scores_to_matrix(self, score_dicts):
+        return np.array(
+            [[scores.get(label, 0.0) for label in self.labels] for scores in score_dicts],
+            dtype=np.float32
+        ).reshape(len(score_dicts), len(self.labels))
+    
+    def summarize_scores(self, matrix, top_k=2):
+        """
+        Vectorized emotion_from_scores / get_emotion_context over a score matrix
+        Returns: dict of arrays with emotion, intensity, confidence,
+                 secondary_emotions and secondary_scores (the latter two shaped (n, top_k))
+        """
+        labels = np.asarray(self.labels)
+        ranked = np.argsort(-matrix, axis=1)
+        primary = ranked[:, 0]
+        confidence = matrix[np.arange(len(matrix)), primary]
+        bins = [self.intensity_thresholds['medium'], self.intensity_thresholds['high']]
+        secondary = ranked[:, 1:1 + top_k]
+        return {
+            'emotion': labels[primary],
+            'intensity': INTENSITY_LEVELS[np.digitize(confidence, bins)],
+            'confidence': confidence,
+            'secondary_emotions': labels[secondary],
+            'secondary_scores': np.take_along_axis(matrix, secondary, axis=1)
+        }
+    
+    def emotion_from_scores(self, scores):
+        """
+        Reduce a score distribution to the dominant emotion
+        Returns: dict with emotion, intensity and confidence
+        """
+        # Find the dominant emotion
+        emotion, confidence = max(scores.items(), key=lambda item: item[1])
+        
+        return {
+            'emotion': emotion,
+            'intensity': self._calculate_intensity(confidence),
+            'confidence': confidence
+        }
     
     def _fallback_emotion_detection(self, text):
-        """Simple fallback emotion detection"""
-        text = text.lower()
-        if any(word in text for word in ['happy', 'joy', 'great', 'wonderful', 'excited']):
-            return {'emotion': 'joy', 'intensity': 'medium', 'confidence': 0.5}
-        elif any(word in text for word in ['sad', 'depressed', 'unhappy', 'down']):
-            return {'emotion': 'sadness', 'intensity': 'medium', 'confidence': 0.5}
-        elif any(word in text for word in ['angry', 'mad', 'frustrated', 'upset']):
-            return {'emotion': 'anger', 'intensity': 'medium', 'confidence': 0.5}
-        elif any(word in text for word in ['afraid', 'scared', 'fear', 'worried']):
-            return {'emotion': 'fear', 'intensity': 'medium', 'confidence': 0.5}
-        elif any(word in text for word in ['surprised', 'shocked', 'amazed']):
-            return {'emotion': 'surprise', 'intensity': 'medium', 'confidence': 0.5}
-        elif any(word in text for word in ['love', 'loved', 'loving']):
-            return {'emotion': 'love', 'intensity': 'medium', 'confidence': 0.5}
-        else:
-            return {'emotion': 'joy', 'intensity': 'low', 'confidence': 0.3}
+        """Lexical emotion detection with the keyword engine (see lexicon.py)"""
+        return self.emotion_from_scores(self.lexicon.score(text))
+    
+    def _count_fallbacks(self, n=1):
+        # The lexicon backend scores lexically by design; that is not a fallback
+        if self.backend != 'lexicon':
+            get_metrics().inc('fallbacks', n, component='emotion_detector')
+    
+    def _fallback_scores(self, text):
+        """Score distribution over every label from the keyword engine"""
+        self._count_fallbacks()
+        return self.lexicon.score(text)
+    
+    def _fallback_matrix(self, texts):
+        self._count_fallbacks(len(texts))
+        return self.lexicon.score_matrix(texts)
     
     def _calculate_intensity(self, score):
         """Calculate emotion intensity based on confidence score"""
@@ -88,30 +367,16 @@ class EmotionDetector:
         Get detailed emotion context including secondary emotions
         Returns: dict with primary and secondary emotions
         """
-        try:
-            if self.emotion_classifier is None:
-                # Fallback to simple emotion detection
-                primary = self._fallback_emotion_detection(text)
-                return {
-                    'primary_emotion': primary['emotion'],
-                    'secondary_emotions': [
-                        {'emotion': 'joy', 'score': 0.3},
-                        {'emotion': 'surprise', 'score': 0.2}
-                    ]
-                }
-            
-            results = self.emotion_classifier(text)[0]
-            
-            # Sort emotions by score
-            sorted_emotions = sorted(results, key=lambda x: x['score'], reverse=True)
-            
-            return {
-                'primary_emotion': sorted_emotions[0]['label'],
-                'secondary_emotions': [
-                    {'emotion': e['label'], 'score': e['score']}
-                    for e in sorted_emotions[1:3]
-                ]
-            }
-        except Exception as e:
-            print(f"Error in getting emotion context: {str(e)}")
-            return self._fallback_emotion_detection(text) 
\ No newline at end of file
+        # Served from the same (cached) distribution as detect_emotion, no second inference
+        return self.context_from_scores(self.score_emotions(text))
+    
+    def context_from_scores(self, scores):
+        """Primary and secondary emotions from a score distribution"""
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'primary_emotion': ranked[0][0],
+            'secondary_emotions': [
+                {'emotion': emotion, 'score': score}
+                for emotion, score in ranked[1:3]
+            ]
+        } 
\ No newline at end of file
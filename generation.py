@@ -0,0 +1,329 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+import config
+from metrics import get_metrics
+
+DECODE_MODES = ('sequential', 'concurrent', 'batched')
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """Model size and decoding settings for one latency tier"""
+    name: str
+    model: str
+    base_num_beams: int
+    follow_up_num_beams: int
+    do_sample: bool
+    base_max_length: int
+    base_min_length: int
+    follow_up_max_length: int
+    follow_up_min_length: int
+    # Prior guess of generation seconds per turn, used until real turns are observed
+    expected_seconds: float
+
+    def base_kwargs(self):
+        kwargs = self._decoding_kwargs(self.base_num_beams, self.base_max_length, self.base_min_length)
+        if self.base_num_beams > 1:
+            kwargs['early_stopping'] = True
+        return kwargs
+
+    def follow_up_kwargs(self):
+        return self._decoding_kwargs(
+            self.follow_up_num_beams, self.follow_up_max_length, self.follow_up_min_length
+        )
+
+    def _decoding_kwargs(self, num_beams, max_length, min_length):
+        kwargs = {
+            'max_length': max_length,
+            'min_length': min_length,
+            'num_beams': num_beams,
+            'no_repeat_ngram_size': 2,
+        }
+        if self.do_sample:
+            kwargs.update(do_sample=True, top_p=0.9)
+        return kwargs
+
+
+# Ordered from highest quality to fastest
+PROFILES = {
+    'quality': GenerationProfile('quality', config.CONVERSATION_MODEL, 5, 3, False, 200, 50, 100, 20, 8.0),
+    'balanced': GenerationProfile('balanced', 'google/flan-t5-base', 2, 1, False, 150, 40, 80, 15, 2.5),
+    'fast': GenerationProfile('fast', 'google/flan-t5-small', 1, 1, True, 100, 20, 60, 10, 0.8),
+}
+
+
+class Stopwatch:
+    """Seconds since it was created, minus the time spent inside paused()"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.paused_seconds = 0.0
+        self.discarded = False
+
+    @contextmanager
+    def paused(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.paused_seconds += time.perf_counter() - start
+
+    def elapsed(self):
+        return time.perf_counter() - self.start - self.paused_seconds
+
+    def discard(self):
+        """Keep this generation out of the averages (e.g. a bank hit only generated the follow-up)"""
+        self.discarded = True
+
+
+class ProfileSelector:
+    """
+    Pick the best generation profile that should fit a per-turn latency budget.
+    Predictions come from an exponentially weighted average of recent generation
+    times per profile, inflated by how many generations are already in flight,
+    so a load spike degrades to a faster profile instead of queueing.
+
+    Averages are kept per kind of generation: the decode mode of a whole turn
+    (sequential, concurrent, batched) or 'stream', which decodes greedily, so a
+    fast streamed turn does not make beam search look cheap.
+
+    Only the profile in use gets new observations, so each average decays back
+    towards the profile's expected_seconds with a half-life of half_life seconds:
+    a profile passed over during a spike is tried again once the spike is old.
+    """
+
+    def __init__(self, profiles=None, workers=1, alpha=0.3, half_life=60.0):
+        self.profiles = list((profiles or PROFILES).values())
+        self.workers = max(1, workers)
+        self.alpha = alpha
+        self.half_life = half_life
+        # (profile name, kind) -> (average seconds, perf_counter time of the last observation)
+        self._observed = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def estimated_seconds(self, profile, kind='concurrent'):
+        """Average generation time, decayed towards expected_seconds as it ages"""
+        observed = self._observed.get((profile.name, kind))
+        if observed is None:
+            return profile.expected_seconds
+        seconds, when = observed
+        weight = 0.5 ** ((time.perf_counter() - when) / self.half_life)
+        return weight * seconds + (1 - weight) * profile.expected_seconds
+
+    def predicted_seconds(self, profile, kind='concurrent'):
+        # Generations beyond the worker count wait for a free worker
+        return self.estimated_seconds(profile, kind) * (1 + self._in_flight / self.workers)
+
+    def select(self, latency_budget=None, default='quality', kind='concurrent'):
+        """Highest-quality profile predicted to finish a kind generation within latency_budget seconds"""
+        if latency_budget is None:
+            for profile in self.profiles:
+                if profile.name == default:
+                    return profile
+            return self.profiles[0]
+        for profile in self.profiles:
+            if self.predicted_seconds(profile, kind) <= latency_budget:
+                return profile
+        return self.profiles[-1]
+
+    def observe(self, profile, seconds, kind='concurrent'):
+        """Fold an observed generation time into the running average"""
+        with self._lock:
+            if (profile.name, kind) in self._observed:
+                seconds = self.alpha * seconds + (1 - self.alpha) * self.estimated_seconds(profile, kind)
+            self._observed[(profile.name, kind)] = (seconds, time.perf_counter())
+
+    @contextmanager
+    def track(self, profile, kind='concurrent'):
+        """
+        Count a generation as in flight and record its duration. Yields a Stopwatch:
+        streaming callers wrap each yield to their consumer in stopwatch.paused() so
+        time spent suspended is not counted as generation time, and stopwatch.discard()
+        leaves a generation that is not comparable out of the average.
+        """
+        with self._lock:
+            self._in_flight += 1
+        stopwatch = Stopwatch()
+        try:
+            yield stopwatch
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            if not stopwatch.discarded:
+                self.observe(profile, stopwatch.elapsed(), kind)
+
+    def snapshot(self):
+        return {
+            'in_flight': self._in_flight,
+            'observed_seconds': {
+                f'{profile.name}/{kind}': self.estimated_seconds(profile, kind)
+                for profile in self.profiles
+                for name, kind in list(self._observed) if name == profile.name
+            },
+        }
+
+
+def generation_request(name, prompt, fallback, **kwargs):
+    """Describe one generation: the prompt, its own decoding limits and a fallback text"""
+    return {'name': name, 'prompt': prompt, 'fallback': fallback, 'kwargs': kwargs}
+
+
+def _generate_one(conversation_pipeline, request, timings):
+    start = time.perf_counter()
+    try:
+        return conversation_pipeline(request['prompt'], **request['kwargs'])[0]['generated_text']
+    except Exception as e:
+        print(f"Error in {request['name']}: {str(e)}")
+        get_metrics().inc('errors', component='generation')
+        get_metrics().inc('fallbacks', component='generation')
+        return request['fallback']
+    finally:
+        elapsed = time.perf_counter() - start
+        get_metrics().observe(request['name'], elapsed)
+        if timings is not None:
+            timings[request['name']] = elapsed
+
+
+def _merged_kwargs(requests):
+    """
+    Decoding settings one batched call can share: the widest limits and the most beams.
+    min_length is the smallest asked for, since it cannot be cut back per prompt afterwards.
+    """
+    merged = {}
+    for request in requests:
+        for key, value in request['kwargs'].items():
+            if key == 'min_length':
+                merged[key] = min(merged.get(key, value), value)
+            elif key in ('max_length', 'num_beams'):
+                merged[key] = max(merged.get(key, value), value)
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+
+def _truncate_tokens(conversation_pipeline, text, max_length):
+    """Cut a generation back to its own max_length after a shared batched call"""
+    tokenizer = getattr(conversation_pipeline, 'tokenizer', None)
+    if tokenizer is None:
+        # Pipelines without a tokenizer (the stub backend) count words as tokens
+        words = text.split()
+        return text if len(words) <= max_length else ' '.join(words[:max_length])
+    ids = tokenizer(text, add_special_tokens=False)['input_ids']
+    if len(ids) <= max_length:
+        return text
+    return tokenizer.decode(ids[:max_length], skip_special_tokens=True)
+
+
+def _generate_batched(conversation_pipeline, requests, timings):
+    start = time.perf_counter()
+    try:
+        outputs = conversation_pipeline(
+            [request['prompt'] for request in requests],
+            batch_size=len(requests),
+            **_merged_kwargs(requests)
+        )
+        texts = []
+        for request, output in zip(requests, outputs):
+            # The pipeline returns one list per input when given a list of prompts
+            text = (output[0] if isinstance(output, list) else output)['generated_text']
+            if 'max_length' in request['kwargs']:
+                text = _truncate_tokens(conversation_pipeline, text, request['kwargs']['max_length'])
+            texts.append(text)
+    except Exception as e:
+        print(f"Error in batched generation: {str(e)}")
+        get_metrics().inc('errors', component='generation')
+        return [_generate_one(conversation_pipeline, request, timings) for request in requests]
+    elapsed = time.perf_counter() - start
+    get_metrics().observe('generate_batched', elapsed)
+    if timings is not None:
+        for request in requests:
+            timings[request['name']] = elapsed
+    return texts
+
+
+def generate_many(conversation_pipeline, requests, mode='concurrent', executor=None, timings=None):
+    """
+    Run several generation requests against one text2text pipeline.
+        sequential: one call after another
+        concurrent: one call per request on the executor, all in flight at once
+        batched:    a single padded call; per-prompt max_length is enforced afterwards,
+                    but the call uses the smallest min_length, so a prompt with a larger
+                    one (the base response's 50) may come back shorter than it asks for
+    Returns: list of generated texts in request order
+    """
+    if not requests:
+        return []
+    if conversation_pipeline is None:
+        get_metrics().inc('fallbacks', len(requests), component='generation')
+        return [request['fallback'] for request in requests]
+    if len(requests) == 1 or mode == 'sequential':
+        return [_generate_one(conversation_pipeline, request, timings) for request in requests]
+    if mode == 'batched':
+        return _generate_batched(conversation_pipeline, requests, timings)
+    if executor is None:
+        raise ValueError("concurrent decoding needs an executor")
+    futures = [
+        executor.submit(_generate_one, conversation_pipeline, request, timings)
+        for request in requests
+    ]
+    return [future.result() for future in futures]
+
+
+def stream_generate(conversation_pipeline, request, timeout=60, stream=None):
+    """
+    Decode a single request and yield text pieces as tokens are produced.
+    stream(conversation_pipeline, request, timeout) does the decoding; it defaults
+    to transformers_stream, and backends.stream_function() picks it per backend.
+    Yields: text chunks
+    """
+    if conversation_pipeline is None:
+        get_metrics().inc('fallbacks', component='generation')
+        yield request['fallback']
+        return
+    yield from (stream or transformers_stream)(conversation_pipeline, request, timeout)
+
+
+def transformers_stream(conversation_pipeline, request, timeout=60):
+    """
+    Stream a transformers text2text pipeline through TextIteratorStreamer.
+    Streaming decodes greedily (num_beams=1): beam search only knows its best
+    hypothesis once decoding has finished.
+    """
+    from transformers import TextIteratorStreamer
+
+    tokenizer = conversation_pipeline.tokenizer
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout)
+    inputs = tokenizer(request['prompt'], return_tensors='pt', truncation=True)
+    kwargs = dict(request['kwargs'], num_beams=1, streamer=streamer)
+    kwargs.pop('early_stopping', None)
+    errors = []
+
+    def run():
+        try:
+            conversation_pipeline.model.generate(**inputs, **kwargs)
+        except Exception as e:
+            errors.append(e)
+            # Unblock the consumer; generate() never reached its own end-of-stream
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="stream-generate", daemon=True)
+    thread.start()
+    produced = False
+    for text in streamer:
+        if text:
+            produced = True
+            yield text
+    thread.join()
+    if errors:
+        print(f"Error in {request['name']}: {str(errors[0])}")
+        get_metrics().inc('errors', component='generation')
+        if not produced:
+            get_metrics().inc('fallbacks', component='generation')
+            yield request['fallback']
@@ -0,0 +1,198 @@
+"""
+Keyword lexicon engine behind the lexical emotion detector.
+
+Text is tokenized once with a compiled pattern and every token (or multi-word
+phrase starting at it) is resolved with a dict lookup, so scoring is a single
+linear pass. Negators ("not", "never", "don't") and intensifiers ("very",
+"slightly") modify the emotion words that follow them within the same clause.
+A negated verb of stopping ("can't stop", "couldn't help") means the opposite of
+a negation, that the feeling goes on, so it intensifies instead.
+The result is a normalized score over every emotion, like the model's output.
+"""
+import re
+import numpy as np
+
+# Written from general emotion vocabulary. data/emotion_eval.jsonl is the held-out
+# evaluation set: do not add words or phrases taken from it.
+LEXICON_LABELS = ['anger', 'disgust', 'fear', 'joy', 'neutral', 'sadness', 'surprise']
+
+EMOTION_LEXICON = {
+    'anger': {
+        'angry': 1.0, 'anger': 1.0, 'mad': 0.8, 'furious': 1.5, 'livid': 1.5, 'rage': 1.5,
+        'enraged': 1.5, 'outraged': 1.3, 'irritated': 0.8, 'irritating': 0.8, 'annoyed': 0.8,
+        'annoying': 0.8, 'frustrated': 1.0, 'frustrating': 1.0, 'pissed': 1.2, 'hate': 1.2,
+        'resent': 1.0, 'unfair': 0.7, 'rude': 0.7, 'fed up': 1.0, 'how dare': 1.3,
+        'upset': 0.7, 'lied': 0.6,
+    },
+    'disgust': {
+        'disgust': 1.5, 'disgusted': 1.5, 'disgusting': 1.5, 'gross': 1.2, 'grossed out': 1.5,
+        'revolting': 1.5, 'repulsive': 1.5, 'nasty': 1.0, 'filthy': 1.2, 'vile': 1.3, 'yuck': 1.2,
+        'ugh': 0.8, 'sickening': 1.3, 'nauseating': 1.3, 'creepy': 0.7, 'stinks': 1.0,
+    },
+    'fear': {
+        'afraid': 1.2, 'scared': 1.2, 'fear': 1.0, 'frightened': 1.3, 'frightens': 1.3,
+        'terrified': 1.6, 'terrifying': 1.5, 'anxious': 1.1, 'anxiety': 1.1, 'worried': 1.0,
+        'worry': 0.9, 'nervous': 1.0, 'panic': 1.3, 'panicking': 1.3, 'dread': 1.2, 'uneasy': 0.8,
+        'what if': 0.8, 'threatened': 1.0,
+    },
+    'joy': {
+        'happy': 1.0, 'glad': 0.9, 'joy': 1.2, 'joyful': 1.2, 'great': 0.7, 'wonderful': 1.1,
+        'amazing': 1.0, 'awesome': 1.0, 'excited': 1.2, 'exciting': 1.0, 'thrilled': 1.4,
+        'delighted': 1.3, 'love': 1.0, 'loved': 1.0, 'loving': 0.9, 'smiling': 0.9, 'smile': 0.8,
+        'best': 0.8, 'proud': 0.9, 'grateful': 1.0, 'thankful': 1.0, 'fantastic': 1.2, 'yay': 1.2,
+        'celebrate': 1.0, 'fun': 0.8, 'enjoy': 0.9, 'enjoyed': 0.9,
+    },
+    'sadness': {
+        'sad': 1.2, 'unhappy': 1.2, 'depressed': 1.4, 'down': 0.6, 'lonely': 1.2, 'alone': 0.5,
+        'crying': 1.3, 'cry': 1.1, 'cried': 1.1, 'tears': 1.0, 'miss': 0.9, 'missing': 0.7,
+        'grief': 1.4, 'grieving': 1.4, 'heartbroken': 1.5, 'hopeless': 1.4, 'empty': 0.9,
+        'hurts': 0.9, 'died': 1.0, 'passed away': 1.2, 'lost': 0.7, 'failed': 0.8, 'miserable': 1.4,
+        'disappointed': 1.0, 'gloomy': 1.0,
+    },
+    'surprise': {
+        'wow': 1.2, 'whoa': 1.2, 'surprised': 1.3, 'surprise': 1.1, 'surprising': 1.1,
+        'shocked': 1.2, 'shocking': 1.1, 'amazed': 1.1, 'astonished': 1.4, 'unexpected': 1.1,
+        'never expected': 1.3, "didn't expect": 1.3, "did not expect": 1.3, "can't believe": 1.1,
+        'no way': 1.2, 'suddenly': 0.6, 'out of nowhere': 1.0,
+    },
+    'neutral': {
+        'ok': 0.8, 'okay': 0.8, 'fine': 0.5,
+    },
+}
+
+# Besides these, any "...n't" contraction negates
+NEGATORS = {'not', 'no', 'never', 'cannot', 'without', 'hardly', 'barely', 'nor', 'neither', 'nobody', 'nothing'}
+INTENSIFIERS = {
+    'very': 1.5, 'really': 1.4, 'so': 1.4, 'extremely': 1.8, 'incredibly': 1.8, 'totally': 1.5,
+    'completely': 1.5, 'absolutely': 1.6, 'super': 1.5, 'too': 1.3, 'deeply': 1.6, 'truly': 1.4,
+    'slightly': 0.5, 'somewhat': 0.6, 'a bit': 0.6, 'a little': 0.6, 'kind of': 0.7, 'kinda': 0.7,
+}
+# Negating one of these says the following feeling continues: "can't stop crying",
+# "couldn't help laughing", "won't quit smiling"
+CONTINUATION_VERBS = {'stop', 'stopping', 'quit', 'help'}
+CONTINUATION_BOOST = 1.5
+# Tokens that end the scope of a negation or intensifier
+CLAUSE_BREAKS = {'.', ',', '!', '?', ';', ':', 'but', 'though', 'although', 'however'}
+# Where a negated emotion's weight goes ("not happy" reads as sadness); otherwise to neutral
+NEGATION_TARGETS = {'joy': 'sadness'}
+NEGATED_WEIGHT = 0.8
+
+NEGATION_WINDOW = 3
+INTENSIFIER_WINDOW = 2
+# Prior mass of neutral and of every other label, so texts without cues come out neutral
+NEUTRAL_PRIOR = 0.5
+LABEL_PRIOR = 0.05
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.,!?;:]")
+
+
+def _tokens(text):
+    return _TOKEN.findall(text.lower().replace("\u2019", "'"))
+
+
+class LexiconEngine:
+    """
+    Compiled emotion lexicon. Entries are (possibly multi-word) phrases with a weight;
+    lookup is keyed by the first token with the longest phrase tried first.
+    """
+
+    def __init__(self, lexicon=None, labels=None):
+        lexicon = lexicon or EMOTION_LEXICON
+        self.labels = list(labels or LEXICON_LABELS)
+        self._index = {label: i for i, label in enumerate(self.labels)}
+        self._neutral = self._index.get('neutral')
+        self._prior = np.full(len(self.labels), LABEL_PRIOR)
+        if self._neutral is not None:
+            self._prior[self._neutral] = NEUTRAL_PRIOR
+
+        # first token -> [(phrase tokens, kind, payload)], longest phrase first
+        self._entries = {}
+        for label, words in lexicon.items():
+            if label not in self._index:
+                continue
+            for phrase, weight in words.items():
+                self._add(phrase, 'emotion', (self._index[label], weight))
+        for phrase, factor in INTENSIFIERS.items():
+            self._add(phrase, 'intensifier', factor)
+        for phrase in NEGATORS:
+            self._add(phrase, 'negator', None)
+        for entries in self._entries.values():
+            entries.sort(key=lambda entry: -len(entry[0]))
+
+    def _add(self, phrase, kind, payload):
+        tokens = tuple(_tokens(phrase))
+        self._entries.setdefault(tokens[0], []).append((tokens, kind, payload))
+
+    def _match(self, tokens, i):
+        entries = self._entries.get(tokens[i])
+        if entries is None:
+            return None
+        for phrase, kind, payload in entries:
+            if tuple(tokens[i:i + len(phrase)]) == phrase:
+                return phrase, kind, payload
+        return None
+
+    def raw_scores(self, text):
+        """Accumulated (unnormalized) evidence per label, as a numpy vector"""
+        scores = np.zeros(len(self.labels))
+        tokens = _tokens(text)
+        negated_until = -1
+        boost, boosted_until = 1.0, -1
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token in CLAUSE_BREAKS:
+                negated_until = boosted_until = -1
+                i += 1
+                continue
+            match = self._match(tokens, i)
+            if match is None:
+                if token.endswith("n't"):
+                    match = ((token,), 'negator', None)
+                else:
+                    i += 1
+                    continue
+            phrase, kind, payload = match
+            end = i + len(phrase)
+            if kind == 'negator' and end < len(tokens) and tokens[end] in CONTINUATION_VERBS:
+                boost = CONTINUATION_BOOST
+                boosted_until = end + INTENSIFIER_WINDOW
+                end += 1
+            elif kind == 'negator':
+                negated_until = end - 1 + NEGATION_WINDOW
+            elif kind == 'intensifier':
+                # Stacked intensifiers ("really, really") compound
+                boost = boost * payload if boosted_until >= i else payload
+                boosted_until = end - 1 + INTENSIFIER_WINDOW
+            else:
+                index, weight = payload
+                if boosted_until >= i:
+                    weight *= boost
+                if negated_until >= i:
+                    target = self._index.get(NEGATION_TARGETS.get(self.labels[index]), self._neutral)
+                    if target is not None:
+                        scores[target] += NEGATED_WEIGHT * weight
+                else:
+                    scores[index] += weight
+            i = end
+        return scores
+
+    def normalize(self, raw):
+        """Turn raw evidence (a vector, or a matrix with one row per text) into scores summing to 1"""
+        scores = raw + self._prior
+        return scores / scores.sum(axis=-1, keepdims=True)
+
+    def score_vector(self, text):
+        """Normalized scores in self.labels order"""
+        return self.normalize(self.raw_scores(text))
+
+    def score(self, text):
+        """Returns: dict mapping every label to its normalized score"""
+        return dict(zip(self.labels, self.score_vector(text).tolist()))
+
+    def score_matrix(self, texts):
+        """Returns: numpy array of shape (len(texts), len(self.labels))"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        return self.normalize(np.array([self.raw_scores(text) for text in texts])).astype(np.float32)
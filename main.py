@@ -1,5 +1,7 @@
 from chatbot import EmotionAwareChatbot
+import argparse
 import sys
+import config
 
 def print_welcome():
     print("\n=== Emotion-Aware Chatbot ===")
@@ -7,13 +9,53 @@ def print_welcome():
     print("Type 'quit' to exit, 'summary' to see your emotional summary")
     print("===========================\n")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Emotion-Aware Chatbot")
+    parser.add_argument("--score-corpus", metavar="INPUT",
+                        help="score a JSONL/CSV corpus instead of chatting ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="JSONL/CSV output path for --score-corpus")
+    parser.add_argument("--text-field", default="text", help="field holding the text to score")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--top-k", type=int, default=2, help="number of secondary emotions")
+    parser.add_argument("--scores", action="store_true", help="include the full score distribution")
+    parser.add_argument("--speak", action="store_true", help="read replies out loud in the background")
+    return parser.parse_args()
+
+def run_corpus_scoring(args):
+    from corpus import score_corpus
+    from registry import get_registry
+    detector = get_registry().get_emotion_detector()
+    written = score_corpus(
+        detector, args.score_corpus, args.output,
+        text_field=args.text_field,
+        batch_size=args.batch_size,
+        top_k=args.top_k,
+        include_scores=args.scores
+    )
+    print(f"Scored {written} records", file=sys.stderr)
+
 def main():
-    chatbot = EmotionAwareChatbot()
+    args = parse_args()
+    if args.score_corpus:
+        run_corpus_scoring(args)
+        return
+    
+    # Models warm up in the background while the user types the first message
+    warmup = None
+    if config.WARMUP:
+        from registry import get_registry
+        warmup = get_registry().warm_up()
+    chatbot = None
     print_welcome()
     
     while True:
         try:
             user_input = input("You: ").strip()
+            if chatbot is None and user_input.lower() != 'quit':
+                if warmup is not None and not warmup.done:
+                    print(f"(warming up the models: {warmup.status()['stage']}...)", flush=True)
+                    warmup.wait()
+                chatbot = EmotionAwareChatbot()
             
             if user_input.lower() == 'quit':
                 print("\nGoodbye! Take care!")
@@ -24,14 +66,23 @@ def main():
                 print(f"Current Mood: {summary['current_mood']}")
                 print(f"Emotional Trend: {summary['emotional_trend']}")
                 print(f"Recent Moods: {', '.join(summary['recent_moods'])}")
+                print(f"Dominant Mood: {summary['dominant_mood']}")
+                print(f"Mood Volatility: {summary['volatility']:.2f}")
                 print()
                 continue
             
             if not user_input:
                 continue
             
-            response = chatbot.generate_response(user_input)
-            print(f"Bot: {response}\n")
+            # Print the reply as it is decoded instead of waiting for the whole turn
+            chatbot.stop_speaking()
+            print("Bot: ", end="", flush=True)
+            stream = chatbot.stream_turn(user_input)
+            for chunk in stream:
+                print(chunk, end="", flush=True)
+            print("\n")
+            if args.speak and stream.result.response:
+                chatbot.speak_response(stream.result.response)
             
         except KeyboardInterrupt:
             print("\nGoodbye! Take care!")
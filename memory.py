@@ -1,20 +1,98 @@
 from collections import deque
 import time
-import speech_recognition as sr
+
+class EmotionStats:
+    """
+    Running emotional statistics, updated in constant time per turn:
+    a ring buffer of recent moods with per-emotion counts for that window,
+    all-time counts, an exponentially weighted average of the full score
+    vectors and a volatility / mood-shift signal.
+    """
+    def __init__(self, window=10, alpha=0.3, shift_threshold=0.5):
+        self.window = deque(maxlen=window)
+        self.window_counts = {}
+        self.counts = {}
+        self.total = 0
+        self.alpha = alpha
+        self.shift_threshold = shift_threshold
+        self.ewma_scores = {}
+        self.volatility = 0.0
+        self.last_shift = 0.0
+    
+    def update(self, emotion, scores=None):
+        """Fold one turn into the statistics"""
+        # Window counts: account for the mood the ring buffer is about to evict
+        if len(self.window) == self.window.maxlen:
+            evicted = self.window[0]
+            self.window_counts[evicted] -= 1
+            if not self.window_counts[evicted]:
+                del self.window_counts[evicted]
+        self.window.append(emotion)
+        self.window_counts[emotion] = self.window_counts.get(emotion, 0) + 1
+        self.counts[emotion] = self.counts.get(emotion, 0) + 1
+        self.total += 1
+        
+        scores = scores or {emotion: 1.0}
+        if not self.ewma_scores:
+            self.ewma_scores = dict(scores)
+            return
+        # Total-variation distance between this turn and the running average
+        labels = set(self.ewma_scores) | set(scores)
+        shift = 0.0
+        for label in labels:
+            previous = self.ewma_scores.get(label, 0.0)
+            current = scores.get(label, 0.0)
+            shift += abs(current - previous)
+            self.ewma_scores[label] = self.alpha * current + (1 - self.alpha) * previous
+        self.last_shift = shift / 2
+        self.volatility = self.alpha * self.last_shift + (1 - self.alpha) * self.volatility
+    
+    @property
+    def mood_shift(self):
+        """True when the latest turn departs sharply from the running average"""
+        return self.last_shift >= self.shift_threshold
+    
+    def recent(self, n=3):
+        """The n most recent moods, oldest first"""
+        n = min(n, len(self.window))
+        return [self.window[i] for i in range(-n, 0)]
+    
+    def dominant(self):
+        """Emotion with the highest running average score"""
+        if not self.ewma_scores:
+            return None
+        return max(self.ewma_scores.items(), key=lambda item: item[1])[0]
+    
+    def percentages(self):
+        """All-time share of each emotion, in percent"""
+        if not self.total:
+            return {}
+        return {emotion: count * 100 / self.total for emotion, count in self.counts.items()}
 
 class EmotionalMemory:
     def __init__(self, max_history=10):
         self.max_history = max_history
         self.conversation_history = deque(maxlen=max_history)
+        self.stats = EmotionStats(window=max_history)
         self.emotional_context = {
             'current_mood': None,
-            'mood_history': [],
+            # Ring buffer owned by self.stats
+            'mood_history': self.stats.window,
             'emotional_trend': None
         }
-        self.recognizer = sr.Recognizer()
+        self._recognizer = None
+    
+    @property
+    def recognizer(self):
+        # speech_recognition is only loaded when speech input is actually used
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
     
     def get_speech_input(self, language='en-US'):
         """Get input from speech"""
+        import speech_recognition as sr
         try:
             with sr.Microphone() as source:
                 print("Listening...")
@@ -26,8 +104,8 @@ class EmotionalMemory:
         except sr.RequestError:
             return "Could not request results"
     
-    def add_interaction(self, user_input, emotion_data, bot_response):
-        """Add a new interaction to the memory"""
+    def add_interaction(self, user_input, emotion_data, bot_response, scores=None):
+        """Add a new interaction to the memory; scores is the full emotion distribution if known"""
         interaction = {
             'timestamp': time.time(),
             'user_input': user_input,
@@ -36,30 +114,24 @@ class EmotionalMemory:
         }
         
         self.conversation_history.append(interaction)
-        self._update_emotional_context(emotion_data)
+        self._update_emotional_context(emotion_data, scores)
     
-    def _update_emotional_context(self, emotion_data):
+    def _update_emotional_context(self, emotion_data, scores=None):
         """Update the emotional context based on new emotion data"""
-        self.emotional_context['current_mood'] = emotion_data['emotion']
-        self.emotional_context['mood_history'].append(emotion_data['emotion'])
-        
-        # Keep only recent mood history
-        if len(self.emotional_context['mood_history']) > self.max_history:
-            self.emotional_context['mood_history'] = self.emotional_context['mood_history'][-self.max_history:]
+        emotion = emotion_data['emotion']
+        if scores is None and emotion is not None:
+            scores = {emotion: emotion_data.get('confidence') or 1.0}
+        self.emotional_context['current_mood'] = emotion
+        self.stats.update(emotion, scores)
         
         # Calculate emotional trend
         self._calculate_emotional_trend()
     
     def _calculate_emotional_trend(self):
         """Calculate the emotional trend based on recent history"""
-        if len(self.emotional_context['mood_history']) < 2:
-            self.emotional_context['emotional_trend'] = 'stable'
-            return
-        
-        recent_moods = self.emotional_context['mood_history'][-3:]
-        if all(mood == recent_moods[0] for mood in recent_moods):
-            self.emotional_context['emotional_trend'] = 'stable'
-        elif recent_moods[-1] == recent_moods[-2]:
+        history = self.stats.window
+        # Stable unless the two latest moods differ (equivalent to the old three-mood rule)
+        if len(history) < 2 or history[-1] == history[-2]:
             self.emotional_context['emotional_trend'] = 'stable'
         else:
             self.emotional_context['emotional_trend'] = 'changing'
@@ -73,5 +145,9 @@ class EmotionalMemory:
         return {
             'current_mood': self.emotional_context['current_mood'],
             'emotional_trend': self.emotional_context['emotional_trend'],
-            'recent_moods': self.emotional_context['mood_history'][-3:]
+            'recent_moods': self.stats.recent(3),
+            'dominant_mood': self.stats.dominant(),
+            'emotion_counts': dict(self.stats.counts),
+            'volatility': self.stats.volatility,
+            'mood_shift': self.stats.mood_shift
         }
\ No newline at end of file
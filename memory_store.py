@@ -0,0 +1,217 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from memory import EmotionalMemory
+from metrics import get_metrics
+
+# Turns replayed to rebuild the running statistics of a user. Their averages weigh
+# a turn n steps back by 0.7 ** n, so older turns change nothing measurable.
+REPLAY_TURNS = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    user_input TEXT,
+    emotion TEXT,
+    emotion_data TEXT,
+    bot_response TEXT,
+    scores TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_user ON interactions (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_interactions_session ON interactions (user_id, session_id, id);
+"""
+
+
+class SQLiteMemoryStore:
+    """
+    Append-only interaction log in SQLite (WAL mode) keyed by user and session.
+    Writes are buffered and committed in batches of batch_size, and a background
+    thread commits whatever is pending every flush_interval seconds, so other worker
+    processes see a turn within that delay. Reads flush pending writes first, so a
+    process always sees its own interactions. A failed flush (say, the database is
+    locked by another process) keeps its rows queued and retries them.
+    """
+
+    def __init__(self, path, batch_size=32, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            # WAL lets readers in other worker processes proceed while this one writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._closed = threading.Event()
+        self._conn.executescript(SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(interactions)")}
+        if 'scores' not in columns:
+            # Stores created before score vectors were kept
+            self._conn.execute("ALTER TABLE interactions ADD COLUMN scores TEXT")
+        self._flusher = threading.Thread(target=self._flush_periodically, name='memory-flush', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def append(self, user_id, session_id, interaction, scores=None):
+        """Queue one interaction (as stored by EmotionalMemory) and its score distribution for writing"""
+        emotion_data = interaction['emotion'] or {}
+        row = (
+            user_id,
+            session_id,
+            interaction['timestamp'],
+            interaction['user_input'],
+            emotion_data.get('emotion'),
+            json.dumps(emotion_data),
+            interaction['bot_response'],
+            json.dumps(scores) if scores is not None else None
+        )
+        with self._lock:
+            self._pending.append(row)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if len(self._pending) >= self.batch_size or due:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            if self._conn is not None:
+                self._flush_locked()
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if self._conn is not None and self._pending:
+                    self._flush_locked()
+
+    def _flush_locked(self):
+        """
+        Write the pending rows in one transaction. Errors are logged, not raised: the
+        rows go back to the front of the queue and are retried on the next flush.
+        Returns: True if nothing is left pending
+        """
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return True
+        rows, self._pending = self._pending, []
+        try:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO interactions (user_id, session_id, timestamp, user_input, emotion, "
+                    "emotion_data, bot_response, scores) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # e.g. "database is locked" while another worker process writes
+            self._pending[:0] = rows
+            print(f"Error flushing emotional memory: {e}")
+            get_metrics().inc('errors', component='memory')
+            return False
+        return True
+
+    def recent_interactions(self, user_id, n=10, session_id=None):
+        """Last n interactions of a user (optionally one session), oldest first"""
+        with self._lock:
+            self._flush_locked()
+            if session_id is None:
+                cursor = self._conn.execute(
+                    "SELECT timestamp, user_input, emotion_data, bot_response, scores FROM interactions "
+                    "WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                    (user_id, n)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "SELECT timestamp, user_input, emotion_data, bot_response, scores FROM interactions "
+                    "WHERE user_id = ? AND session_id = ? ORDER BY id DESC LIMIT ?",
+                    (user_id, session_id, n)
+                )
+            rows = cursor.fetchall()
+        return [
+            {
+                'timestamp': timestamp,
+                'user_input': user_input,
+                'emotion': json.loads(emotion_data) if emotion_data else None,
+                'bot_response': bot_response,
+                'scores': json.loads(scores) if scores else None
+            }
+            for timestamp, user_input, emotion_data, bot_response, scores in reversed(rows)
+        ]
+
+    def mood_history(self, user_id, n=10):
+        """Last n emotion labels of a user across all sessions, oldest first"""
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT emotion FROM interactions WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                (user_id, n)
+            ).fetchall()
+        return [emotion for (emotion,) in reversed(rows)]
+
+    def emotion_counts(self, user_id):
+        """All-time number of interactions per emotion label of a user"""
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(
+                "SELECT emotion, COUNT(*) FROM interactions WHERE user_id = ? GROUP BY emotion",
+                (user_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            if self._conn is None:
+                return
+            if not self._flush_locked():
+                print(f"Emotional memory closed with {len(self._pending)} interactions unwritten")
+            self._conn.close()
+            self._conn = None
+
+
+class PersistentEmotionalMemory(EmotionalMemory):
+    """
+    EmotionalMemory that survives restarts and follows a user across worker processes.
+    On creation it is rebuilt from the user's stored history, score vectors included;
+    every new interaction is also appended to the store. get_emotional_summary then
+    behaves as in memory.
+    """
+
+    def __init__(self, store, user_id, session_id, max_history=10):
+        super().__init__(max_history=max_history)
+        self.store = store
+        self.user_id = user_id
+        self.session_id = session_id
+        for interaction in store.recent_interactions(user_id, n=max(max_history, REPLAY_TURNS)):
+            # Replay through the base class so the emotional context is rebuilt, not re-stored
+            EmotionalMemory.add_interaction(
+                self, interaction['user_input'], interaction['emotion'] or {'emotion': None},
+                interaction['bot_response'], interaction['scores']
+            )
+            self.conversation_history[-1]['timestamp'] = interaction['timestamp']
+        if self.stats.total:
+            # All-time counts cover turns older than the replayed ones too
+            self.stats.counts = store.emotion_counts(user_id)
+            self.stats.total = sum(self.stats.counts.values())
+
+    def add_interaction(self, user_input, emotion_data, bot_response, scores=None):
+        super().add_interaction(user_input, emotion_data, bot_response, scores)
+        try:
+            self.store.append(self.user_id, self.session_id, self.conversation_history[-1], scores)
+        except Exception as e:
+            # The reply is already generated; losing its persisted copy must not fail the turn
+            print(f"Error storing emotional memory: {e}")
+            get_metrics().inc('errors', component='memory')
+
+    def flush(self):
+        """Write this process's pending interactions now (e.g. when the session ends)"""
+        self.store.flush()
@@ -0,0 +1,163 @@
+"""
+Process-wide stage timers and event counters for the turn pipeline.
+
+    with get_metrics().timer('translate_input'):
+        ...
+    get_metrics().inc('errors', component='translation')
+
+Read them back with get_metrics().snapshot() (a dict) or get_metrics().prometheus()
+(Prometheus text exposition format, served by server.py at /metrics).
+With EMOTION_BOT_METRICS=0 timers and counters are no-ops.
+"""
+import threading
+import time
+from contextlib import nullcontext
+import config
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'stage', 'start')
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Latency histograms per stage and labelled counters, safe to update from any thread"""
+
+    def __init__(self, enabled=True, buckets=LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+
+    def timer(self, stage):
+        """Context manager recording the duration of the block under stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                # [count, sum, max, per-bucket counts (last one is +Inf)]
+                entry = self._stages[stage] = [0, 0.0, 0.0, [0] * (len(self.buckets) + 1)]
+            entry[0] += 1
+            entry[1] += seconds
+            if seconds > entry[2]:
+                entry[2] = seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    break
+            else:
+                i = len(self.buckets)
+            entry[3][i] += 1
+
+    def inc(self, name, amount=1, **labels):
+        """Add to the counter name{labels}"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def _quantile(self, buckets, count, q):
+        """Upper bound of the histogram bucket holding the q-quantile"""
+        rank = q * count
+        seen = 0
+        for bound, n in zip(self.buckets, buckets):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def snapshot(self):
+        """
+        Returns: {'stages': {stage: {count, total_s, mean_ms, max_ms, p50_ms, p95_ms}},
+                  'counters': {'name{label="value"}': value}}
+        """
+        with self._lock:
+            stages = {stage: (count, total, peak, list(buckets))
+                      for stage, (count, total, peak, buckets) in self._stages.items()}
+            counters = dict(self._counters)
+        return {
+            'stages': {
+                stage: {
+                    'count': count,
+                    'total_s': total,
+                    'mean_ms': total / count * 1000 if count else 0.0,
+                    'max_ms': peak * 1000,
+                    'p50_ms': min(self._quantile(buckets, count, 0.5), peak) * 1000,
+                    'p95_ms': min(self._quantile(buckets, count, 0.95), peak) * 1000,
+                }
+                for stage, (count, total, peak, buckets) in sorted(stages.items())
+            },
+            'counters': {
+                _series(name, labels): value for (name, labels), value in sorted(counters.items())
+            },
+        }
+
+    def prometheus(self, prefix='emotion_bot'):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            stages = {stage: (count, total, list(buckets))
+                      for stage, (count, total, _, buckets) in self._stages.items()}
+            counters = dict(self._counters)
+        histogram = f'{prefix}_stage_seconds'
+        lines = [
+            f'# HELP {histogram} Duration of turn pipeline stages',
+            f'# TYPE {histogram} histogram',
+        ]
+        for stage, (count, total, buckets) in sorted(stages.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), buckets):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{histogram}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{histogram}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{histogram}_count{{stage="{stage}"}} {count}')
+        declared = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f'{prefix}_{name}_total'
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{_series(metric, labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+_metrics = Metrics(enabled=config.METRICS_ENABLED)
+
+
+def get_metrics():
+    """Return the metrics shared by the whole process"""
+    return _metrics
@@ -0,0 +1,179 @@
+import threading
+import config
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the heavy inference engines.
+    Models are loaded once, on first use, and shared by every session.
+    """
+
+    def __init__(self, emotion_model=None, conversation_model=None, emotion_batching=None,
+                 emotion_backend=None, conversation_backend=None):
+        self.emotion_model = emotion_model or config.EMOTION_MODEL
+        self.conversation_model = conversation_model or config.CONVERSATION_MODEL
+        self.emotion_backend = emotion_backend or config.EMOTION_BACKEND
+        self.conversation_backend = conversation_backend or config.CONVERSATION_BACKEND
+        self.emotion_batching = config.EMOTION_BATCHING if emotion_batching is None else emotion_batching
+        self._lock = threading.RLock()
+        self._resources = {}
+        self._warmup = None
+        # Separate from _lock, which the warm-up thread holds while a model loads
+        self._warmup_lock = threading.Lock()
+
+    def _get_or_create(self, key, factory):
+        """Return the cached resource for key, building it exactly once"""
+        try:
+            return self._resources[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._resources:
+                self._resources[key] = factory()
+            return self._resources[key]
+
+    def get_emotion_detector(self):
+        """Shared EmotionDetector (the classifier holds no per-session state)"""
+        return self._get_or_create("emotion_detector", self._load_emotion_detector)
+
+    def get_conversation_pipeline(self, model=None):
+        """Shared text2text-generation pipeline for model, or None if it failed to load"""
+        model = model or self.conversation_model
+        if model == self.conversation_model:
+            return self._get_or_create("conversation_pipeline", self._load_conversation_pipeline)
+        return self._get_or_create(
+            f"conversation_pipeline:{model}", lambda: self._load_conversation_pipeline(model)
+        )
+
+    def get_stream_function(self):
+        """How to stream tokens from the conversation pipelines (see generation.stream_generate)"""
+        from backends import stream_function
+        return stream_function(self.conversation_backend)
+
+    def get_translation_service(self):
+        """Shared translation service with its phrase cache"""
+        return self._get_or_create("translation_service", self._create_translation_service)
+
+    def get_memory_store(self):
+        """Shared SQLite memory store, or None when persistence is not configured"""
+        return self._get_or_create("memory_store", self._open_memory_store)
+
+    def get_profile_selector(self):
+        """Shared latency-aware generation profile selector"""
+        return self._get_or_create("profile_selector", self._create_profile_selector)
+
+    def get_response_bank(self):
+        """Shared bank of pre-generated base responses"""
+        return self._get_or_create("response_bank", self._load_response_bank)
+
+    def get_generation_executor(self):
+        """Worker pool for running independent generations concurrently"""
+        return self._get_or_create("generation_executor", self._create_generation_executor)
+
+    def is_loaded(self, key):
+        """Check whether a resource has already been created"""
+        return key in self._resources
+
+    def warm_up(self, background=True):
+        """
+        Load the models and run warm-up inferences, once per registry
+        Returns: warmup.Warmup (poll .ready / .status() or call .wait())
+        """
+        with self._warmup_lock:
+            if self._warmup is None:
+                from warmup import Warmup
+                self._warmup = Warmup(self)
+            warmup = self._warmup
+        if background:
+            return warmup.start()
+        warmup.start().wait()
+        return warmup
+
+    def readiness(self):
+        """Warm-up status: state is cold (no warm-up started), loading, warming, ready or failed"""
+        if self._warmup is None:
+            return {'state': 'cold', 'stage': None, 'seconds': None, 'error': None}
+        return self._warmup.status()
+
+    def _load_emotion_detector(self):
+        from emotion_detector import EmotionDetector
+        detector = EmotionDetector(model=self.emotion_model, backend=self.emotion_backend)
+        if self.emotion_batching:
+            from batching import BatchingEmotionDetector
+            detector = BatchingEmotionDetector(
+                detector,
+                max_batch_size=config.EMOTION_MAX_BATCH_SIZE,
+                max_wait_ms=config.EMOTION_MAX_WAIT_MS
+            )
+        return detector
+
+    def _load_conversation_pipeline(self, model=None):
+        from backends import load_pipeline
+        try:
+            return load_pipeline(
+                "text2text-generation",
+                model or self.conversation_model,
+                backend=self.conversation_backend
+            )
+        except Exception as e:
+            print(f"Error initializing conversation pipeline: {str(e)}")
+            return None
+
+    def _create_generation_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        return ThreadPoolExecutor(
+            max_workers=config.GENERATION_WORKERS,
+            thread_name_prefix="generation"
+        )
+
+    def _create_translation_service(self):
+        from translation import DictionaryBackend, TranslationService
+        backend = DictionaryBackend() if config.TRANSLATION_BACKEND == "dictionary" else None
+        return TranslationService(
+            backend=backend,
+            cache_size=config.TRANSLATION_CACHE_SIZE,
+            cache_path=config.TRANSLATION_CACHE_PATH,
+            timeout=config.TRANSLATION_TIMEOUT,
+            save_interval=config.TRANSLATION_SAVE_INTERVAL
+        )
+
+    def _open_memory_store(self):
+        if not config.MEMORY_DB_PATH:
+            return None
+        from memory_store import SQLiteMemoryStore
+        return SQLiteMemoryStore(config.MEMORY_DB_PATH, batch_size=config.MEMORY_WRITE_BATCH)
+
+    def _create_profile_selector(self):
+        from generation import ProfileSelector
+        return ProfileSelector(workers=config.GENERATION_WORKERS)
+
+    def _load_response_bank(self):
+        from response_bank import ResponseBank
+        bank = ResponseBank(config.RESPONSE_BANK_PATH, max_variants=config.RESPONSE_BANK_VARIANTS).load()
+        if len(bank) == 0 and config.RESPONSE_BANK_PREGENERATE:
+            conversation_pipeline = self.get_conversation_pipeline()
+            if conversation_pipeline is not None:
+                from chatbot import base_response_prompt
+                print("Pre-generating response bank...")
+                bank.build(
+                    conversation_pipeline,
+                    base_response_prompt,
+                    self.get_emotion_detector().labels,
+                    variants=config.RESPONSE_BANK_VARIANTS
+                )
+                bank.save()
+        return bank
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the registry shared by the whole process"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,162 @@
+"""
+Pre-generated base responses keyed by generation profile and (emotion, intensity).
+
+Build the bank offline with:
+    python response_bank.py --variants 6
+"""
+import argparse
+import json
+import os
+import random
+import threading
+from metrics import get_metrics
+
+INTENSITIES = ['low', 'medium', 'high']
+# Profile of the model the offline bank is built with (the configured conversation model)
+BUILD_PROFILE = 'quality'
+
+
+class ResponseBank:
+    """
+    Several diverse response variants per (emotion, intensity) pair and generation
+    profile, so replies from a faster model are never served to a quality turn.
+    Each entry remembers the prompt it was generated from, so a changed prompt
+    turns into a cache miss instead of serving stale text.
+
+    An entry is only served once it holds max_variants variants; until then every
+    lookup is a miss and the live generation is added, so users are not all handed
+    the first reply generated for their emotion.
+    """
+
+    def __init__(self, path=None, max_variants=8):
+        self.path = path
+        self.max_variants = max_variants
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(len(entry['variants']) for entry in self._entries.values())
+
+    def get(self, emotion, intensity, prompt, rotation=None, profile=BUILD_PROFILE):
+        """
+        Return the next variant for (emotion, intensity) from profile, or None on a miss.
+        rotation is a per-session dict so each user cycles through the variants
+        without repeats before seeing any of them again.
+        """
+        key = (profile, emotion, intensity)
+        entry = self._entries.get(key)
+        if (not entry or entry['prompt'] != prompt or not entry['variants']
+                or len(entry['variants']) < self.max_variants):
+            self.misses += 1
+            get_metrics().inc('response_bank_lookups', result='miss')
+            return None
+        self.hits += 1
+        get_metrics().inc('response_bank_lookups', result='hit')
+        variants = entry['variants']
+        if rotation is None:
+            return random.choice(variants)
+        index = rotation.get(key)
+        if index is None:
+            # Start each session at a random offset so users don't all get the same first reply
+            index = random.randrange(len(variants))
+        rotation[key] = index + 1
+        return variants[index % len(variants)]
+
+    def add(self, emotion, intensity, prompt, text, profile=BUILD_PROFILE):
+        """Add a variant, replacing the entry if it was built from a different prompt"""
+        text = text.strip()
+        if not text:
+            return
+        key = (profile, emotion, intensity)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['prompt'] != prompt:
+                entry = {'prompt': prompt, 'variants': []}
+                self._entries[key] = entry
+            if text not in entry['variants'] and len(entry['variants']) < self.max_variants:
+                entry['variants'].append(text)
+
+    def load(self, path=None):
+        """Load entries from a JSON file if it exists"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return self
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            for item in data.get('entries', []):
+                # Banks saved before entries were keyed by profile were built by BUILD_PROFILE
+                profile = item.get('profile', BUILD_PROFILE)
+                for text in item['variants']:
+                    self.add(item['emotion'], item['intensity'], item['prompt'], text, profile)
+        except Exception as e:
+            print(f"Error loading response bank: {str(e)}")
+        return self
+
+    def save(self, path=None):
+        """Persist the bank as JSON"""
+        path = path or self.path
+        with self._lock:
+            entries = [
+                {'profile': profile, 'emotion': emotion, 'intensity': intensity, **entry}
+                for (profile, emotion, intensity), entry in sorted(self._entries.items())
+            ]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def build(self, conversation_pipeline, prompt_fn, emotions, intensities=INTENSITIES, variants=6,
+              profile=BUILD_PROFILE):
+        """
+        Generate variants for every (emotion, intensity) pair with sampling for diversity.
+        prompt_fn(emotion, intensity) must return the same prompt used at chat time, and
+        profile names the generation profile whose model conversation_pipeline runs.
+        """
+        for emotion in emotions:
+            for intensity in intensities:
+                prompt = prompt_fn(emotion, intensity)
+                try:
+                    outputs = conversation_pipeline(
+                        prompt,
+                        max_length=200,
+                        min_length=50,
+                        do_sample=True,
+                        top_p=0.92,
+                        temperature=0.9,
+                        num_return_sequences=variants,
+                        no_repeat_ngram_size=2
+                    )
+                except Exception as e:
+                    print(f"Error generating responses for {emotion}/{intensity}: {str(e)}")
+                    continue
+                for output in outputs:
+                    self.add(emotion, intensity, prompt, output['generated_text'], profile)
+        return self
+
+
+def main():
+    import config
+    from chatbot import base_response_prompt
+    from registry import get_registry
+
+    parser = argparse.ArgumentParser(description="Pre-generate the base response bank")
+    parser.add_argument("--output", default=config.RESPONSE_BANK_PATH)
+    parser.add_argument("--variants", type=int, default=6, help="variants per (emotion, intensity)")
+    args = parser.parse_args()
+
+    registry = get_registry()
+    conversation_pipeline = registry.get_conversation_pipeline()
+    if conversation_pipeline is None:
+        raise SystemExit("Conversation model is unavailable")
+    emotions = registry.get_emotion_detector().labels
+    bank = ResponseBank(args.output, max_variants=args.variants)
+    bank.build(conversation_pipeline, base_response_prompt, emotions, variants=args.variants)
+    bank.save()
+    print(f"Saved {len(bank)} responses to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Headless HTTP/WebSocket chat server (requires `fastapi` and `uvicorn`).
+
+    python server.py --port 8000                 # real models
+    python server.py --stub-models               # no model downloads, for local testing
+
+Endpoints:
+    POST   /sessions/{session_id}/turn      {"message": "...", "language": "english", "user_id": "..."}
+    GET    /sessions/{session_id}/summary
+    DELETE /sessions/{session_id}
+    WS     /sessions/{session_id}/stream    send {"message": ...}, receive chunk messages then a done message
+    GET    /health
+    GET    /ready                           200 once the models are warmed up, 503 before
+    GET    /metrics                         Prometheus text format (/metrics/snapshot for JSON)
+
+Each worker process loads the models once (see registry.py) and keeps one
+EmotionAwareChatbot per session in a SessionManager. When more than
+EMOTION_BOT_SERVER_MAX_IN_FLIGHT turns are already running, new turns are
+rejected with 429 so a load balancer can retry elsewhere. The models are loaded
+and warmed up in the background (see warmup.py) while the server already accepts
+connections; until that is done, turns are refused with 503 and /ready says so.
+"""
+import argparse
+import asyncio
+import functools
+import time
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+import config
+from chatbot import EmotionAwareChatbot
+from metrics import get_metrics
+from registry import ModelRegistry, get_registry
+from sessions import SessionManager
+from warmup import warm_profiles
+
+BUSY_DETAIL = "Too many turns in flight, retry shortly"
+WARMING_UP_DETAIL = "Models are warming up, retry shortly"
+WARMING_UP_STATES = ('loading', 'warming')
+
+
+class TurnRequest(BaseModel):
+    message: str
+    language: str = 'english'
+    user_id: str = None
+
+
+class AdmissionGate:
+    """Counts running turns and refuses new ones beyond the limit instead of queueing them"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_enter(self):
+        # Only touched from the event loop thread, so no lock is needed
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def leave(self):
+        self.in_flight -= 1
+
+
+def turn_payload(result):
+    return {
+        'response': result.response,
+        'language': result.language,
+        'emotion': result.emotion_data,
+        'scores': result.scores,
+        'profile': result.profile,
+        'timings': result.timings,
+        'error': result.error,
+    }
+
+
+def create_app(registry=None, sessions=None, max_in_flight=None, warm_up=None):
+    registry = registry or get_registry()
+    warm_up = config.WARMUP if warm_up is None else warm_up
+    if sessions is None:
+        sessions = SessionManager(
+            lambda session_id, user_id: EmotionAwareChatbot(
+                registry=registry, user_id=user_id, session_id=session_id
+            ),
+            max_sessions=config.SERVER_MAX_SESSIONS,
+            ttl=config.SERVER_SESSION_TTL,
+            max_memory_mb=config.SERVER_MAX_MEMORY_MB
+        )
+    gate = AdmissionGate(max_in_flight or config.SERVER_MAX_IN_FLIGHT)
+    app = FastAPI(title="Emotion-Aware Chatbot")
+    app.state.registry = registry
+    app.state.sessions = sessions
+    app.state.gate = gate
+
+    async def expire_sessions():
+        while True:
+            await asyncio.sleep(min(60.0, sessions.ttl / 4))
+            sessions.expire()
+
+    @app.on_event("startup")
+    async def startup():
+        # Load the models before serving turns, not inside the first request
+        if warm_up:
+            registry.warm_up()
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, registry.get_emotion_detector)
+            await loop.run_in_executor(None, registry.get_conversation_pipeline)
+            for profile in warm_profiles():
+                await loop.run_in_executor(None, registry.get_conversation_pipeline, profile.model)
+            await loop.run_in_executor(None, registry.get_response_bank)
+        app.state.expiry_task = asyncio.create_task(expire_sessions())
+
+    @app.on_event("shutdown")
+    async def shutdown():
+        app.state.expiry_task.cancel()
+        # Persist buffered memory writes now rather than relying on interpreter exit
+        sessions.close()
+        if registry.is_loaded('memory_store') and registry.get_memory_store() is not None:
+            registry.get_memory_store().flush()
+        if registry.is_loaded('translation_service'):
+            registry.get_translation_service().close()
+
+    def warming_up():
+        if registry.readiness()['state'] not in WARMING_UP_STATES:
+            return False
+        get_metrics().inc('rejected_turns', reason='warming_up')
+        return True
+
+    def session_lock(session):
+        if session.lock is None:
+            session.lock = asyncio.Lock()
+        return session.lock
+
+    @app.post("/sessions/{session_id}/turn")
+    async def turn(session_id: str, request: TurnRequest):
+        if warming_up():
+            raise HTTPException(status_code=503, detail=WARMING_UP_DETAIL, headers={'Retry-After': '5'})
+        if not gate.try_enter():
+            get_metrics().inc('rejected_turns', reason='busy')
+            raise HTTPException(status_code=429, detail=BUSY_DETAIL, headers={'Retry-After': '1'})
+        try:
+            # Building a new session (chatbot, persisted memory) blocks, so it runs off the event loop
+            session = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(sessions.get, session_id, user_id=request.user_id)
+            )
+            # Turns of one conversation run in order; different sessions run concurrently
+            async with session_lock(session):
+                result = await session.chatbot.aprocess_turn(request.message, request.language)
+            sessions.touch(session)
+        finally:
+            gate.leave()
+        return turn_payload(result)
+
+    @app.get("/sessions/{session_id}/summary")
+    async def summary(session_id: str):
+        session = sessions.get(session_id, create=False)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Unknown session")
+        return session.chatbot.get_emotional_summary()
+
+    @app.delete("/sessions/{session_id}")
+    async def end_session(session_id: str):
+        if not sessions.remove(session_id):
+            raise HTTPException(status_code=404, detail="Unknown session")
+        return {'ended': session_id}
+
+    @app.websocket("/sessions/{session_id}/stream")
+    async def stream(websocket: WebSocket, session_id: str):
+        await websocket.accept()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                request = await websocket.receive_json()
+                if warming_up():
+                    await websocket.send_json({'type': 'error', 'status': 503, 'detail': WARMING_UP_DETAIL})
+                    continue
+                if not gate.try_enter():
+                    get_metrics().inc('rejected_turns', reason='busy')
+                    await websocket.send_json({'type': 'error', 'status': 429, 'detail': BUSY_DETAIL})
+                    continue
+                try:
+                    session = await loop.run_in_executor(
+                        None, functools.partial(sessions.get, session_id, user_id=request.get('user_id'))
+                    )
+                    async with session_lock(session):
+                        turn_stream = session.chatbot.stream_turn(
+                            request['message'], request.get('language', 'english')
+                        )
+                        chunks = iter(turn_stream)
+                        # Decoding blocks, so each chunk is pulled on a worker thread
+                        while True:
+                            chunk = await loop.run_in_executor(None, next, chunks, None)
+                            if chunk is None:
+                                break
+                            await websocket.send_json({'type': 'chunk', 'text': chunk})
+                    sessions.touch(session)
+                finally:
+                    gate.leave()
+                await websocket.send_json(dict(turn_payload(turn_stream.result), type='done'))
+        except WebSocketDisconnect:
+            pass
+
+    @app.get("/health")
+    async def health():
+        # Never wait here for a model that is still loading
+        emotion_cache = None
+        if registry.is_loaded('emotion_detector'):
+            emotion_cache = getattr(registry.get_emotion_detector(), 'cache', None)
+        return {
+            'status': 'ok',
+            'readiness': registry.readiness(),
+            'in_flight': gate.in_flight,
+            'max_in_flight': gate.limit,
+            'rejected': gate.rejected,
+            'sessions': sessions.stats(),
+            'emotion_cache': emotion_cache.stats() if emotion_cache is not None else None,
+            'time': time.time(),
+        }
+
+    @app.get("/ready")
+    async def ready():
+        readiness = registry.readiness()
+        if readiness['state'] in WARMING_UP_STATES:
+            return JSONResponse(dict(readiness, ready=False), status_code=503, headers={'Retry-After': '5'})
+        return dict(readiness, ready=True)
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return get_metrics().prometheus()
+
+    @app.get("/metrics/snapshot")
+    async def metrics_snapshot():
+        return get_metrics().snapshot()
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Emotion-Aware Chatbot server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--stub-models", action="store_true",
+                        help="serve with the stub backend instead of loading real models")
+    args = parser.parse_args()
+
+    registry = None
+    if args.stub_models:
+        registry = ModelRegistry(emotion_backend='stub', conversation_backend='stub')
+    uvicorn.run(create_app(registry), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Rough fixed cost of one session: chatbot object, memory structures, stats dicts
+SESSION_OVERHEAD_BYTES = 16 * 1024
+
+
+class Session:
+    """One conversation held by the server: its chatbot (and so its EmotionalMemory)"""
+
+    def __init__(self, session_id, user_id, chatbot):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.chatbot = chatbot
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.turns = 0
+        self.size_bytes = SESSION_OVERHEAD_BYTES
+        # Created lazily by the server so turns of one session run one at a time
+        self.lock = None
+
+    def measure(self):
+        """Approximate memory held by this session's conversation history"""
+        history = self.chatbot.memory.conversation_history
+        text = sum(len(i['user_input'] or '') + len(i['bot_response'] or '') for i in history)
+        self.size_bytes = SESSION_OVERHEAD_BYTES + 2 * text
+        return self.size_bytes
+
+    def close(self):
+        """Write out anything the session's memory still buffers"""
+        flush = getattr(self.chatbot.memory, 'flush', None)
+        if flush is not None:
+            try:
+                flush()
+            except Exception as e:
+                print(f"Error flushing session {self.session_id}: {e}")
+
+
+class SessionManager:
+    """
+    Sessions keyed by id, kept in LRU order. A session idle for longer than ttl
+    seconds is dropped, and the least recently used sessions are evicted whenever
+    there are more than max_sessions of them or their estimated memory exceeds
+    max_memory_mb. Dropped sessions are closed outside the lock, which flushes a
+    persistent memory store, so evicted users get their history back on their
+    next turn, in this process or another.
+
+    New sessions are built outside the lock too: the first caller for an id runs
+    the factory while later callers for that id wait on its Future, and callers
+    for other sessions are not held up at all.
+    """
+
+    def __init__(self, factory, max_sessions=1000, ttl=1800, max_memory_mb=256):
+        # factory(session_id, user_id) -> EmotionAwareChatbot
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_memory_mb * 1024 * 1024
+        self._sessions = OrderedDict()
+        # session id -> Future of the Session being built for it
+        self._building = {}
+        self._lock = threading.Lock()
+        # Sessions dropped under the lock, closed once it is released
+        self._dropped = []
+        self.total_bytes = 0
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def get(self, session_id, user_id=None, create=True):
+        """
+        Return the session, creating it if needed; None if missing and create is False.
+        Creating a session runs the factory, which may block: async callers should
+        call this from an executor.
+        """
+        now = time.monotonic()
+        building = None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and now - session.last_used > self.ttl:
+                self._drop(session_id)
+                self.expired += 1
+                session = None
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_used = now
+            elif create:
+                pending = self._building.get(session_id)
+                if pending is None:
+                    pending = building = self._building[session_id] = Future()
+        self._close_dropped()
+        if session is not None or not create:
+            return session
+        if building is None:
+            # Another caller is already building this session
+            return pending.result()
+        return self._build(session_id, user_id, building)
+
+    def _build(self, session_id, user_id, building):
+        try:
+            session = Session(session_id, user_id, self.factory(session_id, user_id))
+        except BaseException as e:
+            with self._lock:
+                del self._building[session_id]
+            building.set_exception(e)
+            raise
+        with self._lock:
+            del self._building[session_id]
+            self._sessions[session_id] = session
+            self.total_bytes += session.size_bytes
+            self.created += 1
+            self._enforce_limits(keep=session_id)
+        building.set_result(session)
+        self._close_dropped()
+        return session
+
+    def touch(self, session):
+        """Record a finished turn: refresh recency and re-measure the session's size"""
+        with self._lock:
+            if self._sessions.get(session.session_id) is not session:
+                # Evicted while its turn was running
+                return
+            session.turns += 1
+            session.last_used = time.monotonic()
+            self.total_bytes -= session.size_bytes
+            self.total_bytes += session.measure()
+            self._sessions.move_to_end(session.session_id)
+            self._enforce_limits(keep=session.session_id)
+        self._close_dropped()
+
+    def remove(self, session_id):
+        with self._lock:
+            removed = self._drop(session_id) is not None
+        self._close_dropped()
+        return removed
+
+    def close(self):
+        """Drop and close every session (server shutdown)"""
+        with self._lock:
+            for session_id in list(self._sessions):
+                self._drop(session_id)
+        self._close_dropped()
+
+    def expire(self):
+        """Drop every session idle for longer than ttl; returns how many were dropped"""
+        cutoff = time.monotonic() - self.ttl
+        dropped = 0
+        with self._lock:
+            # LRU order means idle sessions are at the front
+            while self._sessions:
+                session_id, session = next(iter(self._sessions.items()))
+                if session.last_used > cutoff:
+                    break
+                self._drop(session_id)
+                dropped += 1
+            self.expired += dropped
+        self._close_dropped()
+        return dropped
+
+    def _enforce_limits(self, keep):
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self.total_bytes > self.max_bytes
+        ):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            self._drop(session_id)
+            self.evicted += 1
+
+    def _drop(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.total_bytes -= session.size_bytes
+            self._dropped.append(session)
+        return session
+
+    def _close_dropped(self):
+        with self._lock:
+            dropped, self._dropped = self._dropped, []
+        for session in dropped:
+            session.close()
+
+    def stats(self):
+        return {
+            'sessions': len(self._sessions),
+            'memory_mb': self.total_bytes / (1024 * 1024),
+            'created': self.created,
+            'evicted': self.evicted,
+            'expired': self.expired,
+        }
@@ -0,0 +1,142 @@
+"""
+Stand-in pipelines for running the bot without downloading models (backend 'stub').
+
+They answer like transformers pipelines, deterministically and with a configurable
+delay, so the server, benchmarks and UI can be exercised locally:
+    EMOTION_BOT_EMOTION_BACKEND=stub EMOTION_BOT_CONVERSATION_BACKEND=stub python main.py
+    python server.py --stub-models
+"""
+import time
+from types import SimpleNamespace
+
+STUB_LABELS = ['anger', 'disgust', 'fear', 'joy', 'neutral', 'sadness', 'surprise']
+
+STUB_KEYWORDS = {
+    'anger': ('angry', 'furious', 'mad', 'hate', 'annoyed', 'unfair'),
+    'disgust': ('disgusting', 'gross', 'revolting', 'sick of'),
+    'fear': ('afraid', 'scared', 'worried', 'anxious', 'nervous', 'terrified'),
+    'joy': ('happy', 'great', 'love', 'excited', 'glad', 'wonderful', 'promoted'),
+    'sadness': ('sad', 'lonely', 'miss', 'depressed', 'cry', 'lost'),
+    'surprise': ('wow', 'unexpected', 'surprised', "can't believe", 'suddenly'),
+}
+
+
+class StubTextClassifier:
+    """Keyword-matching stand-in for a text-classification pipeline with all scores"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.model = SimpleNamespace(config=SimpleNamespace(id2label=dict(enumerate(STUB_LABELS))))
+        self.calls = 0
+
+    def _scores(self, text):
+        text = text.lower()
+        hits = {label: sum(word in text for word in words) for label, words in STUB_KEYWORDS.items()}
+        weights = {label: 1.0 + 4.0 * hits.get(label, 0) for label in STUB_LABELS}
+        if not any(hits.values()):
+            weights['neutral'] = 5.0
+        total = sum(weights.values())
+        return [{'label': label, 'score': weights[label] / total} for label in STUB_LABELS]
+
+    def __call__(self, inputs, batch_size=None, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(inputs, str):
+            return [self._scores(inputs)]
+        return [self._scores(text) for text in inputs]
+
+
+class StubText2TextPipeline:
+    """Stand-in for a text2text-generation pipeline; latency is charged per generated word"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def _reply(self, prompt, max_length=None):
+        if 'follow-up question' in prompt:
+            text = "What do you think is behind that feeling right now?"
+        else:
+            text = (
+                "It sounds like a lot is going on for you, and that is completely understandable. "
+                "I am here to listen and support you."
+            )
+        words = text.split()
+        if max_length:
+            words = words[:max_length]
+        return words
+
+    def __call__(self, inputs, batch_size=None, max_length=None, **kwargs):
+        self.calls += 1
+        prompts = [inputs] if isinstance(inputs, str) else list(inputs)
+        outputs = []
+        for prompt in prompts:
+            words = self._reply(prompt, max_length)
+            if self.latency:
+                time.sleep(self.latency * len(words) / len(prompts))
+            outputs.append({'generated_text': ' '.join(words)})
+        if isinstance(inputs, str):
+            return outputs
+        return [[output] for output in outputs]
+
+    def stream(self, request):
+        """Yield the reply word by word, as generation.transformers_stream would"""
+        self.calls += 1
+        for i, word in enumerate(self._reply(request['prompt'], request['kwargs'].get('max_length'))):
+            if self.latency:
+                time.sleep(self.latency)
+            yield word if i == 0 else ' ' + word
+
+
+def stub_stream(conversation_pipeline, request, timeout=None):
+    """generation.stream_generate stream function for StubText2TextPipeline"""
+    return conversation_pipeline.stream(request)
+
+
+class StubSpeechEngine:
+    """
+    Stand-in for a pyttsx3 engine; "speaking" takes latency seconds per word.
+    Like pyttsx3 it calls started-word callbacks before each word, on the thread
+    running runAndWait(), and stop() from such a callback cuts the utterance off.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.spoken = []
+        self._pending = []
+        self._callbacks = {}
+        self._stopped = False
+
+    def connect(self, topic, callback):
+        self._callbacks.setdefault(topic, []).append(callback)
+
+    def say(self, text):
+        self._pending.append(text)
+
+    def runAndWait(self):
+        self._stopped = False
+        pending, self._pending = self._pending, []
+        for text in pending:
+            location = 0
+            for word in text.split():
+                location = text.index(word, location)
+                for callback in self._callbacks.get('started-word', ()):
+                    callback(None, location, len(word))
+                if self._stopped:
+                    return
+                if self.latency:
+                    time.sleep(self.latency)
+                location += len(word)
+            self.spoken.append(text)
+
+    def stop(self):
+        """Cut off the utterance in progress and drop the queued ones"""
+        self._pending = []
+        self._stopped = True
+
+
+def load_stub_pipeline(task, model, latency=0.0, **kwargs):
+    if task == 'text-classification':
+        return StubTextClassifier(latency=latency)
+    return StubText2TextPipeline(latency=latency)
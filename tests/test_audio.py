@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from audio import RingBuffer, Resampler, resample
+
+
+def test_ring_buffer_keeps_order_before_wrapping():
+    buffer = RingBuffer(8)
+    buffer.write(np.arange(3, dtype=np.int16))
+    buffer.write(np.arange(3, 6, dtype=np.int16))
+    assert len(buffer) == 6
+    assert buffer.samples().tolist() == [0, 1, 2, 3, 4, 5]
+
+
+def test_ring_buffer_wraps_around_keeping_newest_samples():
+    buffer = RingBuffer(5)
+    for start in range(0, 12, 3):
+        buffer.write(np.arange(start, start + 3, dtype=np.int16))
+    assert len(buffer) == 5
+    assert buffer.samples().tolist() == [7, 8, 9, 10, 11]
+
+
+@pytest.mark.parametrize('first', [0, 1, 3, 5])
+def test_ring_buffer_block_larger_than_capacity(first):
+    buffer = RingBuffer(5)
+    buffer.write(np.arange(first, dtype=np.int16))
+    buffer.write(np.arange(10, 16, dtype=np.int16))
+    assert buffer.samples().tolist() == [11, 12, 13, 14, 15]
+    buffer.write(np.array([16, 17], dtype=np.int16))
+    assert buffer.samples().tolist() == [13, 14, 15, 16, 17]
+
+
+def test_ring_buffer_clear():
+    buffer = RingBuffer(4)
+    buffer.write(np.arange(6, dtype=np.int16))
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.samples().tolist() == []
+
+
+@pytest.mark.parametrize('src_rate,dst_rate', [(44100, 16000), (48000, 16000), (8000, 16000), (16000, 16000)])
+@pytest.mark.parametrize('block', [1, 441, 1024])
+def test_streamed_resampling_equals_one_shot(src_rate, dst_rate, block):
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-20000, 20000, src_rate // 2).astype(np.int16)
+    whole = resample(samples, src_rate, dst_rate)
+    resampler = Resampler(src_rate, dst_rate)
+    streamed = np.concatenate([resampler.process(samples[i:i + block]) for i in range(0, len(samples), block)])
+    assert len(whole) == len(streamed)
+    assert np.array_equal(whole, streamed)
+    # Upsampling holds back the samples that interpolate towards the next block
+    assert abs(len(whole) - len(samples) * dst_rate / src_rate) <= dst_rate / src_rate + 1
+
+
+def test_downsampling_filters_out_tones_above_the_new_nyquist():
+    rate = 44100
+    t = np.arange(rate) / rate
+    audible = (10000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+    aliased = (10000 * np.sin(2 * np.pi * 12000 * t)).astype(np.int16)
+    rms = lambda x: np.sqrt(np.mean(x[100:].astype(np.float64) ** 2))
+    assert rms(resample(audible, rate, 16000)) > 6000
+    assert rms(resample(aliased, rate, 16000)) < 100
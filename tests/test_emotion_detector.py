@@ -0,0 +1,31 @@
+from emotion_detector import EmotionDetector
+
+
+def stub_detector(cache_size=16):
+    detector = EmotionDetector(backend='stub', cache_size=cache_size)
+    # Every text goes to the classifier, whatever EMOTION_BOT_CASCADE_MARGIN says
+    detector.cascade_margin = None
+    return detector
+
+
+def test_detect_then_context_classifies_once():
+    detector = stub_detector()
+    text = "I'm so happy, I got promoted today!"
+    emotion = detector.detect_emotion(text)
+    context = detector.get_emotion_context(text)
+    assert detector.emotion_classifier.calls == 1
+    assert context['primary_emotion'] == emotion['emotion']
+
+
+def test_normalized_text_shares_one_cache_entry():
+    detector = stub_detector()
+    detector.score_emotions("I feel so lonely")
+    detector.score_emotions("  i feel SO lonely ")
+    assert detector.emotion_classifier.calls == 1
+
+
+def test_without_cache_every_call_classifies():
+    detector = stub_detector(cache_size=0)
+    detector.detect_emotion("I feel so lonely")
+    detector.get_emotion_context("I feel so lonely")
+    assert detector.emotion_classifier.calls == 2
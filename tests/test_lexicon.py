@@ -0,0 +1,32 @@
+import pytest
+from lexicon import LexiconEngine
+
+
+def top_label(text):
+    scores = LexiconEngine().score(text)
+    return max(scores, key=scores.get)
+
+
+@pytest.mark.parametrize('text, label', [
+    ("My dog died this morning and I can't stop crying.", 'sadness'),
+    ("I couldn't stop crying all night", 'sadness'),
+    ("I can't help smiling today", 'joy'),
+    ("I just cannot stop panicking", 'fear'),
+])
+def test_negated_stopping_verb_keeps_the_feeling(text, label):
+    assert top_label(text) == label
+
+
+def test_negated_stopping_verb_intensifies():
+    engine = LexiconEngine()
+    sadness = engine.labels.index('sadness')
+    assert engine.raw_scores("I can't stop crying")[sadness] > engine.raw_scores("I am crying")[sadness]
+
+
+@pytest.mark.parametrize('text, label', [
+    ("I'm not happy with this", 'sadness'),
+    ("I don't feel sad", 'neutral'),
+    ("I am not angry, I am terrified", 'fear'),
+])
+def test_negation_still_applies(text, label):
+    assert top_label(text) == label
@@ -0,0 +1,49 @@
+import sqlite3
+from memory_store import PersistentEmotionalMemory, SQLiteMemoryStore
+
+EMOTION = {'emotion': 'sadness', 'intensity': 'high', 'score': 0.9}
+SCORES = {'sadness': 0.9, 'joy': 0.1}
+
+
+def open_store(tmp_path, **kwargs):
+    store = SQLiteMemoryStore(str(tmp_path / 'memory.db'), flush_interval=3600, **kwargs)
+    # Fail at once instead of waiting for the lock
+    store._conn.execute("PRAGMA busy_timeout = 0")
+    return store
+
+
+def stored_rows(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'memory.db'))
+    try:
+        return conn.execute("SELECT user_input FROM interactions ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_rows_survive_a_locked_database(tmp_path):
+    store = open_store(tmp_path, batch_size=1)
+    memory = PersistentEmotionalMemory(store, 'user', 'session')
+    blocker = sqlite3.connect(str(tmp_path / 'memory.db'), isolation_level=None)
+    blocker.execute("BEGIN EXCLUSIVE")
+
+    # The inline flush fails, but the turn does not
+    memory.add_interaction("first", EMOTION, "reply", SCORES)
+    memory.add_interaction("second", EMOTION, "reply", SCORES)
+    assert len(store._pending) == 2
+
+    blocker.execute("ROLLBACK")
+    blocker.close()
+    memory.flush()
+    assert stored_rows(tmp_path) == [("first",), ("second",)]
+    store.close()
+
+
+def test_replayed_memory_matches_live_memory(tmp_path):
+    store = open_store(tmp_path)
+    live = PersistentEmotionalMemory(store, 'user', 'one')
+    for i, emotion in enumerate(['joy', 'sadness', 'sadness', 'fear']):
+        live.add_interaction(f"message {i}", dict(EMOTION, emotion=emotion), "reply", {emotion: 0.8})
+    live.flush()
+    replayed = PersistentEmotionalMemory(store, 'user', 'two')
+    assert replayed.get_emotional_summary() == live.get_emotional_summary()
+    store.close()
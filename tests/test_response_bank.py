@@ -0,0 +1,35 @@
+from response_bank import ResponseBank
+
+PROMPT = "Respond to a sad user"
+
+
+def test_entry_is_a_miss_until_full():
+    bank = ResponseBank(max_variants=2)
+    bank.add('sadness', 'high', PROMPT, "first reply")
+    assert bank.get('sadness', 'high', PROMPT) is None
+    bank.add('sadness', 'high', PROMPT, "first reply")
+    assert bank.get('sadness', 'high', PROMPT) is None
+    bank.add('sadness', 'high', PROMPT, "second reply")
+    assert bank.get('sadness', 'high', PROMPT) in ("first reply", "second reply")
+
+
+def test_variants_are_kept_per_profile():
+    bank = ResponseBank(max_variants=1)
+    bank.add('sadness', 'high', PROMPT, "fast reply", profile='fast')
+    assert bank.get('sadness', 'high', PROMPT, profile='quality') is None
+    assert bank.get('sadness', 'high', PROMPT, profile='fast') == "fast reply"
+
+
+def test_changed_prompt_is_a_miss():
+    bank = ResponseBank(max_variants=1)
+    bank.add('joy', 'low', PROMPT, "reply")
+    assert bank.get('joy', 'low', "another prompt") is None
+
+
+def test_saved_bank_round_trips_with_profiles(tmp_path):
+    path = str(tmp_path / 'bank.json')
+    bank = ResponseBank(path, max_variants=1)
+    bank.add('joy', 'low', PROMPT, "balanced reply", profile='balanced')
+    bank.save()
+    loaded = ResponseBank(path, max_variants=1).load()
+    assert loaded.get('joy', 'low', PROMPT, profile='balanced') == "balanced reply"
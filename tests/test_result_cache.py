@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from result_cache import ResultCache
+
+CALLERS = 8
+
+
+def _call_together(cache, key, compute):
+    """Call get_or_compute from CALLERS threads released at the same moment"""
+    barrier = threading.Barrier(CALLERS)
+
+    def call():
+        barrier.wait()
+        try:
+            return cache.get_or_compute(key, compute)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=CALLERS) as pool:
+        return list(pool.map(lambda _: call(), range(CALLERS)))
+
+
+def test_concurrent_callers_compute_once():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'joy': 1.0}
+
+    results = _call_together(cache, 'key', compute)
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] + stats['coalesced'] == CALLERS - 1
+    assert cache.get_or_compute('key', compute) is results[0]
+    assert len(calls) == 1
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError('model failed')
+
+    results = _call_together(cache, 'key', compute)
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(cache) == 0
+    assert cache.get_or_compute('key', lambda: 'recovered') == 'recovered'
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+@pytest.mark.parametrize('maxsize', [0, -1])
+def test_disabled_cache_stores_nothing(maxsize):
+    cache = ResultCache(maxsize=maxsize)
+    assert cache.get_or_compute('key', lambda: 1) == 1
+    assert len(cache) == 0
@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from sessions import SESSION_OVERHEAD_BYTES, SessionManager
+
+
+class FakeMemory:
+    def __init__(self):
+        self.conversation_history = []
+        self.flushed = 0
+
+    def flush(self):
+        self.flushed += 1
+
+
+def make_chatbot(session_id, user_id):
+    return SimpleNamespace(memory=FakeMemory())
+
+
+def test_least_recently_used_session_is_evicted():
+    sessions = SessionManager(make_chatbot, max_sessions=2)
+    a = sessions.get('a')
+    sessions.get('b')
+    sessions.get('a')
+    sessions.get('c')
+    assert 'b' not in sessions
+    assert 'a' in sessions and 'c' in sessions
+    assert sessions.stats()['evicted'] == 1
+    assert sessions.get('a') is a
+
+
+def test_evicted_session_is_flushed():
+    sessions = SessionManager(make_chatbot, max_sessions=1)
+    a = sessions.get('a')
+    sessions.get('b')
+    assert a.chatbot.memory.flushed == 1
+
+
+def test_memory_cap_evicts_oldest_but_keeps_active_session():
+    sessions = SessionManager(make_chatbot, max_memory_mb=3 * SESSION_OVERHEAD_BYTES / (1024 * 1024))
+    for session_id in 'abc':
+        sessions.get(session_id)
+    big = sessions.get('c')
+    big.chatbot.memory.conversation_history.append({'user_input': 'x' * SESSION_OVERHEAD_BYTES, 'bot_response': ''})
+    sessions.touch(big)
+    assert 'a' not in sessions and 'b' not in sessions
+    assert len(sessions) == 1 and 'c' in sessions
+    assert sessions.stats()['evicted'] == 2
+
+
+def test_idle_sessions_expire():
+    sessions = SessionManager(make_chatbot, ttl=0.05)
+    a = sessions.get('a')
+    time.sleep(0.1)
+    sessions.get('b')
+    assert sessions.expire() == 1
+    assert 'a' not in sessions and 'b' in sessions
+    assert a.chatbot.memory.flushed == 1
+    time.sleep(0.1)
+    assert sessions.get('b', create=False) is None
+    assert sessions.stats()['expired'] == 2
+
+
+def test_concurrent_gets_build_one_session():
+    calls = []
+
+    def slow_chatbot(session_id, user_id):
+        calls.append(session_id)
+        time.sleep(0.1)
+        return make_chatbot(session_id, user_id)
+
+    sessions = SessionManager(slow_chatbot)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sessions.get('a'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ['a']
+    assert all(session is results[0] for session in results)
+
+
+def test_failed_build_is_retried():
+    def broken(session_id, user_id):
+        raise RuntimeError('no model')
+
+    sessions = SessionManager(broken)
+    with pytest.raises(RuntimeError):
+        sessions.get('a')
+    sessions.factory = make_chatbot
+    assert sessions.get('a') is not None
@@ -0,0 +1,30 @@
+import asyncio
+import translation
+from translation import DictionaryBackend, TranslationService
+
+
+class BrokenBackend:
+    name = 'broken'
+
+    def __init__(self):
+        raise ImportError("No module named 'googletrans'")
+
+
+def test_backend_that_fails_to_load_returns_original_text(monkeypatch):
+    monkeypatch.setattr(translation, 'GoogleTransBackend', BrokenBackend)
+    service = TranslationService()
+    assert service.translate("namaste", src='hi', dest='en') == "namaste"
+    assert asyncio.run(service.atranslate_batch(["namaste"], src='hi', dest='en')) == ["namaste"]
+    assert service.stats()['errors'] == 2
+    assert len(service._cache) == 0
+
+
+def test_repeated_phrases_are_translated_once():
+    backend = DictionaryBackend()
+    calls = []
+    translate_batch = backend.translate_batch
+    backend.translate_batch = lambda texts, src, dest: (calls.append(list(texts)), translate_batch(texts, src, dest))[1]
+    service = TranslationService(backend=backend)
+    service.translate_batch(["Hello", "hello ", "Thank you"], src='en', dest='hi')
+    service.translate_batch(["HELLO"], src='en', dest='hi')
+    assert calls == [["Hello", "Thank you"]]
@@ -0,0 +1,306 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from metrics import get_metrics
+
+# Languages offered in the UI, mapped to translator language codes
+LANG_CODES = {
+    'english': 'en',
+    'hindi': 'hi',
+    'telugu': 'te',
+    'tamil': 'ta',
+    'bengali': 'bn',
+    'kannada': 'kn',
+    'marathi': 'mr',
+    'gujarati': 'gu',
+    'malayalam': 'ml',
+    'punjabi': 'pa',
+    'urdu': 'ur',
+    'odia': 'or',
+    'assamese': 'as',
+    'sanskrit': 'sa'
+}
+
+
+def language_code(language):
+    """Map a UI language name (or an existing code) to a translator code"""
+    if not language:
+        return 'en'
+    language = language.lower()
+    return LANG_CODES.get(language, language if len(language) <= 3 else 'en')
+
+
+def normalize_text(text):
+    """Cache key form of a text: trimmed, whitespace-collapsed and case-folded"""
+    return ' '.join(text.split()).casefold()
+
+
+class TranslationBackend:
+    """Interface for translation providers"""
+
+    name = 'base'
+
+    def translate_batch(self, texts, src, dest):
+        """Returns: list of translated strings in input order"""
+        raise NotImplementedError
+
+    def detect(self, text):
+        return 'en'
+
+
+class GoogleTransBackend(TranslationBackend):
+    """googletrans (network) backend"""
+
+    name = 'googletrans'
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate_batch(self, texts, src, dest):
+        results = self.translator.translate(list(texts), src=src, dest=dest)
+        return [result.text for result in results]
+
+    def detect(self, text):
+        return self.translator.detect(text).lang
+
+
+class DictionaryBackend(TranslationBackend):
+    """
+    Offline stand-in backend. Known phrases come from a lookup table, anything
+    else is returned unchanged. An optional per-call latency mimics a network
+    round trip for benchmarks.
+    """
+
+    name = 'dictionary'
+
+    def __init__(self, phrases=None, latency=0.0):
+        # phrases: {(src, dest): {normalized text: translation}}
+        self.phrases = phrases or {}
+        self.latency = latency
+        self.calls = 0
+
+    def translate_batch(self, texts, src, dest):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        table = self.phrases.get((src, dest), {})
+        return [table.get(normalize_text(text), text) for text in texts]
+
+
+class TranslationService:
+    """
+    Translation with a normalized-text LRU cache (optionally persisted to disk),
+    batch requests, per-call timeouts and a pluggable backend. Failures and
+    timeouts return the original text, matching the old behaviour.
+    With a cache_path, new translations are saved every save_interval seconds
+    and at interpreter exit.
+    """
+
+    def __init__(self, backend=None, cache_size=4096, cache_path=None, timeout=5.0, workers=4,
+                 save_interval=300.0):
+        self._backend = backend
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translation")
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.save_interval = save_interval
+        # Translations added since the cache was last loaded or saved
+        self._unsaved = 0
+        self._closed = threading.Event()
+        if cache_path:
+            self.load()
+            self._saver = threading.Thread(target=self._save_periodically, name='translation-save', daemon=True)
+            self._saver.start()
+            atexit.register(self.close)
+
+    @property
+    def backend(self):
+        # Created on first use so importing this module never touches the network
+        if self._backend is None:
+            self._backend = GoogleTransBackend()
+        return self._backend
+
+    def to_english(self, text, language):
+        return self.translate(text, src=language_code(language), dest='en')
+
+    def from_english(self, text, language):
+        return self.translate(text, src='en', dest=language_code(language))
+
+    def translate(self, text, src='auto', dest='en', timeout=None):
+        return self.translate_batch([text], src=src, dest=dest, timeout=timeout)[0]
+
+    def translate_batch(self, texts, src='auto', dest='en', timeout=None):
+        """
+        Translate many texts with at most one backend call for all cache misses
+        Returns: list of translated strings in input order
+        """
+        src, dest, results, missing = self._lookup(texts, src, dest)
+        if missing:
+            originals = [text for text, _ in missing.values()]
+            self._store(missing, results, self._call_backend(originals, src, dest, timeout))
+        return results
+
+    async def ato_english(self, text, language):
+        return (await self.atranslate_batch([text], src=language_code(language), dest='en'))[0]
+
+    async def afrom_english(self, text, language):
+        return (await self.atranslate_batch([text], src='en', dest=language_code(language)))[0]
+
+    async def atranslate_batch(self, texts, src='auto', dest='en', timeout=None):
+        """Awaitable translate_batch; the event loop keeps running while the backend call is in flight"""
+        src, dest, results, missing = self._lookup(texts, src, dest)
+        if missing:
+            originals = [text for text, _ in missing.values()]
+            future = asyncio.wrap_future(self._executor.submit(self._backend_translate, originals, src, dest))
+            translated = None
+            start = time.perf_counter()
+            try:
+                translated = await asyncio.wait_for(future, timeout or self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                get_metrics().inc('errors', component='translation')
+                print(f"Translation timed out after {timeout or self.timeout}s")
+            except Exception as e:
+                self.errors += 1
+                get_metrics().inc('errors', component='translation')
+                print(f"Translation error: {e}")
+            get_metrics().observe('translation_backend', time.perf_counter() - start)
+            self._store(missing, results, translated)
+        return results
+
+    def _lookup(self, texts, src, dest):
+        """Serve what the cache can; collect the rest, deduplicated by normalized text"""
+        src = language_code(src) if src != 'auto' else src
+        dest = language_code(dest)
+        texts = list(texts)
+        if src == dest:
+            return src, dest, texts, None
+
+        results = [None] * len(texts)
+        missing = OrderedDict()
+        with self._lock:
+            for i, text in enumerate(texts):
+                if not text or not text.strip():
+                    results[i] = text
+                    continue
+                key = (src, dest, normalize_text(text))
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    results[i] = self._cache[key]
+                    self.hits += 1
+                else:
+                    # Identical phrases in one batch are translated once
+                    missing.setdefault(key, (text, []))[1].append(i)
+                    self.misses += 1
+        return src, dest, results, missing
+
+    def _store(self, missing, results, translated):
+        """Fill in backend results; on failure (translated is None) keep originals uncached"""
+        originals = [text for text, _ in missing.values()]
+        with self._lock:
+            for (key, (_, indices)), translation in zip(missing.items(), translated or originals):
+                for i in indices:
+                    results[i] = translation
+                if translated is not None:
+                    self._remember(key, translation)
+
+    def detect(self, text, timeout=None):
+        try:
+            future = self._executor.submit(self.backend.detect, text)
+            return future.result(timeout=timeout or self.timeout)
+        except Exception as e:
+            print(f"Error in language detection: {str(e)}")
+            return 'en'
+
+    def _backend_translate(self, texts, src, dest):
+        # Runs on the executor, so a backend that fails to initialise fails like any backend call
+        return self.backend.translate_batch(texts, src, dest)
+
+    def _call_backend(self, texts, src, dest, timeout):
+        """Translate texts; returns None on error or timeout so nothing gets cached"""
+        future = self._executor.submit(self._backend_translate, texts, src, dest)
+        try:
+            with get_metrics().timer('translation_backend'):
+                return future.result(timeout=timeout or self.timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            get_metrics().inc('errors', component='translation')
+            print(f"Translation timed out after {timeout or self.timeout}s")
+        except Exception as e:
+            self.errors += 1
+            get_metrics().inc('errors', component='translation')
+            print(f"Translation error: {e}")
+        return None
+
+    def _remember(self, key, translation):
+        self._unsaved += 1
+        self._cache[key] = translation
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def stats(self):
+        return {
+            'backend': (self._backend or GoogleTransBackend).name,
+            'size': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+        }
+
+    def load(self, path=None):
+        """Load cached translations from a JSON file if it exists"""
+        path = path or self.cache_path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+            with self._lock:
+                for src, dest, key, translation in entries:
+                    self._remember((src, dest, key), translation)
+                self._unsaved = 0
+        except Exception as e:
+            print(f"Error loading translation cache: {str(e)}")
+
+    def save(self, path=None):
+        """Persist the cache as JSON"""
+        path = path or self.cache_path
+        if not path:
+            return
+        with self._lock:
+            entries = [[src, dest, key, value] for (src, dest, key), value in self._cache.items()]
+            unsaved, self._unsaved = self._unsaved, 0
+        tmp_path = path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            with self._lock:
+                self._unsaved += unsaved
+            print(f"Error saving translation cache: {str(e)}")
+
+    def _save_periodically(self):
+        while not self._closed.wait(self.save_interval):
+            if self._unsaved:
+                self.save()
+
+    def close(self):
+        """Stop the periodic save and persist anything not yet saved"""
+        self._closed.set()
+        if self.cache_path and self._unsaved:
+            self.save()
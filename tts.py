@@ -0,0 +1,189 @@
+"""
+Background text-to-speech playback.
+
+One worker thread owns the speech engine (pyttsx3 engines must stay on the thread
+that created them) and plays queued replies sentence by sentence. Sentences are
+translated on a separate thread in order, so the first one is spoken while the
+rest are still being translated. Cancelling only sets a flag; the worker thread
+checks it before each sentence and, through the engine's started-word callback,
+before each word, and stops the engine itself:
+
+    job = get_tts_worker().speak(reply, translate=to_hindi)
+    ...
+    job.cancel()   # the user sent a new message
+"""
+import queue
+import re
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from metrics import get_metrics
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+
+def _create_engine():
+    import pyttsx3
+    return pyttsx3.init()
+
+
+class SpeechJob:
+    """
+    A reply queued for speaking. cancel() drops it, or has the worker stop it at the
+    next word (at the end of the sentence with engines that do not report words).
+    """
+
+    def __init__(self, sentences):
+        self.sentences = sentences
+        self.submitted = time.perf_counter()
+        self.spoken = 0
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        """Safe from any thread: never touches the engine, only signals the worker"""
+        self._cancelled.set()
+        for sentence in self.sentences:
+            if isinstance(sentence, Future):
+                sentence.cancel()
+
+    def wait(self, timeout=None):
+        """Block until the reply has been spoken or cancelled; returns False on timeout"""
+        return self._done.wait(timeout)
+
+
+class TTSWorker:
+    """Plays SpeechJobs one after another on a dedicated thread, started on first use"""
+
+    def __init__(self, engine_factory=None):
+        self.engine_factory = engine_factory or _create_engine
+        self._engine = None
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._translator = None
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._translator = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tts-translate')
+                self._thread = threading.Thread(target=self._run, name='tts', daemon=True)
+                self._thread.start()
+
+    def speak(self, text, translate=None):
+        """
+        Queue text for speaking without blocking. translate, if given, is applied to
+        each sentence in the background before it is spoken.
+        Returns: SpeechJob
+        """
+        self._start()
+        sentences = split_sentences(text)
+        if translate is not None:
+            sentences = [self._translator.submit(translate, sentence) for sentence in sentences]
+        job = SpeechJob(sentences)
+        self._jobs.put(job)
+        return job
+
+    def cancel_all(self):
+        """Drop every queued reply and have the worker stop the one being spoken"""
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancel()
+                job._done.set()
+        current = self._current
+        if current is not None:
+            current.cancel()
+
+    def close(self):
+        """Stop the worker thread once the queued replies have played"""
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+            self._translator.shutdown(wait=False, cancel_futures=True)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            self._current = job
+            try:
+                self._play(job)
+            finally:
+                self._current = None
+                job._done.set()
+
+    def _play(self, job):
+        metrics = get_metrics()
+        for sentence in job.sentences:
+            if job.cancelled:
+                break
+            try:
+                text = sentence.result() if isinstance(sentence, Future) else sentence
+                if self._engine is None:
+                    self._engine = self._create_engine()
+                if job.cancelled:
+                    break
+                if job.spoken == 0:
+                    metrics.observe('tts_first_sentence', time.perf_counter() - job.submitted)
+                with metrics.timer('text_to_speech'):
+                    self._engine.say(text)
+                    self._engine.runAndWait()
+                if job.cancelled:
+                    break
+                job.spoken += 1
+            except CancelledError:
+                break
+            except Exception as e:
+                if job.cancelled:
+                    break
+                metrics.inc('errors', component='speech')
+                print(f"Error in text-to-speech: {e}")
+                break
+        if job.cancelled:
+            metrics.inc('tts_cancelled')
+
+    def _create_engine(self):
+        engine = self.engine_factory()
+        connect = getattr(engine, 'connect', None)
+        if connect is not None:
+            connect('started-word', self._on_word)
+        return engine
+
+    def _on_word(self, name, location, length):
+        # Called by the engine on this worker's thread during runAndWait(), so
+        # stopping it here keeps every engine call on the thread that owns it
+        current = self._current
+        if current is not None and current.cancelled:
+            self._engine.stop()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_tts_worker():
+    """Return the worker shared by the whole process (there is one audio output)"""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = TTSWorker()
+        return _worker
@@ -1,47 +1,107 @@
-import speech_recognition as sr
-import pyttsx3
-from googletrans import Translator
-import streamlit as st
-import tempfile
-import os
-import sounddevice as sd
-import soundfile as sf
-import numpy as np
-import wave
-import tempfile
+import sys
+import config
+from metrics import get_metrics
+
+# Audio and UI stacks (speech_recognition, sounddevice, numpy, streamlit) are imported
+# on first use so text-only callers and headless nodes without PortAudio never load them.
+
+def report_error(message):
+    """Show an error in the Streamlit UI when running under it, otherwise print it"""
+    if 'streamlit' in sys.modules:
+        import streamlit as st
+        st.error(message)
+    else:
+        print(message)
 
 class SpeechHandler:
-    def __init__(self):
+    def __init__(self, translation_service=None):
         self.recorder = None
-        self.audio_file = None
-        self.sample_rate = 44100
-        self.recognizer = sr.Recognizer()
-        self.recording_data = []
-        self.translator = Translator()
+        self.buffer = None
+        self.sample_rate = config.SPEECH_CAPTURE_RATE
+        self.target_rate = config.SPEECH_SAMPLE_RATE or self.sample_rate
+        self._recognizer = None
+        self._vad = None
+        self._speech_job = None
+        if translation_service is None:
+            from registry import get_registry
+            translation_service = get_registry().get_translation_service()
+        self.translation_service = translation_service
+    
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+
+    @property
+    def vad(self):
+        """Voice activity detector holding this session's ambient noise profile"""
+        if self._vad is None:
+            from audio import VoiceActivityDetector
+            self._vad = VoiceActivityDetector()
+        return self._vad
+
+    def calibrate(self, recognizer, source):
+        """
+        Set recognizer's energy threshold for an open sr.Microphone from the cached noise
+        profile, sampling the ambient noise only the first time in a session
+        """
+        if self.vad.noise_floor is None:
+            import numpy as np
+            chunks = int(config.SPEECH_CALIBRATION_SECONDS * source.SAMPLE_RATE / source.CHUNK) + 1
+            raw = b''.join(source.stream.read(source.CHUNK) for _ in range(chunks))
+            self.vad.calibrate(np.frombuffer(raw, dtype=np.int16), source.SAMPLE_RATE)
+        recognizer.energy_threshold = self.vad.threshold
+
+    def trim_silence(self, audio):
+        """
+        Keep only the speech in an AudioData
+        Returns: trimmed AudioData, or None if it holds no speech
+        """
+        import numpy as np
+        from audio import to_audio_data
+        with get_metrics().timer('vad'):
+            samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype=np.int16)
+            speech = self.vad.trim(samples, audio.sample_rate)
+        get_metrics().inc('vad_samples', len(samples) - len(speech), kind='trimmed')
+        get_metrics().inc('vad_samples', len(speech), kind='speech')
+        if len(speech) == 0:
+            return None
+        return to_audio_data(speech, audio.sample_rate)
         
     def start_recording(self):
-        """Start recording audio"""
-        # Create a temporary file for recording
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-        self.audio_file = temp_file.name
-        self.recording_data = []
+        """Start recording audio into a preallocated in-memory buffer"""
+        import sounddevice as sd
+        from audio import RingBuffer, Resampler
+
+        # Sized once for the longest recording kept; blocks are resampled as they arrive
+        capacity = int(config.SPEECH_MAX_SECONDS * self.target_rate)
+        if self.buffer is None or self.buffer.capacity != capacity:
+            self.buffer = RingBuffer(capacity)
+        self.buffer.clear()
+        buffer = self.buffer
+        resampler = Resampler(self.sample_rate, self.target_rate)
         
         def callback(indata, frames, time, status):
             if status:
                 print(status)
-            self.recording_data.append(indata.copy())
+            buffer.write(resampler.process(indata[:, 0]))
             
         # Start recording
         self.recorder = sd.InputStream(
             samplerate=self.sample_rate,
             channels=1,
+            dtype='int16',
             callback=callback
         )
         self.recorder.start()
-        return self.audio_file
     
     def stop_recording(self):
-        """Stop recording and save the audio file"""
+        """
+        Stop recording and hand the audio over in memory
+        Returns: speech_recognition AudioData at self.target_rate, or None if nothing was recorded
+        """
         if self.recorder is None:
             return None
             
@@ -50,59 +110,63 @@ class SpeechHandler:
         self.recorder.close()
         self.recorder = None
         
-        # Combine all recorded chunks
-        if len(self.recording_data) > 0:
-            recording = np.concatenate(self.recording_data, axis=0)
-            
-            # Save the recording
-            with wave.open(self.audio_file, 'wb') as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)
-                wf.setframerate(self.sample_rate)
-                wf.writeframes((recording * 32767).astype(np.int16).tobytes())
-            
-            return self.audio_file
-        return None
+        if len(self.buffer) == 0:
+            return None
+        from audio import to_audio_data
+        return to_audio_data(self.buffer.samples(), self.target_rate)
     
-    def speech_to_text(self, audio_file):
-        """Convert speech to text"""
+    def speech_to_text(self, audio, language='en-US'):
+        """Convert speech (AudioData from stop_recording, or a WAV file path) to text"""
+        import speech_recognition as sr
         try:
-            with sr.AudioFile(audio_file) as source:
-                audio = self.recognizer.record(source)
-                text = self.recognizer.recognize_google(audio)
-                return text
+            with get_metrics().timer('speech_to_text'):
+                if not isinstance(audio, sr.AudioData):
+                    with sr.AudioFile(audio) as source:
+                        audio = self.recognizer.record(source)
+                if config.SPEECH_VAD:
+                    audio = self.trim_silence(audio)
+                    if audio is None:
+                        return None
+                return self.recognizer.recognize_google(audio, language=language)
         except Exception as e:
             print(f"Error in speech recognition: {e}")
+            get_metrics().inc('errors', component='speech')
             return None
         
     def text_to_speech(self, text, language='en'):
-        """Convert text to speech"""
-        try:
-            # Translate text if needed
-            if language != 'en':
-                translated = self.translator.translate(text, dest=language)
-                text = translated.text
-            
-            # Generate speech
-            self.engine.say(text)
-            self.engine.runAndWait()
-        except Exception as e:
-            st.error(f"Error in text-to-speech: {str(e)}")
+        """
+        Speak text on the background TTS worker, one sentence at a time, translating
+        later sentences while the first is already playing. Replaces any reply from
+        this handler that is still pending.
+        Returns: tts.SpeechJob
+        """
+        from tts import get_tts_worker
+        self.cancel_speech()
+        translate = None
+        if language != 'en':
+            def translate(sentence):
+                return self.translation_service.translate(sentence, src='auto', dest=language)
+        self._speech_job = get_tts_worker().speak(text, translate=translate)
+        return self._speech_job
+
+    def cancel_speech(self):
+        """Drop the reply this handler queued, or stop it at the next word being spoken"""
+        if self._speech_job is not None:
+            self._speech_job.cancel()
+            self._speech_job = None
     
     def translate_text(self, text, target_lang='en'):
         """Translate text to target language"""
         try:
-            translated = self.translator.translate(text, dest=target_lang)
-            return translated.text
+            return self.translation_service.translate(text, src='auto', dest=target_lang)
         except Exception as e:
-            st.error(f"Error in translation: {str(e)}")
+            report_error(f"Error in translation: {str(e)}")
             return text
     
     def detect_language(self, text):
         """Detect the language of the text"""
         try:
-            detected = self.translator.detect(text)
-            return detected.lang
+            return self.translation_service.detect(text)
         except Exception as e:
-            st.error(f"Error in language detection: {str(e)}")
+            report_error(f"Error in language detection: {str(e)}")
             return 'en'
\ No newline at end of file
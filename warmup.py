@@ -0,0 +1,144 @@
+"""
+Background model warm-up and readiness.
+
+Loading the models and the first inferences through them (graph building,
+allocator growth, kernel selection) make the first turn of a fresh process very
+slow. ModelRegistry.warm_up() does that work on a background thread instead, so
+entry points can report "warming up" or refuse traffic until it is ready:
+
+    warmup = get_registry().warm_up()
+    warmup.wait()          # or poll warmup.ready / warmup.status()
+"""
+import functools
+import threading
+import time
+import config
+from metrics import get_metrics
+
+# Representative user messages: a one-word reply, a typical sentence and a long message
+WARMUP_TEXTS = [
+    "ok",
+    "I have been feeling a bit anxious about work lately.",
+    "I don't really know how to explain it, but for the past few weeks everything has felt "
+    "heavier than usual. I get up, go to work, come home and I'm exhausted, and even the "
+    "things I used to enjoy don't seem to help. My friends keep asking if I'm okay and I "
+    "just say I'm tired, because I'm not sure what else to tell them.",
+]
+WARMUP_PROMPT = "Ask a gentle follow-up question to someone who feels anxious about work."
+# Warm-up generations are capped at this many tokens: enough to exercise decoding, not to finish a reply
+WARMUP_MAX_LENGTH = 24
+
+STATES = ('cold', 'loading', 'warming', 'ready', 'failed')
+
+
+def warm_profiles():
+    """
+    Generation profiles whose models are loaded and warmed up: every profile when a
+    latency budget is configured, since the selector then switches to faster ones
+    under load and the first switch must not load a model inside a request;
+    otherwise only the configured profile
+    """
+    from generation import PROFILES
+
+    if config.LATENCY_BUDGET is not None:
+        return list(PROFILES.values())
+    return [PROFILES.get(config.GENERATION_PROFILE) or next(iter(PROFILES.values()))]
+
+
+class Warmup:
+    """Loads the registry's models and runs warm-up inferences, tracking progress"""
+
+    def __init__(self, registry, texts=None):
+        self.registry = registry
+        self.texts = list(texts or WARMUP_TEXTS)
+        self.state = 'cold'
+        self.stage = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.state == 'ready'
+
+    @property
+    def done(self):
+        """Ready, or failed (the models then load lazily on first use as before)"""
+        return self._done.is_set()
+
+    def start(self):
+        """Run the warm-up on a background thread (only the first call starts it)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, name='warmup', daemon=True)
+                self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Block until the warm-up is done; returns False on timeout"""
+        return self._done.wait(timeout)
+
+    def status(self):
+        elapsed = None
+        if self.started is not None:
+            elapsed = (self.finished or time.perf_counter()) - self.started
+        return {'state': self.state, 'stage': self.stage, 'seconds': elapsed, 'error': self.error}
+
+    def run(self):
+        self.started = time.perf_counter()
+        try:
+            self.state = 'loading'
+            self._step('emotion model', self.registry.get_emotion_detector)
+            self._step('conversation model', self.registry.get_conversation_pipeline)
+            for profile in warm_profiles():
+                if profile.model != self.registry.conversation_model:
+                    self._step(f'{profile.name} model', functools.partial(
+                        self.registry.get_conversation_pipeline, profile.model
+                    ))
+            self._step('response bank', self.registry.get_response_bank)
+            self._step('translation', self.registry.get_translation_service)
+            self.state = 'warming'
+            self._step('emotion inference', self._warm_emotion)
+            self._step('generation', self._warm_generation)
+            self.stage = None
+            self.state = 'ready'
+        except Exception as e:
+            print(f"Error warming up models: {str(e)}")
+            get_metrics().inc('errors', component='warmup')
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self.finished = time.perf_counter()
+            get_metrics().observe('warmup', self.finished - self.started)
+            self._done.set()
+
+    def _step(self, stage, work):
+        self.stage = stage
+        with get_metrics().timer(f'warmup_{stage.replace(" ", "_")}'):
+            work()
+
+    def _warm_emotion(self):
+        """One text at a time, as in a chat turn, and all of them as one padded batch"""
+        detector = self.registry.get_emotion_detector()
+        if detector.emotion_classifier is None:
+            return
+        for text in self.texts:
+            detector.score_matrix([text])
+        detector.score_matrix(self.texts)
+
+    def _warm_generation(self):
+        """A short generation with each decoding setup of every warmed profile"""
+        from generation import generate_many, generation_request
+
+        for profile in warm_profiles():
+            pipeline = self.registry.get_conversation_pipeline(profile.model)
+            if pipeline is None:
+                continue
+            requests = []
+            for kwargs in (profile.base_kwargs(), profile.follow_up_kwargs()):
+                kwargs.update(max_length=WARMUP_MAX_LENGTH, min_length=min(kwargs['min_length'], WARMUP_MAX_LENGTH))
+                requests.append(generation_request('warmup_generate', WARMUP_PROMPT, '', **kwargs))
+            generate_many(pipeline, requests, mode='sequential')